@@ -0,0 +1,12 @@
+"""Helpers shared by the agent apps (daxa_chatbot_app, atlassian_langgraph_app,
+customer_billing_langgraph_app), kept in one place so the copies can't drift.
+
+The apps run from their own folders (streamlit run / python <script>), so a
+module that imports from here first puts the repository root on sys.path:
+
+    _REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+    if _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+
+    from agent_common.loop_utils import iter_async_generator
+"""
@@ -0,0 +1,155 @@
+"""Run a file of questions through an agent app and write JSONL results.
+
+Shared by the LangGraph agent apps: each app's batch_runner.py passes its
+main module to cli(), which is all that differs between them. The app
+module must provide async get_langgraph() (the compiled graph, built once
+and shared by every query) and extract_final_answer(step).
+
+Queries run concurrently, at most --workers at a time (model calls are
+further bounded by the app's LLM_CONCURRENCY). One JSON object is written
+per question as soon as it finishes, so a long overnight run can be
+inspected or resumed while it is still going.
+
+Usage (from an app folder):
+    python batch_runner.py questions.txt                      # -> batch_results.jsonl
+    python batch_runner.py questions.txt -o out.jsonl -w 8
+    python batch_runner.py questions.txt --timeout 120        # per-query limit (s)
+
+Questions file: one question per line; blank lines and lines starting
+with "#" are skipped.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+DEFAULT_OUTPUT = "batch_results.jsonl"
+
+
+def read_questions(path: str) -> List[str]:
+    """Non-empty, non-comment lines of path."""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def summarize_steps(all_steps) -> Dict:
+    """Tool calls (in call order) and summed token usage from call_model steps."""
+    tool_calls: List[str] = []
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for step in all_steps:
+        for message in step.get("call_model", {}).get("messages", []):
+            if not isinstance(message, AIMessage):
+                continue
+            tool_calls.extend(tc["name"] for tc in message.tool_calls or [])
+            for key in usage:
+                usage[key] += (message.usage_metadata or {}).get(key, 0)
+    return {"tool_calls": tool_calls, "usage": usage}
+
+
+async def run_one(
+    graph, extract_final_answer: Callable, index: int, question: str, timeout_s: Optional[float],
+) -> Dict:
+    """Run one question and return its result record (never raises)."""
+    all_steps = []
+
+    async def _run():
+        inputs = {"messages": [HumanMessage(content=question)]}
+        async for step in graph.astream(inputs, config={"recursion_limit": 10}):
+            all_steps.append(step)
+
+    started = time.perf_counter()
+    error = None
+    try:
+        await asyncio.wait_for(_run(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        error = f"timed out after {timeout_s:g}s"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    latency_s = time.perf_counter() - started
+
+    return {
+        "index": index,
+        "question": question,
+        "answer": extract_final_answer(all_steps[-1]) if all_steps and not error else None,
+        "error": error,
+        "latency_s": round(latency_s, 3),
+        **summarize_steps(all_steps),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def run_batch(
+    app: ModuleType, questions: List[str], workers: int = 4, timeout_s: Optional[float] = None
+) -> AsyncIterator[Dict]:
+    """Yield a result record per question, answered by app's agent, in
+    completion order.
+
+    Each record carries the question's "index" in the input list.
+    """
+    graph = await app.get_langgraph()
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def _bounded(index: int, question: str) -> Dict:
+        async with semaphore:
+            return await run_one(graph, app.extract_final_answer, index, question, timeout_s)
+
+    pending = [asyncio.ensure_future(_bounded(i, q)) for i, q in enumerate(questions)]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _main_async(app: ModuleType, args) -> int:
+    questions = read_questions(args.questions)
+    if not questions:
+        print(f"No questions in {args.questions}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    records = []
+    with open(args.output, "a" if args.append else "w", encoding="utf-8") as out:
+        async for record in run_batch(app, questions, args.workers, args.timeout):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            status = "ERROR " + record["error"] if record["error"] else "ok"
+            print(f"[{len(records)}/{len(questions)}] #{record['index']} "
+                  f"{record['latency_s']:.2f}s {status}", file=sys.stderr)
+
+    latencies = [r["latency_s"] for r in records]
+    errors = sum(1 for r in records if r["error"])
+    tokens = sum(r["usage"]["total_tokens"] for r in records)
+    print(
+        f"{len(records)} queries in {time.perf_counter() - started:.1f}s, {errors} errors, "
+        f"latency p50 {_percentile(latencies, 50):.2f}s p95 {_percentile(latencies, 95):.2f}s, "
+        f"{tokens} tokens -> {args.output}",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+def cli(app: ModuleType, argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for app's batch_runner.py; returns the exit code."""
+    parser = argparse.ArgumentParser(description="Batch query runner")
+    parser.add_argument("questions", help="Text file, one question per line")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSONL results file")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Queries in flight at once")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-query timeout in seconds")
+    parser.add_argument("--append", action="store_true", help="Append to the output file")
+    args = parser.parse_args(argv)
+    return asyncio.run(_main_async(app, args))
@@ -0,0 +1,33 @@
+"""Per-event-loop cache for a compiled LangGraph, shared by the agent apps."""
+import asyncio
+import weakref
+
+
+class PerLoopGraphCache:
+    """One compiled graph per event loop, shared by all queries on that loop.
+
+    build is an async callable returning the compiled graph. Graphs hold
+    loop-bound state (e.g. the model node's semaphore), hence the per-loop
+    key; entries go away with their loop.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._builds = weakref.WeakKeyDictionary()
+
+    async def get(self):
+        """Return this event loop's graph, building it on first use.
+
+        Concurrent first callers await the same build; a failed build is not
+        cached, so the next query retries.
+        """
+        loop = asyncio.get_running_loop()
+        build = self._builds.get(loop)
+        if build is None:
+            build = self._builds[loop] = asyncio.ensure_future(self._build())
+        try:
+            return await asyncio.shield(build)
+        except Exception:
+            if self._builds.get(loop) is build:
+                del self._builds[loop]
+            raise
@@ -0,0 +1,84 @@
+"""Process-wide background asyncio loop, shared across Streamlit reruns.
+
+Streamlit re-executes the page script on every interaction, but imported
+modules stay loaded for the life of the server process. The loop started
+here runs on a daemon thread, so async resources bound to it (pooled MCP
+sessions, httpx.AsyncClient connection pools) outlive any single query.
+Shared by every agent app (see agent_common).
+"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+_END = object()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background loop, starting its daemon thread on first use."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="daxa-async-loop", daemon=True).start()
+            log.info("[loop] background event loop started")
+            _LOOP = loop
+    return _LOOP
+
+
+def run_coroutine(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run coro on the background loop from synchronous code and return its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result(timeout)
+
+
+async def run_on_background_loop(coro: Awaitable) -> Any:
+    """Await coro on the background loop from whatever loop is currently running.
+
+    Awaits directly when already on the background loop. Cancelling the
+    caller cancels the coroutine on the background loop too.
+    """
+    loop = get_background_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def iter_async_generator(agen: AsyncIterator) -> Iterator:
+    """Drive an async generator on the background loop and yield its items
+    synchronously, as they are produced.
+
+    This is the bridge for Streamlit scripts: the script thread renders each
+    item while the generator keeps running on the shared loop. Exceptions
+    from agen are re-raised here; closing the returned iterator early (e.g.
+    Streamlit stopping the script on a rerun) cancels agen.
+    """
+    items: queue.Queue = queue.Queue()
+
+    async def _pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except Exception as exc:
+            items.put((_END, exc))
+        else:
+            items.put((_END, None))
+        finally:
+            await agen.aclose()
+
+    future = asyncio.run_coroutine_threadsafe(_pump(), get_background_loop())
+    try:
+        while True:
+            item, exc = items.get()
+            if item is _END:
+                if exc is not None:
+                    raise exc
+                return
+            yield item
+    finally:
+        future.cancel()
@@ -0,0 +1,23 @@
+"""Async LangGraph model node shared by the agent apps."""
+import asyncio
+
+from langgraph.graph import MessagesState
+
+
+def make_async_model_node(model_with_tools, max_concurrency: int):
+    """Build a call_model node that awaits model_with_tools.ainvoke.
+
+    The LLM request doesn't block the event loop graph.astream runs on, so
+    other queries on the same loop make progress meanwhile. At most
+    max_concurrency model calls made through this node run at once. The
+    semaphore is bound to the loop the graph first runs on, so build one
+    graph per event loop (see agent_common.graph_cache.PerLoopGraphCache).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call_model(state: MessagesState):
+        async with semaphore:
+            response = await model_with_tools.ainvoke(state["messages"])
+        return {"messages": [response]}
+
+    return call_model
@@ -0,0 +1,11 @@
+"""Per-step wall-time record yielded as the last line of stream_query_steps."""
+from typing import List, Tuple
+
+# Prefix of the timing line. UIs match it to show the timings apart from the
+# intermediate step list (and outside any step pacing).
+STEP_TIMINGS_PREFIX = "Step timings: "
+
+
+def format_step_timings(timings: List[Tuple[str, float]]) -> str:
+    """One-line summary of (step, seconds) pairs, e.g. "Step timings: setup 0.01s, ..."."""
+    return STEP_TIMINGS_PREFIX + ", ".join(f"{name} {secs:.2f}s" for name, secs in timings)
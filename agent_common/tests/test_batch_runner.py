@@ -0,0 +1,131 @@
+"""batch_runner: completion-order results, timeouts, cancellation and the summary."""
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agent_common import batch_runner  # noqa: E402
+from agent_common.batch_runner import _percentile, run_batch, summarize_steps  # noqa: E402
+
+
+class _FakeGraph:
+    """Answers "<delay>" questions after sleeping that many seconds; a
+    question of "hang" never finishes."""
+
+    def __init__(self):
+        self.cancelled = []
+
+    async def astream(self, inputs, config=None):
+        question = inputs["messages"][0].content
+        try:
+            if question == "hang":
+                await asyncio.Event().wait()
+            await asyncio.sleep(float(question))
+        except asyncio.CancelledError:
+            self.cancelled.append(question)
+            raise
+        yield {"call_model": {"messages": [AIMessage(
+            content="", tool_calls=[{"name": "search", "args": {}, "id": "1"}],
+            usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+        )]}}
+        yield {"call_model": {"messages": [AIMessage(
+            content=f"answer {question}",
+            usage_metadata={"input_tokens": 20, "output_tokens": 5, "total_tokens": 25},
+        )]}}
+
+
+def _fake_app(graph):
+    async def get_langgraph():
+        return graph
+
+    return SimpleNamespace(
+        get_langgraph=get_langgraph,
+        extract_final_answer=lambda step: step["call_model"]["messages"][-1].content,
+    )
+
+
+async def _collect(app, questions, **kwargs):
+    return [record async for record in run_batch(app, questions, **kwargs)]
+
+
+def test_results_are_yielded_as_they_complete():
+    records = asyncio.run(_collect(_fake_app(_FakeGraph()), ["0.2", "0", "0.1"], workers=3))
+
+    assert [r["index"] for r in records] == [1, 2, 0]
+    assert [r["answer"] for r in records] == ["answer 0", "answer 0.1", "answer 0.2"]
+    assert all(r["error"] is None for r in records)
+    assert records[0]["tool_calls"] == ["search"]
+    assert records[0]["usage"] == {"input_tokens": 30, "output_tokens": 7, "total_tokens": 37}
+
+
+def test_per_question_timeout_is_an_error_record():
+    graph = _FakeGraph()
+
+    records = asyncio.run(_collect(_fake_app(graph), ["hang", "0"], workers=2, timeout_s=0.1))
+
+    by_index = {r["index"]: r for r in records}
+    assert by_index[0]["error"] == "timed out after 0.1s" and by_index[0]["answer"] is None
+    assert by_index[1]["error"] is None and by_index[1]["answer"] == "answer 0"
+    assert graph.cancelled == ["hang"]
+
+
+def test_pending_tasks_are_cancelled_on_early_exit():
+    graph = _FakeGraph()
+
+    async def first_then_stop():
+        results = run_batch(_fake_app(graph), ["0", "hang", "hang"], workers=3)
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)  # let the cancellations land
+        return first
+
+    first = asyncio.run(first_then_stop())
+
+    assert first["index"] == 0
+    assert graph.cancelled == ["hang", "hang"]
+
+
+def test_summarize_steps_skips_non_ai_messages():
+    steps = [{"tools": {"messages": ["tool output"]}}, {"call_model": {"messages": ["not an AIMessage"]}}]
+
+    assert summarize_steps(steps) == {
+        "tool_calls": [], "usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+    }
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 21)]  # 1..20, shuffled order must not matter
+    values = values[::2] + values[1::2]
+
+    assert _percentile(values, 50) == 11.0
+    assert _percentile(values, 95) == 19.0
+    assert _percentile(values, 100) == 20.0
+    assert _percentile([3.5], 95) == 3.5
+
+
+def test_cli_writes_jsonl_and_p50_p95_summary(tmp_path, monkeypatch, capsys):
+    questions = tmp_path / "questions.txt"
+    questions.write_text("# latencies in seconds\n" + "\n\n".join(str(i) for i in range(1, 21)) + "\n")
+    output = tmp_path / "out.jsonl"
+
+    async def fake_run_one(graph, extract_final_answer, index, question, timeout_s):
+        return {
+            "index": index, "question": question, "answer": "ok", "error": None,
+            "latency_s": float(question), "tool_calls": [], "usage": {"total_tokens": 3},
+        }
+
+    monkeypatch.setattr(batch_runner, "run_one", fake_run_one)
+
+    code = batch_runner.cli(_fake_app(_FakeGraph()), [str(questions), "-o", str(output), "-w", "4"])
+
+    assert code == 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["index"] for r in records) == list(range(20))
+    summary = capsys.readouterr().err.strip().splitlines()[-1]
+    assert summary.startswith("20 queries in ") and ", 0 errors, " in summary
+    assert "latency p50 11.00s p95 19.00s, 60 tokens" in summary
@@ -0,0 +1,62 @@
+"""Concurrent LangGraph tool node shared by the agent apps."""
+import asyncio
+import logging
+
+from langchain_core.messages import ToolMessage
+from langgraph.graph import MessagesState
+
+log = logging.getLogger(__name__)
+
+
+def make_concurrent_tool_node(tools_by_name: dict, max_concurrency: int, timeout_s: float):
+    """Build a LangGraph tool node that runs the last message's tool calls concurrently.
+
+    At most max_concurrency calls are in flight at once. A call that exceeds
+    timeout_s (it is cancelled) or raises is answered with an error
+    ToolMessage for that call alone, so the model sees the failure and the
+    other calls' results are kept. ToolMessages are returned in the order
+    the model emitted the tool calls, each paired with its tool_call_id.
+    A call to a tool not in tools_by_name gets an error ToolMessage too, so
+    every tool_call_id is answered.
+    """
+    async def concurrent_tool_node(state: MessagesState):
+        last_message = state["messages"][-1]
+        if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
+            return {"messages": []}
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_tool_call(tool_call: dict) -> ToolMessage:
+            tool_name = tool_call["name"]
+            if tool_name not in tools_by_name:
+                log.warning("[Graph] unknown tool %s requested", tool_name)
+                return ToolMessage(
+                    content=f"Unknown tool {tool_name}",
+                    name=tool_name,
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                )
+            status = "success"
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        tools_by_name[tool_name].ainvoke(tool_call["args"]), timeout=timeout_s
+                    )
+                except asyncio.TimeoutError:
+                    log.warning("[Graph] tool %s timed out after %gs", tool_name, timeout_s)
+                    result = f"Error: tool {tool_name} timed out after {timeout_s:g}s"
+                    status = "error"
+                except Exception as exc:
+                    log.warning("[Graph] tool %s failed — %s: %s", tool_name, type(exc).__name__, exc)
+                    result = f"Error: tool {tool_name} failed — {type(exc).__name__}: {exc}"
+                    status = "error"
+            return ToolMessage(
+                content=str(result),
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+                status=status,
+            )
+
+        tool_messages = await asyncio.gather(*(run_tool_call(tc) for tc in last_message.tool_calls))
+        return {"messages": list(tool_messages)}
+
+    return concurrent_tool_node
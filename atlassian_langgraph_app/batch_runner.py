@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Run a file of questions through this app's agent and write JSONL results.
+
+The runner itself is shared with the other agent apps; see
+agent_common/batch_runner.py for options and the output format.
+
+Usage:
+    python batch_runner.py questions.txt -o results.jsonl --workers 8 --timeout 120
+"""
+import sys
+from pathlib import Path
+
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+import main
+from agent_common.batch_runner import cli
+
+if __name__ == "__main__":
+    sys.exit(cli(main))
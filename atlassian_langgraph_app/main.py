@@ -1,13 +1,26 @@
 # Atlassian MCP LangGraph Example
 import os
 import asyncio
+import sys
+import time
 import json
+from pathlib import Path
+from typing import List
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END, MessagesState
-from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from agent_common.graph_cache import PerLoopGraphCache
+from agent_common.model_node import make_async_model_node
+from agent_common.step_timings import format_step_timings
+from agent_common.tool_node import make_concurrent_tool_node
+
 # Load environment variables from .env file
 load_dotenv(override=True)
 
@@ -24,6 +37,15 @@ if not MCP_SERVER_URL:
 if not MCP_SERVER_API_KEY:
     raise ValueError("MCP_SERVER_API_KEY environment variable is required")
 
+# Tool calls from one model message run concurrently: at most TOOL_CONCURRENCY
+# at a time, each bounded by TOOL_TIMEOUT_S seconds
+TOOL_CONCURRENCY = max(1, int(os.getenv("MCP_TOOL_CONCURRENCY", "4") or 4))
+TOOL_TIMEOUT_S = float(os.getenv("MCP_TOOL_TIMEOUT_S", "60") or 60)
+
+# At most LLM_CONCURRENCY model calls are in flight at once across all
+# queries served by this process (per event loop)
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "8") or 8))
+
 # Load chat model
 chat_model = ChatOpenAI(model="gpt-4o-mini")
 
@@ -54,32 +76,6 @@ async def setup_langgraph():
     # Bind tools to model
     model_with_tools = chat_model.bind_tools(tools)
 
-    # Define custom async tool node
-    async def async_tool_node(state: MessagesState):
-        messages = state["messages"]
-        last_message = messages[-1]
-        
-        if not hasattr(last_message, 'tool_calls') or not last_message.tool_calls:
-            return {"messages": []}
-        
-        tool_messages = []
-        for tool_call in last_message.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            tool_call_id = tool_call["id"]
-            
-            if tool_name in tools_by_name:
-                # Call the async tool
-                result = await tools_by_name[tool_name].ainvoke(tool_args)
-                tool_message = ToolMessage(
-                    content=str(result),
-                    name=tool_name,
-                    tool_call_id=tool_call_id
-                )
-                tool_messages.append(tool_message)
-        
-        return {"messages": tool_messages}
-
     # Define routing function
     def should_continue(state: MessagesState):
         messages = state["messages"]
@@ -88,17 +84,11 @@ async def setup_langgraph():
             return "tools"
         return END
 
-    # Define model function
-    def call_model(state: MessagesState):
-        messages = state["messages"]
-        response = model_with_tools.invoke(messages)
-        return {"messages": [response]}
-
     # Build the LangGraph
     builder = StateGraph(MessagesState)
 
-    builder.add_node("call_model", call_model)
-    builder.add_node("tools", async_tool_node)
+    builder.add_node("call_model", make_async_model_node(model_with_tools, LLM_CONCURRENCY))
+    builder.add_node("tools", make_concurrent_tool_node(tools_by_name, TOOL_CONCURRENCY, TOOL_TIMEOUT_S))
 
     builder.add_edge(START, "call_model")
     builder.add_conditional_edges(
@@ -109,6 +99,14 @@ async def setup_langgraph():
 
     return builder.compile()
 
+# One compiled graph per event loop, shared by all queries on that loop
+_GRAPHS = PerLoopGraphCache(setup_langgraph)
+
+
+async def get_langgraph():
+    """Return this event loop's compiled graph, building it on first use."""
+    return await _GRAPHS.get()
+
 def extract_final_answer(stream_result):
     """Extract the final answer from the stream result"""
     try:
@@ -141,10 +139,25 @@ def extract_tools_used(stream_result):
     return list(tools_used)
 
 async def stream_query_steps(user_input: str):
-    """Process the user query through the LangGraph and yield status messages at each step"""
+    """Process the user query through the LangGraph and yield status messages at each step
+
+    The last line is a "Step timings" record: wall time for setup and for
+    each graph node as it completed, plus the total.
+    """
+    started = last_mark = time.perf_counter()
+    timings = []
+
+    # Record time spent since the previous mark under name
+    def mark(name):
+        nonlocal last_mark
+        now = time.perf_counter()
+        timings.append((name, now - last_mark))
+        last_mark = now
+
     try:
         # Setup the graph
-        graph = await setup_langgraph()
+        graph = await get_langgraph()
+        mark("setup")
         
         # Prepare inputs
         inputs = {"messages": [HumanMessage(content=user_input)]}
@@ -159,6 +172,7 @@ async def stream_query_steps(user_input: str):
             
             # Process each node in the step
             for node_name, node_data in step.items():
+                mark(node_name)
                 if node_name == "call_model":
                     # Check if this call_model step has tool calls
                     tool_calls = extract_tool_calls_from_step(step, node_name)
@@ -174,8 +188,6 @@ async def stream_query_steps(user_input: str):
                         tool_calls = extract_tool_calls_from_step(prev_step, "call_model")
                         for tool_name in tool_calls:
                             yield f"Received response from {tool_name}"
-                            # Add a small delay for UI before showing processing message
-                            await asyncio.sleep(0.5)
                             # Immediately show processing final response after receiving tool response
                             yield "Processing response..."
                             
@@ -193,6 +205,8 @@ async def stream_query_steps(user_input: str):
                 yield "No tools were used for this query"
         else:
             yield "No response generated"
+        timings.append(("total", time.perf_counter() - started))
+        yield format_step_timings(timings)
             
     except Exception as e:
         yield f"Error: {str(e)}"
@@ -201,7 +215,7 @@ async def process_query(user_input: str):
     """Process the user query through the LangGraph and return only the final answer"""
     try:
         # Setup the graph
-        graph = await setup_langgraph()
+        graph = await get_langgraph()
         
         # Prepare inputs
         inputs = {"messages": [HumanMessage(content=user_input)]}
@@ -220,3 +234,13 @@ async def process_query(user_input: str):
             
     except Exception as e:
         return f"Error: {str(e)}"
+
+
+async def process_queries(user_inputs: List[str]) -> List[str]:
+    """Answer several queries concurrently on one graph, in input order.
+
+    process_query is safe to call concurrently (e.g. one call per user);
+    this is a convenience wrapper. Model calls are bounded by
+    LLM_CONCURRENCY, tool calls per message by TOOL_CONCURRENCY.
+    """
+    return list(await asyncio.gather(*(process_query(q) for q in user_inputs)))
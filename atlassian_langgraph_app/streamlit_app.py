@@ -1,7 +1,15 @@
 import streamlit as st
-import asyncio
 import os
+import sys
+from pathlib import Path
+
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
 from main import stream_query_steps, process_query
+from agent_common.loop_utils import iter_async_generator
+from agent_common.step_timings import STEP_TIMINGS_PREFIX
 
 # Page configuration
 st.set_page_config(
@@ -20,7 +28,7 @@ if 'responses' not in st.session_state:
 if 'tools_used' not in st.session_state:
     st.session_state.tools_used = []
 
-async def run_streaming_query(user_input: str):
+def run_streaming_query(user_input: str):
     """Run the streaming query and update Streamlit UI in real-time"""
     try:
         # Initialize response tracking
@@ -31,7 +39,7 @@ async def run_streaming_query(user_input: str):
         tools_displayed = False
         
         # Stream the query steps
-        async for step_message in stream_query_steps(user_input):
+        for step_message in iter_async_generator(stream_query_steps(user_input)):
             # Display the step message as plain text
             if step_message.startswith("Final answer"):
                 # Extract the actual answer and display with header
@@ -61,6 +69,9 @@ async def run_streaming_query(user_input: str):
                     tools_used = [tool.strip() for tool in tools_str.split(",")]
                 else:
                     tools_used = []
+            elif step_message.startswith(STEP_TIMINGS_PREFIX):
+                # Shown under the answer, not in the intermediate step list
+                st.caption(step_message)
             elif step_message.startswith("Error"):
                 st.error("❌ " + step_message)
                 current_response = step_message
@@ -88,8 +99,9 @@ async def run_streaming_query(user_input: str):
 
 def run_async_query(user_input: str):
     """Wrapper to run async query in Streamlit"""
-    # Run the async function
-    asyncio.run(run_streaming_query(user_input))
+    # Runs on the shared background event loop (loop_utils) rather than a
+    # fresh asyncio.run loop, so async clients are reused across queries
+    run_streaming_query(user_input)
 
 # User input section
 st.subheader("Enter your query")
@@ -2,14 +2,26 @@
 # Pebblo gateway uses x-pebblo-auth only.)
 import os
 import asyncio
-from typing import Dict
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
 
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END, MessagesState
-from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from agent_common.graph_cache import PerLoopGraphCache
+from agent_common.model_node import make_async_model_node
+from agent_common.step_timings import format_step_timings
+from agent_common.tool_node import make_concurrent_tool_node
+
 _env_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(_env_path, override=True)
 
@@ -26,6 +38,15 @@ if not MCP_SERVER_URL:
 if not PEBBLO_API_KEY:
     raise ValueError("PEBBLO_API_KEY environment variable is required")
 
+# Tool calls from one model message run concurrently: at most TOOL_CONCURRENCY
+# at a time, each bounded by TOOL_TIMEOUT_S seconds.
+TOOL_CONCURRENCY = max(1, int(os.getenv("MCP_TOOL_CONCURRENCY", "4").strip() or 4))
+TOOL_TIMEOUT_S = float(os.getenv("MCP_TOOL_TIMEOUT_S", "60").strip() or 60)
+
+# At most LLM_CONCURRENCY model calls are in flight at once across all
+# queries served by this process (per event loop).
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "8").strip() or 8))
+
 
 def _mcp_gateway_headers() -> Dict[str, str]:
     """Headers for Pebblo MCP gateway: x-pebblo-auth Bearer token; optional user context."""
@@ -58,30 +79,6 @@ async def setup_langgraph():
     tools_by_name = {tool.name: tool for tool in tools}
     model_with_tools = chat_model.bind_tools(tools)
 
-    async def async_tool_node(state: MessagesState):
-        messages = state["messages"]
-        last_message = messages[-1]
-
-        if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
-            return {"messages": []}
-
-        tool_messages = []
-        for tool_call in last_message.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            tool_call_id = tool_call["id"]
-
-            if tool_name in tools_by_name:
-                result = await tools_by_name[tool_name].ainvoke(tool_args)
-                tool_message = ToolMessage(
-                    content=str(result),
-                    name=tool_name,
-                    tool_call_id=tool_call_id,
-                )
-                tool_messages.append(tool_message)
-
-        return {"messages": tool_messages}
-
     def should_continue(state: MessagesState):
         messages = state["messages"]
         last_message = messages[-1]
@@ -89,20 +86,24 @@ async def setup_langgraph():
             return "tools"
         return END
 
-    def call_model(state: MessagesState):
-        messages = state["messages"]
-        response = model_with_tools.invoke(messages)
-        return {"messages": [response]}
-
     builder = StateGraph(MessagesState)
-    builder.add_node("call_model", call_model)
-    builder.add_node("tools", async_tool_node)
+    builder.add_node("call_model", make_async_model_node(model_with_tools, LLM_CONCURRENCY))
+    builder.add_node("tools", make_concurrent_tool_node(tools_by_name, TOOL_CONCURRENCY, TOOL_TIMEOUT_S))
     builder.add_edge(START, "call_model")
     builder.add_conditional_edges("call_model", should_continue)
     builder.add_edge("tools", "call_model")
     return builder.compile()
 
 
+# One compiled graph per event loop, shared by all queries on that loop
+_GRAPHS = PerLoopGraphCache(setup_langgraph)
+
+
+async def get_langgraph():
+    """Return this event loop's compiled graph, building it on first use."""
+    return await _GRAPHS.get()
+
+
 def extract_final_answer(stream_result):
     """Extract the final answer from the stream result."""
     try:
@@ -137,9 +138,23 @@ def extract_tools_used(stream_result):
 
 
 async def stream_query_steps(user_input: str):
-    """Stream status lines while the graph runs."""
+    """Stream status lines while the graph runs.
+
+    The last line is a "Step timings" record: wall time for setup and for
+    each graph node as it completed, plus the total.
+    """
+    started = last_mark = time.perf_counter()
+    timings: List[Tuple[str, float]] = []
+
+    def mark(name: str) -> None:
+        nonlocal last_mark
+        now = time.perf_counter()
+        timings.append((name, now - last_mark))
+        last_mark = now
+
     try:
-        graph = await setup_langgraph()
+        graph = await get_langgraph()
+        mark("setup")
         inputs = {"messages": [HumanMessage(content=user_input)]}
         yield "Analyzing your query..."
 
@@ -147,6 +162,7 @@ async def stream_query_steps(user_input: str):
         async for step in graph.astream(inputs, config={"recursion_limit": 10}):
             all_steps.append(step)
             for node_name, node_data in step.items():
+                mark(node_name)
                 if node_name == "call_model":
                     tool_calls = extract_tool_calls_from_step(step, node_name)
                     if tool_calls:
@@ -158,7 +174,6 @@ async def stream_query_steps(user_input: str):
                         tool_calls = extract_tool_calls_from_step(prev_step, "call_model")
                         for tool_name in tool_calls:
                             yield f"Received response from {tool_name}"
-                            await asyncio.sleep(0.5)
                             yield "Processing response..."
 
         if all_steps:
@@ -171,6 +186,8 @@ async def stream_query_steps(user_input: str):
                 yield "No tools were used for this query"
         else:
             yield "No response generated"
+        timings.append(("total", time.perf_counter() - started))
+        yield format_step_timings(timings)
     except Exception as e:
         yield f"Error: {str(e)}"
 
@@ -178,7 +195,7 @@ async def stream_query_steps(user_input: str):
 async def process_query(user_input: str):
     """Run the graph and return the final assistant text only."""
     try:
-        graph = await setup_langgraph()
+        graph = await get_langgraph()
         inputs = {"messages": [HumanMessage(content=user_input)]}
         final_step = None
         async for step in graph.astream(inputs, config={"recursion_limit": 10}):
@@ -188,3 +205,13 @@ async def process_query(user_input: str):
         return "No response generated"
     except Exception as e:
         return f"Error: {str(e)}"
+
+
+async def process_queries(user_inputs: List[str]) -> List[str]:
+    """Answer several queries concurrently on one graph, in input order.
+
+    process_query is safe to call concurrently (e.g. one call per user);
+    this is a convenience wrapper. Model calls are bounded by
+    LLM_CONCURRENCY, tool calls per message by TOOL_CONCURRENCY.
+    """
+    return list(await asyncio.gather(*(process_query(q) for q in user_inputs)))
@@ -1,6 +1,15 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
-import asyncio
+
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
 from main import stream_query_steps
+from agent_common.loop_utils import iter_async_generator
+from agent_common.step_timings import STEP_TIMINGS_PREFIX
 
 st.set_page_config(
     page_title="Customer Billing (MCP)",
@@ -17,7 +26,7 @@ if "tools_used" not in st.session_state:
     st.session_state.tools_used = []
 
 
-async def run_streaming_query(user_input: str):
+def run_streaming_query(user_input: str):
     """Run the streaming query and update Streamlit UI in real-time."""
     try:
         current_response = ""
@@ -26,7 +35,7 @@ async def run_streaming_query(user_input: str):
         steps_container = st.empty()
         tools_displayed = False
 
-        async for step_message in stream_query_steps(user_input):
+        for step_message in iter_async_generator(stream_query_steps(user_input)):
             if step_message.startswith("Final answer"):
                 current_response = step_message.replace("Final answer: ", "")
                 if intermediate_steps:
@@ -52,6 +61,9 @@ async def run_streaming_query(user_input: str):
                     tools_used = [tool.strip() for tool in tools_str.split(",")]
                 else:
                     tools_used = []
+            elif step_message.startswith(STEP_TIMINGS_PREFIX):
+                # Shown under the answer, not in the intermediate step list
+                st.caption(step_message)
             elif step_message.startswith("Error"):
                 st.error("❌ " + step_message)
                 current_response = step_message
@@ -75,7 +87,9 @@ async def run_streaming_query(user_input: str):
 
 
 def run_async_query(user_input: str):
-    asyncio.run(run_streaming_query(user_input))
+    # Runs on the shared background event loop (loop_utils) rather than a
+    # fresh asyncio.run loop, so async clients are reused across queries.
+    run_streaming_query(user_input)
 
 
 st.subheader("Enter your query")
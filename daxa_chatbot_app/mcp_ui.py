@@ -0,0 +1,126 @@
+"""Streamlit rendering of Safe MCP agent runs, shared by the main page and
+pages/test.py."""
+import time
+
+import streamlit as st
+
+from mcp_utils import ANSWER_TOKEN_PREFIX, MCP_STEP_PACING_S, stream_query_steps
+from agent_common.loop_utils import iter_async_generator  # repo root is on sys.path via mcp_utils
+from agent_common.step_timings import STEP_TIMINGS_PREFIX
+
+
+def render_mcp_response_header(tools_used: list) -> None:
+    """Render the "Tools Used" block (if any) and the "Response:" subheader."""
+    if tools_used:
+        st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
+        st.subheader("Tools Used:")
+        for tool in tools_used:
+            st.markdown(
+                f"• <span style='color: #3DC667; background-color: #1e1e1e; "
+                f"padding: 2px 6px; border-radius: 4px;'>{tool}</span>",
+                unsafe_allow_html=True,
+            )
+        st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
+    st.subheader("Response:")
+
+
+def run_mcp_streaming(
+    user_input: str,
+    mcp_servers: dict,
+    pebblo_user: str,
+    pebblo_user_groups: str,
+    responses_key: str = "mcp_responses",
+    tools_used_key: str = "mcp_tools_used",
+    refresh_graph: bool = False,
+):
+    """Run Safe MCP query with streaming status updates and answer tokens.
+
+    The final answer is appended to st.session_state[responses_key] and the
+    tools it used stored under tools_used_key. refresh_graph=True rebuilds
+    the cached MCP graph first (see sync_mcp_graph_cache).
+    """
+    current_response = ""
+    tools_used = []
+    intermediate_steps = []
+    steps_container = st.empty()
+    response_slot = st.empty()
+    answer_placeholder = None
+    streamed_answer = ""
+
+    for step_message in iter_async_generator(stream_query_steps(
+        user_input,
+        mcp_servers=mcp_servers,
+        pebblo_user=pebblo_user or None,
+        pebblo_user_groups=pebblo_user_groups or None,
+        stream_tokens=True,
+        refresh_graph=refresh_graph,
+    )):
+        if step_message.startswith(ANSWER_TOKEN_PREFIX):
+            if answer_placeholder is None:
+                with response_slot.container():
+                    render_mcp_response_header(tools_used)
+                    answer_placeholder = st.empty()
+            streamed_answer += step_message[len(ANSWER_TOKEN_PREFIX):]
+            answer_placeholder.markdown(streamed_answer + "▌")
+        elif step_message.startswith("Final answer"):
+            current_response = step_message.replace("Final answer: ", "")
+            if intermediate_steps:
+                steps_container.markdown(
+                    "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
+                    unsafe_allow_html=True,
+                )
+            if answer_placeholder is None:
+                with response_slot.container():
+                    render_mcp_response_header(tools_used)
+                    st.markdown(current_response)
+            else:
+                answer_placeholder.markdown(current_response)
+        elif step_message.startswith("Tools used"):
+            tools_str = step_message.replace("Tools used: ", "")
+            tools_used = (
+                [t.strip() for t in tools_str.split(",")]
+                if tools_str != "No tools were used for this query"
+                else []
+            )
+        elif step_message.startswith(STEP_TIMINGS_PREFIX):
+            # Shown under the answer, not in the step list and not paced
+            st.caption(step_message)
+        elif step_message.startswith("Error"):
+            st.error("❌ " + step_message)
+            current_response = step_message
+        else:
+            intermediate_steps.append(step_message)
+            steps_container.markdown(
+                "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
+                unsafe_allow_html=True,
+            )
+            if MCP_STEP_PACING_S:
+                # Cosmetic only: the graph keeps running on the background loop
+                time.sleep(MCP_STEP_PACING_S)
+            if step_message.startswith("Selected tool"):
+                tool_name = step_message.replace("Selected tool: ", "")
+                if tool_name not in tools_used:
+                    tools_used.append(tool_name)
+                # Text streamed so far was the preamble of a tool-calling turn
+                if answer_placeholder is not None:
+                    response_slot.empty()
+                    answer_placeholder = None
+                    streamed_answer = ""
+
+    if current_response:
+        st.session_state[responses_key].append(current_response)
+        st.session_state[tools_used_key] = tools_used
+
+
+def sync_mcp_graph_cache(stale_key: str) -> bool:
+    """Return True, once, if this session clicked a sidebar "Save" since its
+    last query — pass it as run_mcp_streaming(refresh_graph=...) to force
+    tool rediscovery.
+
+    The graph cache is process-wide, so nothing is dropped from it here: a
+    changed URL, API key, OAuth token or user yields a new fingerprint (and
+    so a new graph) anyway, old entries expire after MCP_GRAPH_CACHE_TTL_S,
+    and a refresh replaces the entry in place. One session's sidebar changes
+    therefore never make other sessions on the same servers rebuild.
+    """
+    return bool(st.session_state.pop(stale_key, False))
@@ -1,13 +1,22 @@
 """Safe MCP utilities: LangGraph orchestration with multiple MCP servers using SafeInfer LLM."""
 import asyncio
+import hashlib
+import json
 import os
 import logging
-from typing import Dict, List, Optional
-
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+import httpx
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from langchain_core.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import BaseTool, StructuredTool, ToolException, tool
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, MessagesState, StateGraph
 import trafilatura
@@ -23,6 +32,14 @@ load_dotenv(_env_path)
 from utils import API_BASE_URL, API_KEY, MODEL, X_PEBBLO_USER, X_PEBBLO_USER_GROUPS
 from exfil_utils import send_data_to_endpoint as _send_data_to_endpoint
 
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)  # for agent_common, shared by the agent apps
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from agent_common.loop_utils import run_on_background_loop
+from agent_common.step_timings import format_step_timings
+from agent_common.tool_node import make_concurrent_tool_node
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 
 MAX_FETCH_CHARS = 8000
@@ -82,6 +99,31 @@ SHOW_ATLASSIAN_OAUTH = os.getenv("ATLASSIAN_OAUTH", "false").strip().lower() ==
 SHOW_ATLASSIAN_DOCKER = os.getenv("ATLASSIAN_DOCKER", "false").strip().lower() == "true"
 SHOW_CUSTOMER_BILLING = os.getenv("CUSTOMER_BILLING", "false").strip().lower() == "true"
 
+# Compiled graph + discovered tools are reused across turns for this many
+# seconds (keyed by mcp_graph_fingerprint). 0 disables the cache.
+MCP_GRAPH_CACHE_TTL_S = float(os.getenv("MCP_GRAPH_CACHE_TTL_S", "600").strip() or 0)
+
+# Upper bound on connecting to one MCP server and listing its tools. Servers
+# are discovered concurrently, so a slow one delays the turn by at most this.
+MCP_CONNECT_TIMEOUT_S = float(os.getenv("MCP_CONNECT_TIMEOUT_S", "15").strip() or 15)
+
+# Independent tool calls emitted in one model message run concurrently, at
+# most MCP_TOOL_CONCURRENCY at a time, each bounded by MCP_TOOL_TIMEOUT_S.
+MCP_TOOL_CONCURRENCY = max(1, int(os.getenv("MCP_TOOL_CONCURRENCY", "4").strip() or 4))
+MCP_TOOL_TIMEOUT_S = float(os.getenv("MCP_TOOL_TIMEOUT_S", "60").strip() or 60)
+
+# Keep one warm MCP session per server config (see MCPSessionPool) instead of
+# a new connection + initialize handshake for every tool call.
+MCP_PERSISTENT_SESSIONS = os.getenv("MCP_PERSISTENT_SESSIONS", "true").strip().lower() == "true"
+# A pooled session idle longer than this is pinged before it is reused ...
+MCP_SESSION_HEALTHCHECK_S = float(os.getenv("MCP_SESSION_HEALTHCHECK_S", "30").strip() or 30)
+# ... and one idle longer than this is closed.
+MCP_SESSION_IDLE_TTL_S = float(os.getenv("MCP_SESSION_IDLE_TTL_S", "900").strip() or 900)
+
+# Optional cosmetic delay (seconds) the agent pages hold each status line on
+# screen. Applied while rendering only — the graph itself never waits.
+MCP_STEP_PACING_S = max(0.0, float(os.getenv("MCP_STEP_PACING_S", "0").strip() or 0))
+
 
 def _pebblo_mcp_headers(
     pebblo_user: Optional[str] = None,
@@ -217,28 +259,259 @@ def _get_chat_model() -> ChatOpenAI:
     return ChatOpenAI(model=MODEL or "gpt-4o-mini")
 
 
+# ---------------------------------------------------------------------------
+# Persistent MCP sessions — one long-lived ClientSession per (server, config),
+# held on the background loop from loop_utils so it survives Streamlit reruns.
+# ---------------------------------------------------------------------------
+
+# Failures that mean the request never reached the server: the connection
+# couldn't be made, or the session's streams were already closed/broken when
+# the request was written. Only these get one reconnect + retry. Anything
+# else (McpError, read timeouts, a connection dropped mid-response) may come
+# after the server already ran the tool, and retrying a non-idempotent tool
+# (create an issue, post a comment) would run it twice.
+_NOT_SENT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    ConnectionRefusedError,
+)
+
+
+class _PooledSession:
+    """One MCP ClientSession kept open by a dedicated task on the background loop.
+
+    The transport's context managers must be entered and exited by the same
+    task (anyio cancel scopes), so _run() holds the session open until
+    close() is called or the connection drops.
+    """
+
+    def __init__(self, server_name: str, server_config: dict):
+        self.server_name = server_name
+        self.server_config = server_config
+        self.session = None
+        self.tools: Dict[str, BaseTool] = {}
+        self.last_used = 0.0
+        self._ready: Optional[asyncio.Future] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def open(self) -> None:
+        """Connect, initialize and list tools; raises if the server can't be reached."""
+        self._ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await self._ready
+        except BaseException:
+            self._task.cancel()
+            raise
+
+    async def _run(self) -> None:
+        client = MultiServerMCPClient({self.server_name: self.server_config})
+        try:
+            async with client.session(self.server_name) as session:
+                tools = await load_mcp_tools(session)
+                self.session = session
+                self.tools = {t.name: t for t in tools}
+                self.last_used = time.monotonic()
+                self._ready.set_result(None)
+                await self._closing.wait()
+        except Exception as exc:
+            if not self._ready.done():
+                self._ready.set_exception(exc)
+            else:
+                logging.warning("[MCP] %s: pooled session dropped — %s: %s",
+                                self.server_name, type(exc).__name__, exc)
+        finally:
+            self.session = None
+            if not self._ready.done():
+                self._ready.cancel()
+
+    async def healthy(self) -> bool:
+        """True if usable; pings the server when idle past MCP_SESSION_HEALTHCHECK_S."""
+        if not self.alive:
+            return False
+        if time.monotonic() - self.last_used < MCP_SESSION_HEALTHCHECK_S:
+            return True
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=5)
+        except Exception as exc:
+            logging.info("[MCP] %s: health check failed — %s: %s", self.server_name, type(exc).__name__, exc)
+            return False
+        self.last_used = time.monotonic()
+        return True
+
+    async def close(self) -> None:
+        if self._closing is not None:
+            self._closing.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except Exception:
+                self._task.cancel()
+
+
+class MCPSessionPool:
+    """Warm MCP sessions shared across queries, keyed by server name + config.
+
+    A different URL, API key or OAuth token is a different config and gets
+    its own session. Every method must run on the background loop (see
+    loop_utils.run_on_background_loop); the tools returned by get_tools()
+    are safe to call from any loop.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, _PooledSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(server_name: str, server_config: dict) -> str:
+        raw = json.dumps([server_name, server_config], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _close_idle(self) -> None:
+        now = time.monotonic()
+        for key, pooled in list(self._sessions.items()):
+            if now - pooled.last_used > MCP_SESSION_IDLE_TTL_S:
+                logging.info("[MCP] %s: closing idle pooled session", pooled.server_name)
+                del self._sessions[key]
+                await pooled.close()
+
+    async def acquire(self, server_name: str, server_config: dict) -> _PooledSession:
+        """Return a healthy session for this server config, (re)connecting if needed."""
+        await self._close_idle()
+        key = self._key(server_name, server_config)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pooled = self._sessions.get(key)
+            if pooled is not None and await pooled.healthy():
+                return pooled
+            if pooled is not None:
+                logging.info("[MCP] %s: reconnecting pooled session", server_name)
+                self._sessions.pop(key, None)
+                await pooled.close()
+            pooled = _PooledSession(server_name, server_config)
+            await pooled.open()
+            self._sessions[key] = pooled
+            logging.info("[MCP] %s: pooled session opened (%d tools)", server_name, len(pooled.tools))
+            return pooled
+
+    async def call_tool(self, server_name: str, server_config: dict, tool_name: str, args: dict):
+        """Invoke tool_name on the pooled session; reconnect and retry once only
+        if the request never reached the server (see _NOT_SENT_ERRORS). Errors
+        that may follow the tool running — McpError, read-side failures — are
+        re-raised, so a tool is never run twice."""
+        for attempt in (1, 2):
+            pooled = await self.acquire(server_name, server_config)
+            mcp_tool = pooled.tools.get(tool_name)
+            if mcp_tool is None:
+                # The server stopped exposing it (e.g. after a reconnect)
+                raise ToolException(f"Tool {tool_name} is no longer offered by MCP server {server_name}")
+            try:
+                result = await mcp_tool.ainvoke(args)
+            except Exception as exc:
+                if attempt == 2 or not isinstance(exc, _NOT_SENT_ERRORS):
+                    raise
+                logging.warning("[MCP] %s: %s failed on pooled session (%s: %s) — reconnecting",
+                                server_name, tool_name, type(exc).__name__, exc)
+                self._sessions.pop(self._key(server_name, server_config), None)
+                await pooled.close()
+                continue
+            pooled.last_used = time.monotonic()
+            return result
+
+    async def get_tools(self, server_name: str, server_config: dict) -> List[BaseTool]:
+        """LangChain tools for this server, routed through the pooled session."""
+        pooled = await self.acquire(server_name, server_config)
+        return [self._pooled_tool(server_name, server_config, t) for t in pooled.tools.values()]
+
+    def _pooled_tool(self, server_name: str, server_config: dict, mcp_tool: BaseTool) -> BaseTool:
+        async def _call(**kwargs):
+            return await run_on_background_loop(
+                self.call_tool(server_name, server_config, mcp_tool.name, kwargs)
+            )
+
+        return StructuredTool(
+            name=mcp_tool.name,
+            description=mcp_tool.description,
+            args_schema=mcp_tool.args_schema,
+            coroutine=_call,
+            metadata=mcp_tool.metadata,
+        )
+
+
+_SESSION_POOL = MCPSessionPool()
+
+
+async def _discover_server_tools(server_name: str, server_config: dict) -> dict:
+    """Connect to one MCP server and list its tools, bounded by MCP_CONNECT_TIMEOUT_S.
+
+    Never raises: returns {"server", "tools", "latency_s", "error"} where error
+    is None on success, so one failing server can be skipped without
+    affecting the others.
+    """
+    start = time.perf_counter()
+    try:
+        if MCP_PERSISTENT_SESSIONS:
+            discovery = run_on_background_loop(_SESSION_POOL.get_tools(server_name, server_config))
+        else:
+            discovery = MultiServerMCPClient({server_name: server_config}).get_tools()
+        tools = await asyncio.wait_for(discovery, timeout=MCP_CONNECT_TIMEOUT_S)
+        latency_s = time.perf_counter() - start
+        logging.info("[MCP] %s: connected in %.2fs, %d tools: %s",
+                     server_name, latency_s, len(tools), [t.name for t in tools])
+        return {"server": server_name, "tools": tools, "latency_s": latency_s, "error": None}
+    except asyncio.TimeoutError:
+        error = f"timed out after {MCP_CONNECT_TIMEOUT_S:g}s"
+    except Exception as exc:
+        # Unwrap ExceptionGroup (Python 3.11+)
+        inner = exc.exceptions[0] if hasattr(exc, "exceptions") else exc
+        error = f"{type(inner).__name__}: {inner}"
+    latency_s = time.perf_counter() - start
+    logging.warning("[MCP] %s: skipped after %.2fs — %s", server_name, latency_s, error)
+    return {"server": server_name, "tools": [], "latency_s": latency_s, "error": error}
+
+
+async def discover_mcp_tools(mcp_servers: Dict[str, dict]) -> Tuple[list, List[dict]]:
+    """Connect to every server concurrently. Returns (tools, connect_report).
+
+    connect_report holds one _discover_server_tools result per server, in
+    mcp_servers order; tools is the concatenation of the successful ones.
+    """
+    connect_report = await asyncio.gather(
+        *(_discover_server_tools(name, config) for name, config in (mcp_servers or {}).items())
+    )
+    tools = [t for result in connect_report for t in result["tools"]]
+    return tools, list(connect_report)
+
+
+def format_connect_report(result: dict) -> str:
+    """One step-stream line for a _discover_server_tools result."""
+    if result["error"]:
+        return f"Skipped {result['server']} after {result['latency_s']:.2f}s — {result['error']}"
+    return f"Connected to {result['server']}: {len(result['tools'])} tools in {result['latency_s']:.2f}s"
+
+
 async def setup_langgraph(
     mcp_servers: Dict[str, dict],
     pebblo_user: Optional[str] = None,
     pebblo_user_groups: Optional[str] = None,
+    connect_report: Optional[list] = None,
 ):
-    """Build and compile LangGraph bound to all provided MCP servers."""
-    mcp_servers = mcp_servers or {}
+    """Build and compile LangGraph bound to all provided MCP servers.
 
-    # Try each server individually so a single failing server doesn't block the others
-    all_tools = []
-    for server_name, server_config in mcp_servers.items():
-        try:
-            client = MultiServerMCPClient({server_name: server_config})
-            server_tools = await client.get_tools()
-            logging.info("[MCP] %s: connected, %d tools: %s",
-                         server_name, len(server_tools), [t.name for t in server_tools])
-            all_tools.extend(server_tools)
-        except Exception as exc:
-            # Unwrap ExceptionGroup (Python 3.11+)
-            inner = exc.exceptions[0] if hasattr(exc, "exceptions") else exc
-            logging.warning("[MCP] %s: skipped — %s: %s",
-                            server_name, type(inner).__name__, inner)
+    If connect_report is given, it is extended with the per-server discovery
+    results (see discover_mcp_tools).
+    """
+    all_tools, report = await discover_mcp_tools(mcp_servers)
+    if connect_report is not None:
+        connect_report.extend(report)
 
     tools = all_tools
     tools.append(fetch_web_page)
@@ -248,26 +521,6 @@ async def setup_langgraph(
     chat_model = _get_chat_model()
     model_with_tools = chat_model.bind_tools(tools)
 
-    async def async_tool_node(state: MessagesState):
-        last_message = state["messages"][-1]
-        if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
-            return {"messages": []}
-        tool_messages = []
-        for tool_call in last_message.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            tool_call_id = tool_call["id"]
-            if tool_name in tools_by_name:
-                result = await tools_by_name[tool_name].ainvoke(tool_args)
-                tool_messages.append(
-                    ToolMessage(
-                        content=str(result),
-                        name=tool_name,
-                        tool_call_id=tool_call_id,
-                    )
-                )
-        return {"messages": tool_messages}
-
     def should_continue(state: MessagesState):
         last_message = state["messages"][-1]
         has_calls = hasattr(last_message, "tool_calls") and bool(last_message.tool_calls)
@@ -286,13 +539,88 @@ async def setup_langgraph(
 
     builder = StateGraph(MessagesState)
     builder.add_node("call_model", call_model)
-    builder.add_node("tools", async_tool_node)
+    builder.add_node("tools", make_concurrent_tool_node(tools_by_name, MCP_TOOL_CONCURRENCY, MCP_TOOL_TIMEOUT_S))
     builder.add_edge(START, "call_model")
     builder.add_conditional_edges("call_model", should_continue)
     builder.add_edge("tools", "call_model")
     return builder.compile()
 
 
+# ---------------------------------------------------------------------------
+# Graph cache — avoids re-running MCP tool discovery, bind_tools and compile on
+# every turn. Lives at module level so it survives Streamlit reruns.
+# ---------------------------------------------------------------------------
+
+_GRAPH_CACHE: Dict[str, Tuple[float, object]] = {}  # fingerprint -> (built_at, graph)
+_GRAPH_CACHE_LOCK = threading.Lock()
+
+
+def mcp_graph_fingerprint(
+    mcp_servers: Dict[str, dict],
+    pebblo_user: Optional[str] = None,
+    pebblo_user_groups: Optional[str] = None,
+) -> str:
+    """Stable hash of everything that decides which tools a graph is bound to.
+
+    Covers each server's URL, transport and headers (so a changed Pebblo API
+    key or OAuth Bearer token yields a new fingerprint) plus the effective
+    Pebblo user/group context.
+    """
+    payload = {
+        "servers": mcp_servers or {},
+        "user": (pebblo_user or X_PEBBLO_USER or "").strip(),
+        "groups": (pebblo_user_groups or X_PEBBLO_USER_GROUPS or "").strip(),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cached_graph(fingerprint: str):
+    """Return the cached graph for fingerprint if still within TTL, else None."""
+    now = time.monotonic()
+    with _GRAPH_CACHE_LOCK:
+        # Prune expired entries so stale server configs don't pile up.
+        for key in [k for k, (built_at, _) in _GRAPH_CACHE.items() if now - built_at > MCP_GRAPH_CACHE_TTL_S]:
+            del _GRAPH_CACHE[key]
+        entry = _GRAPH_CACHE.get(fingerprint)
+    return entry[1] if entry else None
+
+
+async def get_langgraph(
+    mcp_servers: Dict[str, dict],
+    pebblo_user: Optional[str] = None,
+    pebblo_user_groups: Optional[str] = None,
+    refresh: bool = False,
+):
+    """Return (graph, connect_report, from_cache).
+
+    Reuses a cached compiled graph when one is fresh (connect_report is then
+    None — nothing was connected this turn, and the report from the build is
+    not kept since server health may have changed since); otherwise builds a
+    new one and caches it for MCP_GRAPH_CACHE_TTL_S seconds.
+
+    refresh=True skips the lookup and rebuilds (tool rediscovery). The new
+    graph replaces the cached one, so other sessions on the same servers and
+    user pick it up instead of rebuilding themselves.
+    """
+    connect_report: list = []
+    if MCP_GRAPH_CACHE_TTL_S <= 0:
+        graph = await setup_langgraph(mcp_servers, pebblo_user, pebblo_user_groups, connect_report)
+        return graph, connect_report, False
+
+    fingerprint = mcp_graph_fingerprint(mcp_servers, pebblo_user, pebblo_user_groups)
+    graph = None if refresh else _cached_graph(fingerprint)
+    if graph is not None:
+        logging.info("[MCP] graph cache hit (%s)", fingerprint[:12])
+        return graph, None, True
+
+    graph = await setup_langgraph(mcp_servers, pebblo_user, pebblo_user_groups, connect_report)
+    with _GRAPH_CACHE_LOCK:
+        _GRAPH_CACHE[fingerprint] = (time.monotonic(), graph)
+    logging.info("[MCP] graph %s (%s) — built and cached", "refresh" if refresh else "cache miss", fingerprint[:12])
+    return graph, connect_report, False
+
+
 def extract_final_answer(stream_result) -> str:
     try:
         if "call_model" in stream_result and "messages" in stream_result["call_model"]:
@@ -321,22 +649,76 @@ def extract_tools_used(all_steps) -> List[str]:
     return list(tools_used)
 
 
+# Prefix for the incremental answer text yielded by stream_query_steps when
+# stream_tokens=True. Each such line carries one LLM delta, not a full line.
+ANSWER_TOKEN_PREFIX = "Answer token: "
+
+
+def _answer_token(chunk, metadata) -> str:
+    """Return the text delta of a "messages"-mode chunk from call_model, or ''."""
+    if metadata.get("langgraph_node") != "call_model":
+        return ""
+    if getattr(chunk, "tool_call_chunks", None):
+        return ""
+    content = getattr(chunk, "content", "")
+    return content if isinstance(content, str) else ""
+
+
 async def stream_query_steps(
     user_input: str,
     mcp_servers: Dict[str, dict],
     pebblo_user: Optional[str] = None,
     pebblo_user_groups: Optional[str] = None,
+    stream_tokens: bool = False,
+    refresh_graph: bool = False,
 ):
-    """Async generator: yields status lines and final answer while running the graph."""
+    """Async generator: yields status lines and final answer while running the graph.
+
+    With stream_tokens=True, LLM output from call_model is also yielded as it
+    is generated, one ANSWER_TOKEN_PREFIX line per delta. Text streamed
+    before a "Selected tool" line belongs to a tool-calling turn and should
+    be discarded; the "Final answer" line always carries the complete answer.
+    refresh_graph=True rebuilds the graph instead of using the cache (see
+    get_langgraph).
+
+    The last line is a "Step timings" record: wall time spent on setup
+    (tool discovery / graph build, or the cache lookup) and on each graph
+    node as it completed, plus the total.
+    """
+    started = last_mark = time.perf_counter()
+    timings: List[Tuple[str, float]] = []
+
+    def mark(name: str) -> None:
+        nonlocal last_mark
+        now = time.perf_counter()
+        timings.append((name, now - last_mark))
+        last_mark = now
+
     try:
-        graph = await setup_langgraph(mcp_servers, pebblo_user, pebblo_user_groups)
+        graph, connect_report, from_cache = await get_langgraph(
+            mcp_servers, pebblo_user, pebblo_user_groups, refresh=refresh_graph
+        )
+        mark("setup (cached)" if from_cache else "setup")
+        if from_cache:
+            yield "Using cached MCP tools"
+        for result in connect_report or []:
+            yield format_connect_report(result)
         inputs = {"messages": [HumanMessage(content=user_input)]}
         yield "Analyzing your query..."
 
         all_steps = []
-        async for step in graph.astream(inputs, config={"recursion_limit": 10}):
+        stream_mode = ["updates", "messages"] if stream_tokens else ["updates"]
+        async for mode, step in graph.astream(
+            inputs, config={"recursion_limit": 10}, stream_mode=stream_mode
+        ):
+            if mode == "messages":
+                token = _answer_token(*step)
+                if token:
+                    yield f"{ANSWER_TOKEN_PREFIX}{token}"
+                continue
             all_steps.append(step)
             for node_name in step:
+                mark(node_name)
                 if node_name == "call_model":
                     tool_calls = extract_tool_calls_from_step(step, node_name)
                     for tool_name in tool_calls:
@@ -347,7 +729,6 @@ async def stream_query_steps(
                         tool_calls = extract_tool_calls_from_step(prev_step, "call_model")
                         for tool_name in tool_calls:
                             yield f"Received response from {tool_name}"
-                            await asyncio.sleep(0.5)
                             yield "Processing response..."
 
         if all_steps:
@@ -360,6 +741,10 @@ async def stream_query_steps(
                 yield "No tools were used for this query"
         else:
             yield "No response generated"
+        timings.append(("total", time.perf_counter() - started))
+        step_timings = format_step_timings(timings)
+        logging.info("[MCP] %s", step_timings)
+        yield step_timings
     except Exception as e:
         logger = logging.getLogger(__name__)
         # Unwrap Python 3.11+ ExceptionGroup (raised by asyncio.TaskGroup / anyio)
@@ -1,7 +1,6 @@
 """Test environment: open via URL path /test.
 Supports Safe Infer (API type, stream, model) and Safe MCP (MCP URL, model, user context).
 """
-import asyncio
 import json
 import os
 import sys
@@ -11,6 +10,7 @@ from pathlib import Path
 import streamlit as st
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))  # for agent_common
 
 from utils import (
     API_KEY,
@@ -33,7 +33,6 @@ from mcp_utils import (
     ATLASSIAN_API_KEY,
     CUSTOMER_BILLING_API_KEY,
     build_mcp_servers,
-    stream_query_steps as mcp_stream_query_steps,
     _pebblo_mcp_headers,
 )
 from oauth_utils import (
@@ -41,6 +40,7 @@ from oauth_utils import (
     render_oauth_connect_button,
     get_token as get_oauth_token,
 )
+from mcp_ui import run_mcp_streaming, sync_mcp_graph_cache
 
 
 @st.cache_data(ttl=300)
@@ -58,67 +58,12 @@ def fetch_models(pebblo_user: str = None, pebblo_user_groups: str = None) -> tup
 # Safe MCP helpers
 # ---------------------------------------------------------------------------
 
-async def _run_mcp_streaming(user_input, mcp_servers, pebblo_user, pebblo_user_groups):
-    current_response = ""
-    tools_used = []
-    intermediate_steps = []
-    steps_container = st.empty()
-    tools_displayed = False
-
-    async for step_message in mcp_stream_query_steps(
-        user_input,
-        mcp_servers=mcp_servers,
-        pebblo_user=pebblo_user or None,
-        pebblo_user_groups=pebblo_user_groups or None,
-    ):
-        if step_message.startswith("Final answer"):
-            current_response = step_message.replace("Final answer: ", "")
-            if intermediate_steps:
-                steps_container.markdown(
-                    "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
-                    unsafe_allow_html=True,
-                )
-            if tools_used and not tools_displayed:
-                st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
-                st.subheader("Tools Used:")
-                for tool in tools_used:
-                    st.markdown(
-                        f"• <span style='color: #3DC667; background-color: #1e1e1e; "
-                        f"padding: 2px 6px; border-radius: 4px;'>{tool}</span>",
-                        unsafe_allow_html=True,
-                    )
-                st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
-                tools_displayed = True
-            st.subheader("Response:")
-            st.markdown(current_response)
-        elif step_message.startswith("Tools used"):
-            tools_str = step_message.replace("Tools used: ", "")
-            tools_used = (
-                [t.strip() for t in tools_str.split(",")]
-                if tools_str != "No tools were used for this query"
-                else []
-            )
-        elif step_message.startswith("Error"):
-            st.error("❌ " + step_message)
-            current_response = step_message
-        else:
-            intermediate_steps.append(step_message)
-            steps_container.markdown(
-                "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
-                unsafe_allow_html=True,
-            )
-            if step_message.startswith("Selected tool"):
-                tool_name = step_message.replace("Selected tool: ", "")
-                if tool_name not in tools_used:
-                    tools_used.append(tool_name)
-
-    if current_response:
-        st.session_state.mcp_test_responses.append(current_response)
-        st.session_state.mcp_test_tools_used = tools_used
-
-
 def run_mcp_query(user_input, mcp_servers, pebblo_user, pebblo_user_groups):
-    asyncio.run(_run_mcp_streaming(user_input, mcp_servers, pebblo_user, pebblo_user_groups))
+    run_mcp_streaming(
+        user_input, mcp_servers, pebblo_user, pebblo_user_groups,
+        responses_key="mcp_test_responses", tools_used_key="mcp_test_tools_used",
+        refresh_graph=sync_mcp_graph_cache("_mcp_test_graph_stale"),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -260,6 +205,7 @@ with st.sidebar:
                 )
                 if st.button("Save", key=save_key):
                     if (st.session_state.get(url_key) or "").strip():
+                        st.session_state["_mcp_test_graph_stale"] = True
                         st.toast(f"✅ {label} saved.", icon="💾")
                     else:
                         st.warning("Enter a URL first.")
@@ -1,5 +1,4 @@
 import ast
-import asyncio
 import json
 import logging
 import os
@@ -284,7 +283,6 @@ from mcp_utils import (
     SHOW_CUSTOMER_BILLING,
     build_mcp_servers,
     build_direct_mcp_servers,
-    stream_query_steps as mcp_stream_query_steps,
     _pebblo_mcp_headers,
 )
 from oauth_utils import (
@@ -293,6 +291,7 @@ from oauth_utils import (
     get_token as get_oauth_token,
     is_connected as oauth_is_connected,
 )
+from mcp_ui import run_mcp_streaming, sync_mcp_graph_cache
 
 
 @st.cache_data(ttl=300)
@@ -591,69 +590,12 @@ def stream_direct_openai(message: str, model: str) -> Generator:
 # Safe MCP helpers
 # ---------------------------------------------------------------------------
 
-async def _run_mcp_streaming(user_input: str, mcp_servers: dict, pebblo_user: str, pebblo_user_groups: str):
-    """Run Safe MCP query with streaming status updates."""
-    current_response = ""
-    tools_used = []
-    intermediate_steps = []
-    steps_container = st.empty()
-    tools_displayed = False
-
-    async for step_message in mcp_stream_query_steps(
-        user_input,
-        mcp_servers=mcp_servers,
-        pebblo_user=pebblo_user or None,
-        pebblo_user_groups=pebblo_user_groups or None,
-    ):
-        if step_message.startswith("Final answer"):
-            current_response = step_message.replace("Final answer: ", "")
-            if intermediate_steps:
-                steps_container.markdown(
-                    "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
-                    unsafe_allow_html=True,
-                )
-            if tools_used and not tools_displayed:
-                st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
-                st.subheader("Tools Used:")
-                for tool in tools_used:
-                    st.markdown(
-                        f"• <span style='color: #3DC667; background-color: #1e1e1e; "
-                        f"padding: 2px 6px; border-radius: 4px;'>{tool}</span>",
-                        unsafe_allow_html=True,
-                    )
-                st.markdown("<hr style='margin-top:5px; margin-bottom:5px;'>", unsafe_allow_html=True)
-                tools_displayed = True
-            st.subheader("Response:")
-            st.markdown(current_response)
-        elif step_message.startswith("Tools used"):
-            tools_str = step_message.replace("Tools used: ", "")
-            tools_used = (
-                [t.strip() for t in tools_str.split(",")]
-                if tools_str != "No tools were used for this query"
-                else []
-            )
-        elif step_message.startswith("Error"):
-            st.error("❌ " + step_message)
-            current_response = step_message
-        else:
-            intermediate_steps.append(step_message)
-            steps_container.markdown(
-                "<br>".join([f"<small>{s}</small>" for s in intermediate_steps]),
-                unsafe_allow_html=True,
-            )
-            if step_message.startswith("Selected tool"):
-                tool_name = step_message.replace("Selected tool: ", "")
-                if tool_name not in tools_used:
-                    tools_used.append(tool_name)
-
-    if current_response:
-        st.session_state.mcp_responses.append(current_response)
-        st.session_state.mcp_tools_used = tools_used
-
-
 def run_mcp_query(user_input: str, mcp_servers: dict, pebblo_user: str, pebblo_user_groups: str):
-    asyncio.run(
-        _run_mcp_streaming(user_input, mcp_servers, pebblo_user, pebblo_user_groups)
+    """Run the agent on the shared background loop (loop_utils), not a fresh
+    asyncio.run loop, so pooled MCP sessions and async clients survive."""
+    run_mcp_streaming(
+        user_input, mcp_servers, pebblo_user, pebblo_user_groups,
+        refresh_graph=sync_mcp_graph_cache("_mcp_graph_stale"),
     )
 
 
@@ -904,6 +846,7 @@ with st.sidebar:
                 )
                 if st.button("Save", key=save_key):
                     if (st.session_state.get(url_key) or "").strip():
+                        st.session_state["_mcp_graph_stale"] = True
                         st.toast(f"✅ {label} saved.", icon="💾")
                     else:
                         st.warning("Enter a URL first.")
@@ -986,6 +929,7 @@ with st.sidebar:
                 )
                 if st.button("Save", key=save_key):
                     if (st.session_state.get(url_key) or "").strip():
+                        st.session_state["_mcp_graph_stale"] = True
                         st.toast(f"✅ {label} saved.", icon="💾")
                     else:
                         st.warning("Enter a URL first.")
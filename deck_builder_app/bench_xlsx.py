@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Time the two .xlsx engines (openpyxl vs fast) on the same workbooks.
+
+Unless existing files are given, builds a wide synthetic workbook
+(numbers, shared strings, dates, booleans) laid out the way Excel saves
+one, plus a copy without the <dimension> element; checks both engines
+produce identical text, and prints the best-of-N parse time of each.
+
+Parsing normally stops at MAX_CHARS / MAX_ROWS_PER_SHEET. openpyxl still
+scans a whole sheet up front when it has no <dimension>, the fast engine
+doesn't. The "full read" rows lift the caps so every row is read, which
+is where the per-cell cost of each engine shows (both share the same
+underlying XML parser, which bounds the gain there).
+
+Usage:
+    python bench_xlsx.py                          # 50,000 x 30 synthetic workbooks
+    python bench_xlsx.py --rows 20000 --cols 60 --repeat 5
+    python bench_xlsx.py report.xlsx other.xlsx   # your own files
+"""
+import argparse
+import io
+import random
+import sys
+import time
+import zipfile
+from typing import Callable, List, Tuple
+
+from openpyxl.utils.cell import get_column_letter
+
+import file_parser
+from file_parser import MAX_CHARS, XLSX_ENGINES, parse_xlsx_to_text
+
+
+_NS = "http://schemas.openxmlformats.org/"
+_PACKAGE_PARTS = {
+    "[Content_Types].xml": (
+        f'<Types xmlns="{_NS}package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{_NS}package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_NS}officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{_NS}package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_NS}officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_NS}officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        f'<Relationship Id="rId3" Type="{_NS}officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        f'<workbook xmlns="{_NS}spreadsheetml/2006/main" xmlns:r="{_NS}officeDocument/2006/relationships">'
+        '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    # style 1 is a date (built-in number format 14)
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{_NS}spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        "</styleSheet>"
+    ),
+}
+
+
+def build_workbook(rows: int, cols: int, dimension: bool = True, seed: int = 0) -> bytes:
+    """A rows x cols sheet (plus header row) of mixed cell types, laid out
+    the way Excel saves one: strings in the shared string table, dates as
+    date-styled serial numbers, and (if dimension) a <dimension> before the
+    rows. Streaming writers, e.g. openpyxl's write-only mode, leave it out."""
+    rnd = random.Random(seed)
+    words = ["north", "south", "east", "west", "alpha", "beta", "gamma", "delta", "q1", "q2", "q3", "q4"]
+    strings = [f"col_{c}" for c in range(cols)] + words
+    word_index = {word: cols + i for i, word in enumerate(words)}
+
+    sheet = io.StringIO()
+    sheet.write(f'<worksheet xmlns="{_NS}spreadsheetml/2006/main">')
+    if dimension:
+        sheet.write(f'<dimension ref="A1:{get_column_letter(cols)}{rows + 1}"/>')
+    sheet.write('<sheetData><row r="1">')
+    letters = [get_column_letter(c + 1) for c in range(cols)]
+    sheet.write("".join(f'<c r="{letters[c]}1" t="s"><v>{c}</v></c>' for c in range(cols)) + "</row>")
+    for r in range(2, rows + 2):
+        cells = []
+        for c in range(cols):
+            ref = f"{letters[c]}{r}"
+            kind = c % 5
+            if kind == 0:
+                cells.append(f'<c r="{ref}"><v>{rnd.randint(0, 10 ** 6)}</v></c>')
+            elif kind == 1:
+                cells.append(f'<c r="{ref}"><v>{round(rnd.random() * 1000, 2)}</v></c>')
+            elif kind == 2:
+                cells.append(f'<c r="{ref}" t="s"><v>{word_index[rnd.choice(words)]}</v></c>')
+            elif kind == 3:
+                cells.append(f'<c r="{ref}" s="1"><v>{43831 + r % 1000}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}" t="b"><v>{r % 2}</v></c>')
+        sheet.write(f'<row r="{r}">{"".join(cells)}</row>')
+    sheet.write("</sheetData></worksheet>")
+
+    shared = "".join(f"<si><t>{text}</t></si>" for text in strings)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, xml in _PACKAGE_PARTS.items():
+            package.writestr(name, xml)
+        package.writestr(
+            "xl/sharedStrings.xml",
+            f'<sst xmlns="{_NS}spreadsheetml/2006/main" count="{len(strings)}" uniqueCount="{len(strings)}">{shared}</sst>',
+        )
+        package.writestr("xl/worksheets/sheet1.xml", sheet.getvalue())
+    return buf.getvalue()
+
+
+def best_time(fn: Callable[[], str], repeat: int) -> Tuple[float, str]:
+    best, result = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(label: str, data: bytes, repeat: int) -> bool:
+    """Print one line per setting for data; returns False on an output mismatch."""
+    ok = True
+    settings = [("default caps", MAX_CHARS, file_parser.MAX_ROWS_PER_SHEET), ("full read", 10 ** 12, 10 ** 12)]
+    default_rows = file_parser.MAX_ROWS_PER_SHEET
+    for setting, max_chars, max_rows in settings:
+        file_parser.MAX_ROWS_PER_SHEET = max_rows
+        try:
+            timings: List[Tuple[str, float]] = []
+            outputs = set()
+            for engine in XLSX_ENGINES:
+                elapsed, text = best_time(
+                    lambda: parse_xlsx_to_text(data, filename=label, max_chars=max_chars, engine=engine), repeat,
+                )
+                timings.append((engine, elapsed))
+                outputs.add(text)
+        finally:
+            file_parser.MAX_ROWS_PER_SHEET = default_rows
+        (_, base), (_, fast) = timings
+        same = len(outputs) == 1
+        ok = ok and same
+        print(
+            f"{label:<28} {setting:<13} "
+            + "  ".join(f"{engine} {elapsed:7.3f}s" for engine, elapsed in timings)
+            + f"  speedup {base / fast:5.1f}x  {'identical output' if same else 'OUTPUT DIFFERS'}"
+        )
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the .xlsx parsing engines")
+    parser.add_argument("files", nargs="*", help="workbooks to parse (default: synthetic ones)")
+    parser.add_argument("--rows", type=int, default=50000, help="synthetic workbook rows (default 50000)")
+    parser.add_argument("--cols", type=int, default=30, help="synthetic workbook columns (default 30)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine; the best is reported")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        workbooks = []
+        for path in args.files:
+            with open(path, "rb") as f:
+                workbooks.append((path, f.read()))
+    else:
+        print(f"building {args.rows:,} x {args.cols} workbooks...", flush=True)
+        label = f"{args.rows}x{args.cols}"
+        workbooks = [
+            (label, build_workbook(args.rows, args.cols)),
+            (f"{label} no <dimension>", build_workbook(args.rows, args.cols, dimension=False)),
+        ]
+
+    ok = True
+    for label, data in workbooks:
+        ok = bench(label, data, args.repeat) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
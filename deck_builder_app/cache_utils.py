@@ -0,0 +1,239 @@
+"""On-disk caches for the deck builder (no Streamlit dependency).
+
+DiskCache is a small JSON-value cache in a directory: one file per entry,
+LRU eviction under a total size cap, and an optional TTL. It survives app
+restarts and is shared by every Streamlit session in the process.
+
+The parse cache built on it (parse_file_cached) stores parse_file_to_text()
+output for files on disk, keyed by path, size, content hash, max_chars,
+file_parser.PARSER_VERSION and the spreadsheet summary settings, so
+re-asking against an unchanged DECK_SOURCE_DIR skips parsing entirely;
+misses are parsed on the parse_pool process pool. MAP_CACHE holds the
+multi-pass map results (keys are built by deck_builder).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from file_parser import MAX_CHARS, PARSER_VERSION, XLSX_SUMMARY_ROWS, XLSX_SUMMARY_SAMPLE_ROWS
+from parse_pool import ParseResult, parse_many, parse_path
+
+log = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(__file__)
+
+_raw_cache_dir = os.getenv("PARSE_CACHE_DIR", "").strip() or ".cache/parse"
+PARSE_CACHE_DIR = _raw_cache_dir if os.path.isabs(_raw_cache_dir) else os.path.join(_APP_DIR, _raw_cache_dir)
+# Total size cap for cached parse output; 0 disables the parse cache.
+PARSE_CACHE_MAX_MB = float(os.getenv("PARSE_CACHE_MAX_MB", "64").strip() or 0)
+
+_raw_map_cache_dir = os.getenv("MAP_CACHE_DIR", "").strip() or ".cache/map"
+MAP_CACHE_DIR = _raw_map_cache_dir if os.path.isabs(_raw_map_cache_dir) else os.path.join(_APP_DIR, _raw_map_cache_dir)
+# Multi-pass map results (per-file notes): size cap (0 disables) and TTL in
+# seconds (0 = entries never expire).
+MAP_CACHE_MAX_MB = float(os.getenv("MAP_CACHE_MAX_MB", "32").strip() or 0)
+MAP_CACHE_TTL_S = float(os.getenv("MAP_CACHE_TTL_S", "86400").strip() or 0)
+
+
+class DiskCache:
+    """Directory-backed key -> JSON value cache with LRU eviction.
+
+    Entries are written atomically (temp file + rename), so concurrent
+    readers never see a partial entry. Last access is tracked through the
+    entry file's mtime, so LRU order also survives restarts. An entry larger
+    than max_bytes on its own is not stored.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_s: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, List[float]]] = None  # name -> [size, last_access]
+        self._total = 0
+
+    def _name(self, key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+
+    def _ensure_index(self) -> Dict[str, List[float]]:
+        """Scan the directory once per process (caller holds the lock)."""
+        if self._index is None:
+            self._index, self._total = {}, 0
+            if os.path.isdir(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(".json") and entry.is_file():
+                        stat = entry.stat()
+                        self._index[entry.name] = [stat.st_size, stat.st_mtime]
+                        self._total += stat.st_size
+        return self._index
+
+    def _forget(self, name: str) -> None:
+        """Drop name from the index and disk (caller holds the lock)."""
+        size, _ = self._ensure_index().pop(name, (0, 0))
+        self._total -= size
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value stored under key, or default if missing or expired."""
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        now = time.time()
+        with self._lock:
+            if entry.get("key") != key:
+                return default
+            if self.ttl_s is not None and now - entry.get("created", 0) > self.ttl_s:
+                self._forget(name)
+                return default
+            index = self._ensure_index()
+            if name in index:
+                index[name][1] = now
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value (JSON-serializable) under key, evicting LRU entries to fit."""
+        data = json.dumps({"key": key, "created": time.time(), "value": value})
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        name = self._name(key)
+        with self._lock:
+            index = self._ensure_index()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, os.path.join(self.directory, name))
+            except OSError as exc:
+                log.warning("[cache] could not write %s: %s", self.directory, exc)
+                return
+            self._total += size - index.get(name, [0, 0])[0]
+            index[name] = [size, time.time()]
+            while self._total > self.max_bytes and len(index) > 1:
+                oldest = min((n for n in index if n != name), key=lambda n: index[n][1])
+                self._forget(oldest)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._forget(self._name(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in list(self._ensure_index()):
+                self._forget(name)
+
+
+# ---------------------------------------------------------------------------
+# File digests — memoized on (size, mtime) so an unchanged file is hashed
+# once per process, not once per chat turn.
+# ---------------------------------------------------------------------------
+
+_DIGESTS: Dict[str, tuple] = {}  # abs path -> (size, mtime_ns, sha256 hex)
+_DIGESTS_LOCK = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """sha256 hex digest of the file at path."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _DIGESTS_LOCK:
+        memo = _DIGESTS.get(path)
+    if memo and memo[:2] == (stat.st_size, stat.st_mtime_ns):
+        return memo[2]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+    with _DIGESTS_LOCK:
+        _DIGESTS[path] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+
+# ---------------------------------------------------------------------------
+# Parse cache
+# ---------------------------------------------------------------------------
+
+PARSE_CACHE = (
+    DiskCache(PARSE_CACHE_DIR, int(PARSE_CACHE_MAX_MB * 1024 * 1024)) if PARSE_CACHE_MAX_MB > 0 else None
+)
+
+
+def _parse_cache_key(path: str, max_chars: int) -> str:
+    return json.dumps([
+        "parse", os.path.abspath(path), os.path.getsize(path), file_digest(path), max_chars, PARSER_VERSION,
+        XLSX_SUMMARY_ROWS, XLSX_SUMMARY_SAMPLE_ROWS,
+    ])
+
+
+def parse_file_cached(path: str, filename: str, max_chars: int = MAX_CHARS) -> str:
+    """parse_file_to_text() for a file on disk, served from PARSE_CACHE when
+    the file is unchanged. Misses are parsed on the process pool
+    (parse_pool.parse_path). Parse failures are raised as usual, never cached.
+
+    Raises:
+        FileParsingError: unsupported extension, or the file fails to parse.
+        OSError: the file cannot be read.
+    """
+    if PARSE_CACHE is None:
+        return parse_path(path, filename, max_chars=max_chars)
+
+    key = _parse_cache_key(path, max_chars)
+    text = PARSE_CACHE.get(key)
+    if text is not None:
+        return text
+    text = parse_path(path, filename, max_chars=max_chars)
+    PARSE_CACHE.set(key, text)
+    return text
+
+
+def parse_files_cached(files: Sequence[Tuple[str, str]], max_chars: int = MAX_CHARS) -> Iterator[ParseResult]:
+    """parse_file_cached() for many [(filename, path), ...] at once: cache
+    hits first, then the misses in parallel on the process pool
+    (parse_pool.parse_many), each yielded as soon as it completes. Failures
+    come back in ParseResult.error rather than being raised."""
+    misses = []  # (index, filename, path, cache key)
+    for index, (filename, path) in enumerate(files):
+        try:
+            key = _parse_cache_key(path, max_chars) if PARSE_CACHE is not None else None
+        except OSError as exc:
+            yield ParseResult(index, filename, None, exc)
+            continue
+        text = PARSE_CACHE.get(key) if key else None
+        if text is not None:
+            yield ParseResult(index, filename, text, None)
+        else:
+            misses.append((index, filename, path, key))
+
+    for result in parse_many([(path, filename) for _, filename, path, _ in misses], max_chars=max_chars):
+        index, _filename, _path, key = misses[result.index]
+        if key and result.error is None:
+            PARSE_CACHE.set(key, result.text)
+        yield result._replace(index=index)
+
+
+# ---------------------------------------------------------------------------
+# Map-result cache
+# ---------------------------------------------------------------------------
+
+MAP_CACHE = (
+    DiskCache(MAP_CACHE_DIR, int(MAP_CACHE_MAX_MB * 1024 * 1024), ttl_s=MAP_CACHE_TTL_S or None)
+    if MAP_CACHE_MAX_MB > 0 else None
+)
@@ -5,14 +5,25 @@ Two modes, selectable from the sidebar:
   - Insecure Inference:  calls the configured model directly, no gateway, no Pebblo headers.
 """
 import ast
+import hashlib
+import json
+import math
 import os
 import re
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import streamlit as st
 from openai import APIStatusError, OpenAI
 
-from file_parser import FileParsingError, is_supported_file, parse_file_to_text
+from cache_utils import MAP_CACHE, file_digest, parse_file_cached, parse_files_cached
+from file_parser import (
+    MAX_CHARS, PARSER_VERSION, XLSX_SUMMARY_ROWS, XLSX_SUMMARY_SAMPLE_ROWS, FileParsingError, is_supported_file,
+    parse_file_to_text,
+)
+from search_index import SOURCE_INDEX
+from source_watcher import get_watcher, list_files
+from token_budget import pack_files
 from utils import (
     API_BASE_URL,
     API_KEY,
@@ -57,6 +68,12 @@ DOCS_DIR = _raw_docs_dir if os.path.isabs(_raw_docs_dir) else os.path.join(_APP_
 _raw_source_dir = os.getenv("DECK_SOURCE_DIR", "").strip() or "static/source_files"
 DECK_SOURCE_DIR = _raw_source_dir if os.path.isabs(_raw_source_dir) else os.path.join(_APP_DIR, _raw_source_dir)
 
+# DOCS_DIR / DECK_SOURCE_DIR are listed from an in-memory manifest refreshed
+# by a background thread every SOURCE_POLL_INTERVAL_S seconds (see
+# source_watcher.py), not on every rerun; new or changed DECK_SOURCE_DIR files
+# are pre-parsed in the background. 0 = list the folder on every call instead.
+SOURCE_POLL_INTERVAL_S = max(0.0, float(os.getenv("SOURCE_POLL_INTERVAL_S", "2").strip() or 0))
+
 # Folder-iteration pipeline mode. Default (false): single pass — every eligible
 # file's content is combined into ONE prompt and sent in a single LLM call
 # (fast, but a block/error on that one call fails the whole turn). Set to
@@ -65,6 +82,37 @@ DECK_SOURCE_DIR = _raw_source_dir if os.path.isabs(_raw_source_dir) else os.path
 # Safe Infer blocking that file), then a final call combines whatever succeeded.
 MULTI_PASS_ENABLED = os.getenv("ENABLE_MULTI_PASS", "false").strip().lower() == "true"
 
+# Single pass only: token budget for the combined file content of the one
+# prompt. Shared out across files by relevance and size; files over their
+# share are trimmed a whole row/paragraph at a time (see token_budget.py) and
+# the trims are reported in the response's note. 0 = no budget (every file is
+# only capped at file_parser.MAX_CHARS).
+SINGLE_PASS_TOKEN_BUDGET = max(0, int(os.getenv("SINGLE_PASS_TOKEN_BUDGET", "24000").strip() or 0))
+
+# Multi-pass only: how many per-file map calls may be in flight at once. The
+# map calls are independent, so they run concurrently on worker threads; 1
+# restores the old one-file-at-a-time behaviour.
+MAP_MAX_IN_FLIGHT = max(1, int(os.getenv("MAP_MAX_IN_FLIGHT", "4").strip() or 4))
+
+# Multi-pass only: ENABLE_STREAMING_REDUCE=true starts the reduce before every
+# map call has finished — once STREAMING_REDUCE_QUORUM (fraction of eligible
+# files) have produced notes, or STREAMING_REDUCE_DEADLINE_S seconds have
+# passed with at least one — and streams a provisional outline from those.
+# A final reconciliation call then folds in the notes that arrived later.
+STREAMING_REDUCE_ENABLED = os.getenv("ENABLE_STREAMING_REDUCE", "false").strip().lower() == "true"
+STREAMING_REDUCE_QUORUM = min(1.0, max(0.0, float(os.getenv("STREAMING_REDUCE_QUORUM", "0.5").strip() or 0.5)))
+STREAMING_REDUCE_DEADLINE_S = max(0.0, float(os.getenv("STREAMING_REDUCE_DEADLINE_S", "5").strip() or 0))
+
+# Multi-pass only: ENABLE_TREE_REDUCE=true combines the per-file notes in
+# stages when they don't fit one reduce prompt — batches of at most
+# REDUCE_FAN_IN notes / REDUCE_BATCH_TOKENS estimated tokens are condensed in
+# parallel (MAP_MAX_IN_FLIGHT at once), level by level, until one batch is
+# left for the final streaming call. Lets the folder grow to hundreds of files
+# without the final prompt outgrowing the model's context.
+TREE_REDUCE_ENABLED = os.getenv("ENABLE_TREE_REDUCE", "false").strip().lower() == "true"
+REDUCE_FAN_IN = max(2, int(os.getenv("REDUCE_FAN_IN", "8").strip() or 8))
+REDUCE_BATCH_TOKENS = max(1, int(os.getenv("REDUCE_BATCH_TOKENS", "6000").strip() or 6000))
+
 # Set DEBUG=true to append a "⏱ Timing" breakdown to every response. Off by
 # default — this is a diagnostic aid, not something end users need to see.
 DEBUG_ENABLED = os.getenv("DEBUG", "false").strip().lower() == "true"
@@ -90,6 +138,12 @@ try:
 except Exception:
     _FILE_TOPIC_HINTS = {}
 
+# Folder iteration: send only the RELEVANCE_TOP_K source files that rank
+# highest for the prompt (BM25 over their parsed text, see search_index.py),
+# after any FILE_TOPIC_HINTS narrowing. 0 (default) = no cut. Files ranked out
+# are listed in the response's note, like topic-excluded ones.
+RELEVANCE_TOP_K = max(0, int(os.getenv("RELEVANCE_TOP_K", "0").strip() or 0))
+
 _TOPIC_STOPWORDS = {
     "a", "an", "the", "of", "to", "for", "and", "or", "is", "are", "about",
     "on", "in", "with", "related", "questions", "question", "regarding", "any",
@@ -133,6 +187,38 @@ def _filter_by_topic_relevance(eligible: list, user_input: str) -> tuple:
     return kept, excluded
 
 
+def _rank_by_relevance(eligible: list, user_input: str) -> tuple:
+    """Keep the RELEVANCE_TOP_K files of `eligible` that best match user_input
+    (BM25, search_index.SOURCE_INDEX); no-op if RELEVANCE_TOP_K is 0 or not
+    exceeded. The index is brought up to date for `eligible` first — only
+    new or changed files are parsed, and never files outside `eligible`
+    (e.g. ones the user is locked out of); those don't enter the scores'
+    corpus statistics either.
+
+    Fails open like _filter_by_topic_relevance: if no file matches any of the
+    prompt's terms, nothing is cut. Ties keep folder order.
+
+    Returns (kept, excluded) — kept in `eligible` order, excluded as
+    [(fname, reason), ...] for the response's transparency note.
+    """
+    if not RELEVANCE_TOP_K or len(eligible) <= RELEVANCE_TOP_K:
+        return eligible, []
+    SOURCE_INDEX.retain(fpath for _, fpath in _list_docs(DECK_SOURCE_DIR))
+    for fname, fpath in eligible:
+        SOURCE_INDEX.update(fpath, fname)
+    scores = SOURCE_INDEX.scores(user_input, [fpath for _, fpath in eligible])
+    if not any(scores.values()):
+        return eligible, []
+    ranked = sorted(range(len(eligible)), key=lambda i: -scores[eligible[i][1]])
+    top = set(ranked[:RELEVANCE_TOP_K])
+    kept = [eligible[i] for i in range(len(eligible)) if i in top]
+    excluded = [
+        (eligible[i][0], f"ranked below the top {RELEVANCE_TOP_K} for this question")
+        for i in range(len(eligible)) if i not in top
+    ]
+    return kept, excluded
+
+
 def _is_file_readable(file_path: str, pebblo_user_groups: str) -> bool:
     """Return True if the user may see/use file_path.
 
@@ -151,14 +237,12 @@ def _is_file_readable(file_path: str, pebblo_user_groups: str) -> bool:
 
 
 def _list_docs(directory: str) -> list:
-    """Return [(filename, full_path), ...] for all non-hidden files in directory."""
-    if not os.path.isdir(directory):
-        return []
-    return [
-        (fname, os.path.join(directory, fname))
-        for fname in sorted(os.listdir(directory))
-        if not fname.startswith(".") and os.path.isfile(os.path.join(directory, fname))
-    ]
+    """Return [(filename, full_path), ...] for all non-hidden files in directory,
+    from the directory's watcher manifest (at most SOURCE_POLL_INTERVAL_S old)."""
+    if SOURCE_POLL_INTERVAL_S <= 0:
+        return [(fname, fpath) for fname, fpath, _, _ in list_files(directory)]
+    watcher = get_watcher(directory, SOURCE_POLL_INTERVAL_S, preparse=directory == DECK_SOURCE_DIR)
+    return [(entry.fname, entry.path) for entry in watcher.entries()]
 
 
 def _render_file_link(fname: str, fpath: str) -> None:
@@ -228,7 +312,9 @@ def _process_upload_and_message(user_input: str, uploaded_file) -> tuple:
     name = uploaded_file.name
     if is_supported_file(name):
         try:
-            file_text = parse_file_to_text(uploaded_file.getvalue(), filename=name)
+            # UploadedFile is a seekable in-memory file: parse it in place rather
+            # than copying it out with getvalue()
+            file_text = parse_file_to_text(uploaded_file, filename=name)
         except FileParsingError as exc:
             st.error(str(exc))
             st.stop()
@@ -244,7 +330,7 @@ def _process_upload_and_message(user_input: str, uploaded_file) -> tuple:
 def _eligible_source_files(pebblo_groups: str = None) -> tuple:
     """Return (eligible, locked) from DECK_SOURCE_DIR.
 
-    eligible: [(fname, fpath), ...] — supported files (.xlsx/.xlsm/.docx) the
+    eligible: [(fname, fpath), ...] — supported files (see is_supported_file) the
       current user may use (all of them when pebblo_groups is None, i.e.
       Insecure Inference).
     locked: [fname, ...] — files that exist but are excluded by DOC_ACCESS_ALLOWED.
@@ -323,6 +409,58 @@ REDUCE_SYSTEM_PROMPT = (
     f"say so briefly at the top. {_FILENAME_HINT}"
 )
 
+COMBINE_SYSTEM_PROMPT = (
+    "You are a slide deck generation assistant. You are given short notes gathered "
+    "from several source files, plus the user's overall instructions for the deck "
+    "they want. Merge them into ONE concise set of notes (bullet points, no slide "
+    "outline yet) — these will later be combined with other merged notes into one "
+    "final deck. Keep every point relevant to the instructions, drop duplicates, "
+    "and say which file(s) each point came from. If any note mentions a masked or "
+    "redacted field, preserve that mention rather than guessing the real value. "
+    f"{_FILENAME_HINT}"
+)
+
+RECONCILE_SYSTEM_PROMPT = (
+    "You are a slide deck generation assistant. You are given a provisional "
+    "slide outline built from notes on some of the source files, notes from "
+    "additional source files that arrived afterwards, and the user's overall "
+    "instructions. Produce the final, complete slide-by-slide outline in "
+    "Markdown: keep the provisional outline's structure where it still fits and "
+    "fold in the new notes, extending existing slides or adding new ones. For "
+    "each slide, include a heading and 2-5 concise bullet points. If any note "
+    "mentions a masked or redacted field, preserve that mention rather than "
+    f"guessing the real value. {_FILENAME_HINT}"
+)
+
+
+# Changes whenever MAP_SYSTEM_PROMPT does, so cached map results produced
+# under an older prompt are never reused.
+_MAP_PROMPT_VERSION = hashlib.sha256(MAP_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+_INSTRUCTION_FILLER = _TOPIC_STOPWORDS | {
+    "please", "can", "could", "would", "you", "me", "i", "we", "my", "our", "it",
+    "make", "create", "build", "generate", "give", "want", "need", "like",
+}
+
+
+def _normalize_instructions(user_input: str) -> str:
+    """Case, punctuation, spacing and filler words ("please", "create", ...)
+    don't change a map result's cache key, so lightly rephrased instructions
+    reuse the same per-file notes."""
+    words = re.findall(r"[a-z0-9]+", user_input.casefold())
+    return " ".join(w for w in words if w not in _INSTRUCTION_FILLER)
+
+
+def _map_cache_key(client: OpenAI, model: str, fpath: str, user_input: str, pebblo_groups: str = None) -> str:
+    """Map-result cache key: endpoint (gateway vs direct), model, the user's
+    Pebblo groups, file content hash, parser version and settings, map
+    prompt version and the normalized instructions."""
+    groups = sorted({g.strip() for g in (pebblo_groups or "").split(",") if g.strip()})
+    return json.dumps([
+        "map", str(client.base_url), model, groups, file_digest(fpath), PARSER_VERSION, MAX_CHARS,
+        XLSX_SUMMARY_ROWS, XLSX_SUMMARY_SAMPLE_ROWS, _MAP_PROMPT_VERSION, _normalize_instructions(user_input),
+    ])
+
 
 def _call_once(client: OpenAI, model: str, system_prompt: str, content: str, timing: dict = None) -> str:
     """Single non-streaming completion. Raises on API/network errors (caller decides).
@@ -362,68 +500,130 @@ def _call_stream(client: OpenAI, model: str, system_prompt: str, content: str, t
         timing["total_s"] = time.perf_counter() - start
 
 
-def _map_source_files(client: OpenAI, model: str, eligible: list, user_input: str) -> tuple:
-    """Map phase: one non-streaming call per eligible file, shown live via st.status.
+def _map_one(
+    client: OpenAI, model: str, fname: str, fpath: str, user_input: str,
+    pebblo_groups: str = None, use_cache: bool = True,
+) -> tuple:
+    """Parse one file and make its map call. Runs on a worker thread, so it
+    must not touch Streamlit — the caller renders the outcome.
 
-    Returns (partials, skipped, file_timings):
-      partials: [(fname, partial_text), ...] for files that succeeded.
-      skipped:  [(fname, reason), ...] for files that errored (403 = blocked by
-        Safe Infer; anything else is a generic error) — never aborts the run.
-      file_timings: [(fname, parse_s, call_s), ...] for every attempted file
-        (call_s is 0.0 for files that errored before/without completing a call).
+    With use_cache, a result cached in MAP_CACHE for the same file content,
+    instructions, model and user groups is returned without parsing or
+    calling the LLM. Successful calls are always written to MAP_CACHE (so a
+    bypassed turn refreshes it); errors, including 403s, never are.
+
+    Returns (partial, reason, parse_s, call_s, cached): partial is the map
+    text on success (reason None); otherwise partial is None and reason says
+    why the file was skipped (403 = blocked by Safe Infer).
     """
-    partials, skipped, file_timings = [], [], []
-    with st.status(f"Processing {len(eligible)} source file(s)...", expanded=True) as status_box:
-        for fname, fpath in eligible:
-            parse_start = time.perf_counter()
-            try:
-                with open(fpath, "rb") as f:
-                    file_text = parse_file_to_text(f.read(), filename=fname)
-                parse_s = time.perf_counter() - parse_start
-                map_content = (
-                    f"File content from '{fname}':\n\n{file_text}\n\n"
-                    f"Overall instructions:\n{user_input}"
-                )
-                call_timing: dict = {}
-                partial = _call_once(client, model, MAP_SYSTEM_PROMPT, map_content, timing=call_timing)
-                partials.append((fname, partial))
-                call_s = call_timing.get("call_s", 0.0)
-                file_timings.append((fname, parse_s, call_s))
-                status_box.write(f"✅ {fname} — parse {_fmt_secs(parse_s)}, call {_fmt_secs(call_s)}")
-            except APIStatusError as exc:
-                parse_s = time.perf_counter() - parse_start
-                status_code = getattr(exc, "status_code", None)
-                reason = "blocked (HTTP 403)" if status_code == 403 else f"error (HTTP {status_code})"
-                skipped.append((fname, reason))
-                file_timings.append((fname, parse_s, 0.0))
-                status_box.write(f"❌ {fname} — {reason}")
-            except (FileParsingError, OSError):
-                parse_s = time.perf_counter() - parse_start
-                skipped.append((fname, "could not read/parse file"))
-                file_timings.append((fname, parse_s, 0.0))
-                status_box.write(f"❌ {fname} — could not read/parse file")
-            except Exception as exc:
-                parse_s = time.perf_counter() - parse_start
-                skipped.append((fname, f"error: {exc}"))
-                file_timings.append((fname, parse_s, 0.0))
-                status_box.write(f"❌ {fname} — error")
-        status_box.update(
-            label=f"Processed {len(eligible)} file(s): {len(partials)} succeeded, {len(skipped)} skipped.",
-            state="complete",
+    parse_start = time.perf_counter()
+    parse_s = 0.0
+    try:
+        cache_key = _map_cache_key(client, model, fpath, user_input, pebblo_groups) if MAP_CACHE is not None else None
+        if cache_key and use_cache:
+            partial = MAP_CACHE.get(cache_key)
+            if partial is not None:
+                return partial, None, 0.0, 0.0, True
+        file_text = parse_file_cached(fpath, fname)
+        parse_s = time.perf_counter() - parse_start
+        map_content = (
+            f"File content from '{fname}':\n\n{file_text}\n\n"
+            f"Overall instructions:\n{user_input}"
         )
+        call_timing: dict = {}
+        partial = _call_once(client, model, MAP_SYSTEM_PROMPT, map_content, timing=call_timing)
+        if cache_key:
+            MAP_CACHE.set(cache_key, partial)
+        return partial, None, parse_s, call_timing.get("call_s", 0.0), False
+    except APIStatusError as exc:
+        status_code = getattr(exc, "status_code", None)
+        reason = "blocked (HTTP 403)" if status_code == 403 else f"error (HTTP {status_code})"
+    except (FileParsingError, OSError):
+        reason = "could not read/parse file"
+    except Exception as exc:
+        reason = f"error: {exc}"
+    return None, reason, parse_s or time.perf_counter() - parse_start, 0.0, False
+
+
+def _write_map_status(status_box, fname: str, result: tuple) -> None:
+    """One st.status line for a finished _map_one result (script thread only)."""
+    _partial, reason, parse_s, call_s, cached = result
+    if cached:
+        status_box.write(f"♻️ {fname} — cached notes")
+    elif reason is None:
+        status_box.write(f"✅ {fname} — parse {_fmt_secs(parse_s)}, call {_fmt_secs(call_s)}")
+    elif reason.startswith("error: "):
+        status_box.write(f"❌ {fname} — error")
+    else:
+        status_box.write(f"❌ {fname} — {reason}")
+
+
+def _collect_map_results(eligible: list, results: dict) -> tuple:
+    """(partials, skipped, file_timings) in `eligible` order from
+    {fname: _map_one result}; files without a result yet are left out."""
+    partials, skipped, file_timings = [], [], []
+    for fname, _ in eligible:
+        if fname not in results:
+            continue
+        partial, reason, parse_s, call_s, _cached = results[fname]
+        if reason is None:
+            partials.append((fname, partial))
+        else:
+            skipped.append((fname, reason))
+        file_timings.append((fname, parse_s, call_s))
     return partials, skipped, file_timings
 
 
-def _reduce_stream(client: OpenAI, model: str, partials: list, user_input: str, skipped: list, locked: list, topic_excluded: list = None, timing: dict = None):
-    """Final streaming call combining collected partials, plus a deterministic
-    (not LLM-generated) skip-summary note appended after streaming completes."""
-    if partials:
-        combined = "\n\n".join(f"--- Notes from {fname} ---\n{text}" for fname, text in partials)
-        content = f"{combined}\n\nOverall instructions:\n{user_input}"
-    else:
-        content = user_input
-    yield from _call_stream(client, model, REDUCE_SYSTEM_PROMPT, content, timing=timing)
+def _map_status_label(eligible: list, results: dict) -> str:
+    partials, skipped, _ = _collect_map_results(eligible, results)
+    cached_count = sum(1 for r in results.values() if r[4])
+    cached_part = f" ({cached_count} from cache)" if cached_count else ""
+    return f"Processed {len(eligible)} file(s): {len(partials)} succeeded{cached_part}, {len(skipped)} skipped."
+
+
+def _map_source_files(
+    client: OpenAI, model: str, eligible: list, user_input: str,
+    pebblo_groups: str = None, use_cache: bool = True,
+) -> tuple:
+    """Map phase: one non-streaming call per eligible file, at most
+    MAP_MAX_IN_FLIGHT at once, shown live via st.status as each completes.
+    Files with a cached map result (see _map_one) skip the call.
 
+    Returns (partials, skipped, file_timings), each in `eligible` order
+    regardless of completion order:
+      partials: [(fname, partial_text), ...] for files that succeeded.
+      skipped:  [(fname, reason), ...] for files that errored (403 = blocked by
+        Safe Infer; anything else is a generic error) — never aborts the run.
+      file_timings: [(fname, parse_s, call_s), ...] for every attempted file
+        (call_s is 0.0 for cached files and for files that errored
+        before/without completing a call).
+    """
+    results = {}
+    with st.status(f"Processing {len(eligible)} source file(s)...", expanded=True) as status_box:
+        with ThreadPoolExecutor(max_workers=min(MAP_MAX_IN_FLIGHT, len(eligible)) or 1) as pool:
+            futures = {
+                pool.submit(_map_one, client, model, fname, fpath, user_input, pebblo_groups, use_cache): fname
+                for fname, fpath in eligible
+            }
+            # st.* calls stay on the script thread, in completion order
+            for future in as_completed(futures):
+                fname = futures[future]
+                results[fname] = future.result()
+                _write_map_status(status_box, fname, results[fname])
+
+        status_box.update(label=_map_status_label(eligible, results), state="complete")
+    return _collect_map_results(eligible, results)
+
+
+def _reduce_content(partials: list, user_input: str) -> str:
+    if not partials:
+        return user_input
+    combined = "\n\n".join(f"--- Notes from {fname} ---\n{text}" for fname, text in partials)
+    return f"{combined}\n\nOverall instructions:\n{user_input}"
+
+
+def _multi_pass_note(skipped: list, locked: list, topic_excluded: list = None) -> str:
+    """Deterministic (not LLM-generated) skip-summary trailer, or "" if none."""
     note_parts = []
     if skipped:
         detail = ", ".join(f"{fname} ({reason})" for fname, reason in skipped)
@@ -432,8 +632,216 @@ def _reduce_stream(client: OpenAI, model: str, partials: list, user_input: str,
         note_parts.append(f"{len(locked)} file(s) were not accessible to the current user: {', '.join(locked)}")
     if topic_excluded:
         note_parts.append(f"{len(topic_excluded)} file(s) excluded as not relevant to this question: {', '.join(fname for fname, _ in topic_excluded)}")
-    if note_parts:
-        yield f"\n\n---\n*Note: {'; '.join(note_parts)}.*"
+    return f"\n\n---\n*Note: {'; '.join(note_parts)}.*" if note_parts else ""
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) — only used for batching."""
+    return len(text) // 4 + 1
+
+
+def _reduce_batches(partials: list) -> list:
+    """Greedily pack partials, in order, into batches of at most REDUCE_FAN_IN
+    notes and REDUCE_BATCH_TOKENS estimated tokens. A note bigger than the
+    budget on its own gets a batch to itself."""
+    batches, current, current_tokens = [], [], 0
+    for fname, text in partials:
+        tokens = _estimate_tokens(text)
+        if current and (len(current) >= REDUCE_FAN_IN or current_tokens + tokens > REDUCE_BATCH_TOKENS):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((fname, text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _tree_reduce(client: OpenAI, model: str, partials: list, user_input: str, timing: dict = None) -> list:
+    """Condense partials level by level until they fit one reduce prompt
+    (a single _reduce_batches batch); no-op when they already do, or when
+    TREE_REDUCE_ENABLED is off.
+
+    Each multi-note batch becomes one non-streaming COMBINE_SYSTEM_PROMPT call,
+    at most MAP_MAX_IN_FLIGHT at once, labelled with the files it covers. A
+    batch whose call fails (e.g. a 403) is passed up to the next level
+    unchanged rather than dropped; if a whole level makes no progress the
+    remaining notes go to the final reduce as they are.
+
+    Returns the condensed [(label, text), ...]. If given, timing is populated
+    with levels, calls and wall_s.
+    """
+    if timing is not None:
+        timing.update(levels=0, calls=0, wall_s=0.0)
+    if not TREE_REDUCE_ENABLED or len(_reduce_batches(partials)) <= 1:
+        return partials
+
+    start = time.perf_counter()
+    with st.status(f"Combining notes from {len(partials)} file(s)...", expanded=False) as status_box:
+        level = 0
+        while True:
+            batches = _reduce_batches(partials)
+            if len(batches) <= 1:
+                break
+            level += 1
+            status_box.write(f"Level {level}: {len(partials)} note(s) in {len(batches)} batch(es)")
+            merged = [None] * len(batches)
+            with ThreadPoolExecutor(max_workers=min(MAP_MAX_IN_FLIGHT, len(batches))) as pool:
+                futures = {}
+                for i, batch in enumerate(batches):
+                    if len(batch) == 1:
+                        merged[i] = batch
+                        continue
+                    label = ", ".join(fname for fname, _ in batch)
+                    futures[pool.submit(_call_once, client, model, COMBINE_SYSTEM_PROMPT, _reduce_content(batch, user_input))] = (i, label)
+                # st.* calls stay on the script thread, in completion order
+                for future in as_completed(futures):
+                    i, label = futures[future]
+                    try:
+                        merged[i] = [(label, future.result())]
+                    except Exception as exc:
+                        status_code = getattr(exc, "status_code", None)
+                        status_box.write(f"❌ batch {i + 1} — {'blocked (HTTP 403)' if status_code == 403 else 'error'}; passing its notes up unmerged")
+                        merged[i] = batches[i]
+                    if timing is not None:
+                        timing["calls"] += 1
+            condensed = [note for batch in merged for note in batch]
+            if len(condensed) >= len(partials):
+                break
+            partials = condensed
+        status_box.update(
+            label=f"Combined into {len(partials)} note set(s) over {level} level(s).", state="complete",
+        )
+    if timing is not None:
+        timing.update(levels=level, wall_s=time.perf_counter() - start)
+    return partials
+
+
+def _reduce_stream(client: OpenAI, model: str, partials: list, user_input: str, skipped: list, locked: list, topic_excluded: list = None, timing: dict = None):
+    """Final streaming call combining collected partials, plus a deterministic
+    (not LLM-generated) skip-summary note appended after streaming completes."""
+    tree_timing: dict = {}
+    partials = _tree_reduce(client, model, partials, user_input, timing=tree_timing)
+    yield from _call_stream(client, model, REDUCE_SYSTEM_PROMPT, _reduce_content(partials, user_input), timing=timing)
+    if timing is not None:
+        timing["tree"] = tree_timing
+    note = _multi_pass_note(skipped, locked, topic_excluded)
+    if note:
+        yield note
+
+
+def _streaming_map_reduce(
+    client: OpenAI, model: str, eligible: list, user_input: str, locked: list, topic_excluded: list = None,
+    pebblo_groups: str = None, use_cache: bool = True, timing: dict = None,
+):
+    """Map and reduce overlapped (ENABLE_STREAMING_REDUCE=true).
+
+    Map calls run on a worker pool exactly as in _map_source_files. Once
+    STREAMING_REDUCE_QUORUM of the files have produced notes (or
+    STREAMING_REDUCE_DEADLINE_S has passed with at least one), a provisional
+    outline is streamed from the notes so far while the remaining map calls
+    keep running; their status lines are rendered between streamed chunks.
+    When they finish, a reconciliation call streams the final outline from
+    the provisional one plus the late notes. If nothing new succeeded after
+    the provisional outline started, it already is the final outline and no
+    second call is made. Ends with the same skip-summary note as
+    _reduce_stream.
+
+    If given, timing is populated with map_wall_s, provisional_files,
+    provisional_start_s, provisional (a _call_stream timing dict),
+    reconcile (likewise; None if not needed), tree (see _tree_reduce; early
+    and late notes combined) and file_timings.
+    """
+    timing = timing if timing is not None else {}
+    start = time.perf_counter()
+    quorum = max(1, math.ceil(len(eligible) * STREAMING_REDUCE_QUORUM))
+    results = {}
+    status_box = st.status(f"Processing {len(eligible)} source file(s)...", expanded=True)
+    pool = ThreadPoolExecutor(max_workers=min(MAP_MAX_IN_FLIGHT, len(eligible)) or 1)
+    try:
+        futures = {
+            pool.submit(_map_one, client, model, fname, fpath, user_input, pebblo_groups, use_cache): fname
+            for fname, fpath in eligible
+        }
+        pending = set(futures)
+
+        def _drain(timeout):
+            # st.* calls stay on the script thread, in completion order
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                fname = futures[future]
+                results[fname] = future.result()
+                _write_map_status(status_box, fname, results[fname])
+
+        def _succeeded() -> int:
+            return sum(1 for r in results.values() if r[1] is None)
+
+        while pending and _succeeded() < quorum:
+            remaining = STREAMING_REDUCE_DEADLINE_S - (time.perf_counter() - start)
+            if remaining <= 0 and _succeeded():
+                break
+            _drain(remaining if remaining > 0 else None)
+
+        early, _, _ = _collect_map_results(eligible, results)
+        timing["provisional_files"] = len(early)
+        timing["provisional"] = {}
+        timing["reconcile"] = None
+        provisional = []
+        if pending:
+            status_box.update(label=(
+                f"Drafting from {len(early)} of {len(eligible)} file(s); "
+                f"{len(pending)} still processing..."
+            ))
+            yield f"*Provisional outline from {len(early)} of {len(eligible)} file(s) — refining as the rest finish.*\n\n"
+        tree_timing: dict = {}
+        early_notes = _tree_reduce(client, model, early, user_input, timing=tree_timing)
+        timing["tree"] = tree_timing
+        timing["provisional_start_s"] = time.perf_counter() - start
+        for delta in _call_stream(client, model, REDUCE_SYSTEM_PROMPT, _reduce_content(early_notes, user_input), timing=timing["provisional"]):
+            provisional.append(delta)
+            yield delta
+            if pending:
+                _drain(0)
+
+        while pending:
+            _drain(None)
+        timing["map_wall_s"] = time.perf_counter() - start
+        status_box.update(label=_map_status_label(eligible, results), state="complete", expanded=False)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    partials, skipped, file_timings = _collect_map_results(eligible, results)
+    timing["file_timings"] = file_timings
+    early_names = {fname for fname, _ in early}
+    late = [(fname, text) for fname, text in partials if fname not in early_names]
+    if late:
+        timing["reconcile"] = {}
+        late_tree_timing: dict = {}
+        late = _tree_reduce(client, model, late, user_input, timing=late_tree_timing)
+        timing["tree"]["levels"] = max(timing["tree"]["levels"], late_tree_timing["levels"])
+        timing["tree"]["calls"] += late_tree_timing["calls"]
+        timing["tree"]["wall_s"] += late_tree_timing["wall_s"]
+        late_notes = "\n\n".join(f"--- Notes from {fname} ---\n{text}" for fname, text in late)
+        content = (
+            f"Provisional outline:\n{''.join(provisional)}\n\n"
+            f"Additional notes:\n{late_notes}\n\nOverall instructions:\n{user_input}"
+        )
+        yield f"\n\n---\n**Final outline** (all {len(partials)} file(s) with notes)\n\n"
+        yield from _call_stream(client, model, RECONCILE_SYSTEM_PROMPT, content, timing=timing["reconcile"])
+    note = _multi_pass_note(skipped, locked, topic_excluded)
+    if note:
+        yield note
+
+
+def _tree_timing_part(tree_timing: dict) -> str:
+    """"tree reduce ..; " for the DEBUG timing line, or "" if no level ran."""
+    if not tree_timing.get("levels"):
+        return ""
+    return (
+        f"tree reduce {_fmt_secs(tree_timing['wall_s'])} wall "
+        f"({tree_timing['levels']} level(s), {tree_timing['calls']} call(s)); "
+    )
 
 
 def _timing_note(label: str, timing: dict, total_s: float) -> str:
@@ -443,34 +851,54 @@ def _timing_note(label: str, timing: dict, total_s: float) -> str:
     return f"⏱ Timing: {label} {_fmt_secs(call_s)}{first_part}; total {_fmt_secs(total_s)}."
 
 
+def _file_relevance(fname: str, text: str, keywords: set) -> float:
+    """Packing weight for single pass: 1 + the number of distinct instruction
+    keywords found in the file's name, FILE_TOPIC_HINTS topic or content."""
+    haystack = f"{fname} {_FILE_TOPIC_HINTS.get(fname, '')} {text}".lower()
+    return 1.0 + len(keywords & set(re.findall(r"[a-z0-9]+", haystack)))
+
+
 def _build_combined_source_content(eligible: list, user_input: str) -> tuple:
     """Read+parse every eligible file and concatenate into ONE prompt (single pass).
 
-    Returns (content, parse_total_s, parse_skipped):
-      content: combined "File: <name>\\n<text>" sections + the user's instructions
+    With SINGLE_PASS_TOKEN_BUDGET set, the files' text is packed into that
+    many tokens first (token_budget.pack_files): more relevant files get a
+    larger share, and trimming keeps whole rows/paragraphs, preferring ones
+    that mention the instructions' keywords.
+
+    Returns (content, parse_total_s, parse_skipped, packed):
+      content: combined "File: <name>\n<text>" sections + the user's instructions
         (falls back to just the instructions if every file failed to parse).
-      parse_total_s: total time spent reading/parsing (not calling the LLM).
+      parse_total_s: wall time spent reading/parsing (not calling the LLM);
+        cache misses are parsed in parallel (parse_pool).
       parse_skipped: [(fname, reason), ...] for files that failed to parse —
         this is a local, pre-call check, so skipping them costs no LLM call
         (unlike an LLM-side block, which single pass cannot skip around).
+      packed: [token_budget.PackedFile, ...] for files that were trimmed or
+        dropped to fit the budget (empty when everything fit).
     """
-    sections, parse_skipped = [], []
-    parse_total = 0.0
-    for fname, fpath in eligible:
-        start = time.perf_counter()
-        try:
-            with open(fpath, "rb") as f:
-                file_text = parse_file_to_text(f.read(), filename=fname)
-            sections.append(f"File: {fname}\n\n{file_text}")
-        except (FileParsingError, OSError):
-            parse_skipped.append((fname, "could not read/parse file"))
-        parse_total += time.perf_counter() - start
-    combined = "\n\n".join(sections)
+    start = time.perf_counter()
+    texts = {}
+    for result in parse_files_cached(eligible):
+        texts[result.index] = result.text
+    parse_total = time.perf_counter() - start
+    parsed = [(fname, texts[i]) for i, (fname, _) in enumerate(eligible) if texts[i] is not None]
+    parse_skipped = [(fname, "could not read/parse file") for i, (fname, _) in enumerate(eligible) if texts[i] is None]
+
+    packed = []
+    if SINGLE_PASS_TOKEN_BUDGET and parsed:
+        keywords = _topic_keywords(user_input)
+        relevance = {fname: _file_relevance(fname, text, keywords) for fname, text in parsed}
+        results = pack_files(parsed, SINGLE_PASS_TOKEN_BUDGET, keywords=keywords, relevance=relevance)
+        parsed = [(r.fname, r.text) for r in results if r.text is not None]
+        packed = [r for r in results if r.text is None or r.trimmed]
+
+    combined = "\n\n".join(f"File: {fname}\n\n{file_text}" for fname, file_text in parsed)
     content = f"{combined}\n\nOverall instructions:\n{user_input}" if combined else user_input
-    return content, parse_total, parse_skipped
+    return content, parse_total, parse_skipped, packed
 
 
-def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upload_content: str = None, pebblo_groups: str = None):
+def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upload_content: str = None, pebblo_groups: str = None, use_map_cache: bool = True):
     """Shared entry point for both Safe Infer and Insecure Inference.
 
     augmented_upload_content is not None -> a file was uploaded directly:
@@ -480,6 +908,9 @@ def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upl
       one call by default (MULTI_PASS_ENABLED=false), or via the slower,
       per-file map-then-reduce pipeline if MULTI_PASS_ENABLED=true.
 
+    use_map_cache=False recomputes every per-file map result in multi-pass
+    mode instead of reusing MAP_CACHE entries.
+
     Skip/lock notes (which files were excluded and why) are always shown when
     relevant. The "⏱ Timing" breakdown is a diagnostic aid, only appended when
     DEBUG_ENABLED (env DEBUG=true) — off by default.
@@ -496,6 +927,8 @@ def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upl
 
     eligible, locked = _eligible_source_files(pebblo_groups)
     eligible, topic_excluded = _filter_by_topic_relevance(eligible, user_input)
+    eligible, ranked_out = _rank_by_relevance(eligible, user_input)
+    topic_excluded += ranked_out
     if not eligible:
         timing: dict = {}
         yield from _call_stream(client, model, DECK_SYSTEM_PROMPT, user_input, timing=timing)
@@ -514,8 +947,42 @@ def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upl
             yield "\n\n---\n" + "\n\n".join(trailer)
         return
 
+    if MULTI_PASS_ENABLED and STREAMING_REDUCE_ENABLED and len(eligible) > 1:
+        stream_timing: dict = {}
+        yield from _streaming_map_reduce(
+            client, model, eligible, user_input, locked, topic_excluded,
+            pebblo_groups=pebblo_groups, use_cache=use_map_cache, timing=stream_timing,
+        )
+
+        if DEBUG_ENABLED:
+            total_s = time.perf_counter() - pipeline_start
+            file_timings = stream_timing["file_timings"]
+            parse_total = sum(p for _, p, _ in file_timings)
+            map_call_total = sum(c for _, _, c in file_timings)
+            per_file = ", ".join(f"{fn} {_fmt_secs(c)}" for fn, _, c in file_timings)
+            provisional = stream_timing["provisional"]
+            first = provisional.get("first_token_s")
+            first_part = (
+                f" (first token at {_fmt_secs(stream_timing['provisional_start_s'] + first)})"
+                if first is not None else ""
+            )
+            reconcile = stream_timing["reconcile"]
+            reconcile_part = f"reconcile call {_fmt_secs(reconcile.get('total_s', 0.0))}; " if reconcile else ""
+            yield (
+                f"\n\n*⏱ Timing: parse {_fmt_secs(parse_total)}; "
+                f"map calls {_fmt_secs(map_call_total)} ({per_file}) in {_fmt_secs(stream_timing['map_wall_s'])} wall; "
+                f"provisional reduce from {stream_timing['provisional_files']}/{len(eligible)} file(s) "
+                f"{_fmt_secs(provisional.get('total_s', 0.0))}{first_part}; "
+                f"{_tree_timing_part(stream_timing['tree'])}{reconcile_part}total {_fmt_secs(total_s)}.*"
+            )
+        return
+
     if MULTI_PASS_ENABLED:
-        partials, skipped, file_timings = _map_source_files(client, model, eligible, user_input)
+        map_start = time.perf_counter()
+        partials, skipped, file_timings = _map_source_files(
+            client, model, eligible, user_input, pebblo_groups=pebblo_groups, use_cache=use_map_cache
+        )
+        map_wall_s = time.perf_counter() - map_start
         reduce_timing: dict = {}
         yield from _reduce_stream(client, model, partials, user_input, skipped, locked, topic_excluded, timing=reduce_timing)
 
@@ -529,14 +996,15 @@ def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upl
             reduce_first_part = f" (first token {_fmt_secs(reduce_first)})" if reduce_first is not None else ""
             yield (
                 f"\n\n*⏱ Timing: parse {_fmt_secs(parse_total)}; "
-                f"map calls {_fmt_secs(map_call_total)} ({per_file}); "
+                f"map calls {_fmt_secs(map_call_total)} ({per_file}) in {_fmt_secs(map_wall_s)} wall; "
+                f"{_tree_timing_part(reduce_timing['tree'])}"
                 f"reduce call {_fmt_secs(reduce_total)}{reduce_first_part}; "
                 f"total {_fmt_secs(total_s)}.*"
             )
         return
 
     # Single pass (default): one call with every eligible file's content combined.
-    content, parse_s, parse_skipped = _build_combined_source_content(eligible, user_input)
+    content, parse_s, parse_skipped, packed = _build_combined_source_content(eligible, user_input)
     timing = {}
     yield from _call_stream(client, model, DECK_SYSTEM_PROMPT, content, timing=timing)
 
@@ -544,6 +1012,13 @@ def run_deck_pipeline(client: OpenAI, model: str, user_input: str, augmented_upl
     if parse_skipped:
         detail = ", ".join(f"{fname} ({reason})" for fname, reason in parse_skipped)
         note_parts.append(f"{len(parse_skipped)} source file(s) could not be parsed and were excluded: {detail}")
+    trimmed = [p for p in packed if p.text is not None]
+    if trimmed:
+        detail = ", ".join(f"{p.fname} (kept {p.kept_lines} of {p.total_lines} rows/paragraphs)" for p in trimmed)
+        note_parts.append(f"{len(trimmed)} source file(s) were trimmed to fit the prompt budget: {detail}")
+    dropped = [p.fname for p in packed if p.text is None]
+    if dropped:
+        note_parts.append(f"{len(dropped)} source file(s) did not fit the prompt budget and were excluded: {', '.join(dropped)}")
     if locked:
         note_parts.append(f"{len(locked)} file(s) were not accessible to the current user: {', '.join(locked)}")
     if topic_excluded:
@@ -572,19 +1047,25 @@ def stream_deck_builder(
     api_key: str = "",
     pebblo_user: str = "",
     pebblo_user_groups: str = "",
+    use_map_cache: bool = True,
 ):
     """Safe Infer: routed through the Daxa gateway with Pebblo headers."""
     client = get_llm_client(api_key or API_KEY, pebblo_user=pebblo_user, pebblo_user_groups=pebblo_user_groups)
-    yield from run_deck_pipeline(client, model, user_input, augmented_upload_content, pebblo_groups=pebblo_user_groups or None)
+    yield from run_deck_pipeline(
+        client, model, user_input, augmented_upload_content,
+        pebblo_groups=pebblo_user_groups or None, use_map_cache=use_map_cache,
+    )
 
 
-def stream_deck_builder_direct(user_input: str, model: str, augmented_upload_content: str = None):
+def stream_deck_builder_direct(user_input: str, model: str, augmented_upload_content: str = None, use_map_cache: bool = True):
     """Insecure Inference: direct to the configured model, no Daxa gateway, no Pebblo headers.
 
     Uses the exact same run_deck_pipeline as Safe Infer — only the client differs.
     """
     client = get_direct_llm_client()
-    yield from run_deck_pipeline(client, model, user_input, augmented_upload_content, pebblo_groups=None)
+    yield from run_deck_pipeline(
+        client, model, user_input, augmented_upload_content, pebblo_groups=None, use_map_cache=use_map_cache
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -635,6 +1116,8 @@ if "model_name" not in st.session_state:
     st.session_state.model_name = ""
 if "prompt_language" not in st.session_state:
     st.session_state.prompt_language = DEFAULT_LANGUAGE
+if "use_map_cache" not in st.session_state:
+    st.session_state.use_map_cache = True
 if "selected_pebblo_user" not in st.session_state:
     st.session_state.selected_pebblo_user = PEBBLO_USERS_LIST[0] if PEBBLO_USERS_LIST else (X_PEBBLO_USER or "")
 
@@ -691,6 +1174,23 @@ def _render_prompt_language_and_samples() -> None:
         )
 
 
+def _render_map_cache_controls() -> None:
+    """Multi-pass only: toggle reuse of cached per-file notes, and clear them."""
+    if not MULTI_PASS_ENABLED or MAP_CACHE is None:
+        return
+    st.subheader("♻️ Per-file notes cache")
+    st.toggle(
+        "Reuse cached per-file notes",
+        key="use_map_cache",
+        help="Skip a file's map call when its content, your (normalized) instructions, "
+        "the model and your user groups match an earlier run. Off = recompute every file.",
+    )
+    if st.button("Clear cached notes", key="clear_map_cache"):
+        MAP_CACHE.clear()
+        st.toast("Cached per-file notes cleared.")
+    st.markdown("---")
+
+
 # ---------------------------------------------------------------------------
 # Sidebar
 # ---------------------------------------------------------------------------
@@ -769,6 +1269,7 @@ with st.sidebar:
         _render_prompt_language_and_samples()
 
         _render_docs_section(pebblo_groups=_get_active_pebblo_groups())
+        _render_map_cache_controls()
 
         st.subheader("📊 Statistics")
         st.metric("Messages", len(st.session_state.chat_history))
@@ -795,6 +1296,7 @@ with st.sidebar:
         _render_prompt_language_and_samples()
 
         _render_docs_section(pebblo_groups=None, include_reference_docs=False)
+        _render_map_cache_controls()
 
         st.subheader("📊 Statistics")
         st.metric("Messages", len(st.session_state.direct_chat_history))
@@ -834,8 +1336,8 @@ if mode == "Safe Infer":
             type=None,
             key="uploaded_file",
             help="If provided, only this file is used (the source-files folder is not "
-            "iterated). Supports .xlsx, .xlsm, .docx — other file types are sent as "
-            "instructions-only.",
+            "iterated). Supports .xlsx, .xlsm, .csv, .tsv, .docx, .pdf — other file "
+            "types are sent as instructions-only.",
             label_visibility="collapsed",
         )
     user_input = st.text_area(
@@ -877,6 +1379,7 @@ if mode == "Safe Infer":
                         api_key=st.session_state.api_key,
                         pebblo_user=active_user,
                         pebblo_user_groups=_get_active_pebblo_groups(),
+                        use_map_cache=st.session_state.use_map_cache,
                     )
                 )
             st.session_state.chat_history.append({
@@ -912,8 +1415,8 @@ elif mode == "Insecure Inference":
             type=None,
             key="direct_uploaded_file",
             help="If provided, only this file is used (the source-files folder is not "
-            "iterated). Supports .xlsx, .xlsm, .docx — other file types are sent as "
-            "instructions-only.",
+            "iterated). Supports .xlsx, .xlsm, .csv, .tsv, .docx, .pdf — other file "
+            "types are sent as instructions-only.",
             label_visibility="collapsed",
         )
     direct_user_input = st.text_area(
@@ -947,6 +1450,7 @@ elif mode == "Insecure Inference":
                         user_input=direct_user_input,
                         model=direct_model,
                         augmented_upload_content=direct_upload_content_for_pipeline,
+                        use_map_cache=st.session_state.use_map_cache,
                     )
                 )
             st.session_state.direct_chat_history.append({
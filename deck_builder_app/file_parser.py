@@ -1,24 +1,66 @@
 """Reusable file -> plain-text parsing helpers (no Streamlit dependency).
 
 Framework-agnostic on purpose: any caller (Streamlit app, CLI script, API
-endpoint) can pass raw bytes in and get an LLM-friendly text blob out.
+endpoint) can pass a file in — raw bytes, a memoryview, an open binary file
+or a path — and get an LLM-friendly text blob out. None of these is copied
+into memory first: the zip reader works directly on the caller's buffer or
+file, and paths are memory-mapped.
 
-Supports .xlsx/.xlsm (spreadsheets) and .docx (Word documents) today; use
+Supports .xlsx/.xlsm (spreadsheets), .csv/.tsv (delimited text), .docx
+(Word documents) and .pdf (needs the optional pypdf package) today; use
 parse_file_to_text() to dispatch on filename extension automatically.
+Spreadsheets are read with openpyxl or, with XLSX_ENGINE=fast, straight
+from the sheet XML (same output).
 """
+import csv
 import io
+import mmap
+import os
+import posixpath
 import zipfile
-from typing import List
+from contextlib import closing, contextmanager
+from itertools import chain, islice
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
 
-from docx import Document
-from docx.opc.exceptions import PackageNotFoundError
 from openpyxl import load_workbook
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
 from openpyxl.utils.exceptions import InvalidFileException
 
+from sheet_summary import summarize_sheet
+
 MAX_CHARS = 8000
 MAX_ROWS_PER_SHEET = 500
 
-SUPPORTED_EXTENSIONS = (".xlsx", ".xlsm", ".docx")
+# Sheets (and .csv/.tsv files) with more than XLSX_SUMMARY_ROWS rows are
+# summarized instead of dumped row by row: header row, each column's type and
+# stats, and an evenly spaced sample of XLSX_SUMMARY_SAMPLE_ROWS rows (see
+# sheet_summary). 0 = never summarize.
+XLSX_SUMMARY_ROWS = int(os.getenv("XLSX_SUMMARY_ROWS", "").strip() or 0)
+XLSX_SUMMARY_SAMPLE_ROWS = int(os.getenv("XLSX_SUMMARY_SAMPLE_ROWS", "").strip() or 20)
+
+# How .xlsx/.xlsm files are read: "openpyxl" (default) or "fast", which
+# streams the sheet XML directly and skips openpyxl's per-cell objects.
+# Both produce the same text; see parse_xlsx_to_text.
+XLSX_ENGINES = ("openpyxl", "fast")
+XLSX_ENGINE = os.getenv("XLSX_ENGINE", "").strip().lower() or "openpyxl"
+if XLSX_ENGINE not in XLSX_ENGINES:
+    XLSX_ENGINE = "openpyxl"
+
+# Bump whenever parser output changes for the same input, so cached parse
+# results (see cache_utils.parse_file_cached) from older versions are ignored.
+PARSER_VERSION = 2
+
+SUPPORTED_EXTENSIONS = (".xlsx", ".xlsm", ".csv", ".tsv", ".docx", ".pdf")
+
+TRUNCATION_MARKER = "\n...[truncated]"
+
+# What the parse_* functions accept: file contents (bytes, bytearray,
+# memoryview, mmap), a path, or a binary file object (e.g. Streamlit's
+# UploadedFile).
+FileSource = Union[bytes, bytearray, memoryview, mmap.mmap, str, "os.PathLike[str]", BinaryIO]
 
 
 class FileParsingError(Exception):
@@ -26,21 +68,394 @@ class FileParsingError(Exception):
 
 
 def is_supported_file(filename: str) -> bool:
-    """Return True if filename's extension has a parser (.xlsx, .xlsm, .docx)."""
+    """Return True if filename's extension has a parser (see SUPPORTED_EXTENSIONS)."""
     return filename.lower().endswith(SUPPORTED_EXTENSIONS)
 
 
-def parse_xlsx_to_text(file_bytes: bytes, filename: str = "", max_chars: int = MAX_CHARS) -> str:
-    """Parse .xlsx bytes into a plain-text, LLM-friendly representation.
+class _BufferReader(io.RawIOBase):
+    """Read-only, seekable file over a buffer (memoryview, bytearray, mmap).
+    Reads slice the buffer directly instead of copying all of it into a
+    BytesIO first."""
+
+    def __init__(self, buffer):
+        super().__init__()
+        view = memoryview(buffer)
+        self._view = view if view.format == "B" and view.ndim == 1 else view.cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        if base + offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = base + offset
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes() if end > self._pos else b""
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+@contextmanager
+def _open_source(source: FileSource) -> Iterator[BinaryIO]:
+    """A seekable binary file over source, without copying its contents.
+
+    bytes are wrapped in a BytesIO (which shares their buffer), other
+    buffers in a _BufferReader, and paths are memory-mapped (or read from
+    the open file if they can't be, e.g. when empty). A seekable file
+    object is used as-is, rewound to its start (it may already have been
+    read, e.g. to hash it) and left open at the position it had; only an
+    unseekable one is read into memory.
+
+    Raises:
+        OSError: source is a path that cannot be opened.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):  # empty file, or not mappable
+                yield f
+                return
+            with mapped, closing(_BufferReader(mapped)) as reader:
+                yield reader
+    elif isinstance(source, bytes):
+        yield io.BytesIO(source)
+    elif isinstance(source, (bytearray, memoryview, mmap.mmap)):
+        with closing(_BufferReader(source)) as reader:
+            yield reader
+    elif source.seekable():
+        position = source.tell()
+        source.seek(0)
+        try:
+            yield source
+        finally:
+            if not source.closed:
+                source.seek(position)
+    else:
+        yield io.BytesIO(source.read())
+
+
+def _take_chars(pieces: Iterator[str], max_chars: int) -> Optional[str]:
+    """Concatenate pieces until more than max_chars characters have been
+    produced, then stop pulling (closing the generator, so the parser behind
+    it stops reading) and cut to max_chars + TRUNCATION_MARKER.
+
+    Returns None if pieces produced nothing.
+    """
+    parts: List[str] = []
+    total = 0
+    try:
+        for piece in pieces:
+            parts.append(piece)
+            total += len(piece)
+            if total > max_chars:
+                return "".join(parts)[:max_chars] + TRUNCATION_MARKER
+    finally:
+        close = getattr(pieces, "close", None)
+        if close is not None:
+            close()
+    return "".join(parts) if parts else None
+
+
+# ---------------------------------------------------------------------------
+# Office Open XML packages (.xlsx / .docx are zip files of XML parts)
+# ---------------------------------------------------------------------------
+
+_RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+
+def _main_part(package: zipfile.ZipFile, kind: str) -> str:
+    """Zip member name of the package's main part, per _rels/.rels; raises
+    KeyError if there is none or its content type isn't kind's
+    ("wordprocessingml" for Word, "spreadsheetml" for Excel)."""
+    rels = ElementTree.fromstring(package.read("_rels/.rels"))
+    for rel in rels.iter(f"{_RELS_NS}Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL and rel.get("TargetMode") != "External":
+            part = posixpath.normpath(rel.get("Target", "").lstrip("/"))
+            break
+    else:
+        raise KeyError("no officeDocument relationship")
+    content_types = ElementTree.fromstring(package.read("[Content_Types].xml"))
+    for override in content_types.iter(f"{_CT_NS}Override"):
+        if override.get("PartName", "").lstrip("/") == part:
+            if kind not in override.get("ContentType", ""):
+                raise KeyError(f"main part {part} is not a {kind} document")
+            return part
+    raise KeyError(f"no content type for main part {part}")
+
+
+# ---------------------------------------------------------------------------
+# .xlsx
+# ---------------------------------------------------------------------------
+
+
+def _iter_sheets_text(
+    sheets: Iterator[Tuple[str, Iterator[tuple]]], summary_rows: int = 0,
+    summary_values: Optional[Callable[[tuple], tuple]] = None,
+) -> Iterator[str]:
+    """Text pieces of a workbook, in output order (see parse_xlsx_to_text).
+
+    sheets yields (sheet name, row-value tuples) per worksheet, from either
+    .xlsx engine or the .csv reader. All of them read lazily as rows are
+    requested, so nothing past the last piece pulled is read — except in a
+    summarized sheet (more than summary_rows rows, if summary_rows), which
+    is read whole. summary_values, if given, maps each row of a summarized
+    sheet before it is described (the .csv reader types numbers with it).
+    """
+    for index, (sheet_name, rows) in enumerate(sheets):
+        if index:
+            yield "\n\n"
+        yield f"Sheet: {sheet_name}"
+        row_count = 0
+        with closing(rows):
+            head = rows
+            if summary_rows:
+                head = list(islice(rows, summary_rows + 1))
+                if len(head) > summary_rows:
+                    all_rows = chain(head, rows)
+                    if summary_values is not None:
+                        all_rows = map(summary_values, all_rows)
+                    yield from summarize_sheet(all_rows, XLSX_SUMMARY_SAMPLE_ROWS)
+                    continue
+            for row in head:
+                if row_count >= MAX_ROWS_PER_SHEET:
+                    yield "\n...[remaining rows truncated]"
+                    break
+                cells = [str(c) if c is not None else "" for c in row]
+                if any(cells):  # skip fully-empty rows
+                    yield "\n" + " | ".join(cells)
+                row_count += 1
+        if row_count == 0:
+            yield "\n(empty sheet)"
+
+
+def _openpyxl_sheets(workbook) -> Iterator[Tuple[str, Iterator[tuple]]]:
+    for sheet_name in workbook.sheetnames:
+        yield sheet_name, workbook[sheet_name].iter_rows(values_only=True)
+
+
+# The "fast" engine reads the package XML itself instead of going through
+# openpyxl's reader, which builds a dict per cell and a Serialisable object
+# per shared string. It reproduces openpyxl's read_only / data_only /
+# values_only output exactly (same padding, gap rows, number, date and
+# boolean conversion), so the text is identical; only openpyxl's small
+# date-format helpers are reused.
+
+_X = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL_TYPES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+
+def _part_rels(package: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Relationship id -> (type, zip member name) for part's internal relationships."""
+    folder, name = posixpath.split(part)
+    try:
+        data = package.read(posixpath.join(folder, "_rels", name + ".rels"))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in ElementTree.fromstring(data).iter(f"{_RELS_NS}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.join(folder, target)
+        rels[rel.get("Id")] = (rel.get("Type", ""), posixpath.normpath(target))
+    return rels
+
+
+def _string_item_text(si) -> str:
+    """Plain text of a shared string / inline string (w/o phonetic runs),
+    as openpyxl's Text.content."""
+    plain = si.findall(f"{_X}t")
+    parts = [plain[-1].text] if plain and plain[-1].text is not None else []
+    for run in si.findall(f"{_X}r"):
+        t = run.find(f"{_X}t")
+        if t is not None and t.text is not None:
+            parts.append(t.text)
+    return "".join(parts)
+
+
+def _read_shared_strings(package: zipfile.ZipFile, part: Optional[str]) -> List[str]:
+    strings: List[str] = []
+    if part is None:
+        return strings
+    with package.open(part) as xml:
+        for _, elem in ElementTree.iterparse(xml):
+            if elem.tag == f"{_X}si":
+                strings.append(_string_item_text(elem).replace("x005F_", ""))
+                elem.clear()
+    return strings
+
+
+def _read_date_styles(package: zipfile.ZipFile, part: Optional[str]) -> Tuple[set, set]:
+    """(date style ids, timedelta style ids): the cellXfs indexes whose
+    number format is a date / duration format."""
+    if part is None:
+        return set(), set()
+    root = ElementTree.fromstring(package.read(part))
+    custom = {int(fmt.get("numFmtId")): fmt.get("formatCode") for fmt in root.iter(f"{_X}numFmt")}
+    dates, durations = set(), set()
+    cell_xfs = root.find(f"{_X}cellXfs")
+    for index, xf in enumerate(cell_xfs if cell_xfs is not None else ()):
+        fmt_id = int(xf.get("numFmtId", "0"))
+        fmt = custom[fmt_id] if fmt_id in custom else builtin_format_code(fmt_id)
+        if is_date_format(fmt):
+            dates.add(index)
+        if is_timedelta_format(fmt):
+            durations.add(index)
+    return dates, durations
+
+
+def _iter_sheet_rows(
+    package: zipfile.ZipFile, part: str, shared: List[str], dates: set, durations: set, epoch,
+) -> Iterator[tuple]:
+    """Row-value tuples of one worksheet part, as openpyxl's
+    ReadOnlyWorksheet.iter_rows(values_only=True): rows are padded to the
+    sheet's <dimension> width, and missing rows come back as empty rows."""
+    row_tag, value_tag, inline_tag, dimension_tag = f"{_X}row", f"{_X}v", f"{_X}is", f"{_X}dimension"
+    columns: Dict[str, int] = {}  # "AB" -> 28
+    max_col = max_row = None
+    empty_row: tuple = ()
+    counter = idx = 1
+    with package.open(part) as xml:
+        for _, elem in ElementTree.iterparse(xml):
+            if elem.tag != row_tag:
+                if elem.tag == dimension_tag and max_col is None:
+                    _, _, max_col, max_row = range_boundaries(elem.get("ref"))
+                    if max_col is not None:
+                        empty_row = (None,) * max_col
+                continue
+
+            r = elem.get("r")
+            idx = idx + 1 if r is None else int(float(r))
+            if max_row is not None and idx > max_row:
+                break
+            while counter < idx:  # missing rows
+                counter += 1
+                yield empty_row
+            if counter > idx:  # out-of-order row
+                elem.clear()
+                continue
+            counter += 1
+
+            column = 0
+            cells = []
+            for c in elem:
+                ref = c.get("r")
+                if ref:
+                    letters = ref.rstrip("0123456789")
+                    column = columns.get(letters) or columns.setdefault(letters, column_index_from_string(letters))
+                else:
+                    column += 1
+                kind = c.get("t", "n")
+                if kind == "inlineStr":
+                    inline = c.find(inline_tag)
+                    value = _string_item_text(inline) if inline is not None else None
+                else:
+                    value = c.findtext(value_tag) or None
+                    if value is None:
+                        pass
+                    elif kind == "n":
+                        value = float(value) if "." in value or "E" in value or "e" in value else int(value)
+                        if dates:
+                            style = int(c.get("s") or 0)
+                            if style in dates:
+                                try:
+                                    value = from_excel(value, epoch, timedelta=style in durations)
+                                except (OverflowError, ValueError):
+                                    value = "#VALUE!"
+                    elif kind == "s":
+                        value = shared[int(value)]
+                    elif kind == "b":
+                        value = bool(int(value))
+                    elif kind == "d":
+                        value = from_ISO8601(value)
+                cells.append((column, value))
+            elem.clear()
+
+            if not cells and not max_col:
+                yield ()
+                continue
+            width = max_col or cells[-1][0]
+            row = [None] * width
+            for column, value in cells:
+                if 0 < column <= width:
+                    row[column - 1] = value
+            yield tuple(row)
+
+    if max_row is not None and max_row < idx:
+        for _ in range(counter, max_row + 1):
+            yield empty_row
+
+
+def _fast_sheets(package: zipfile.ZipFile) -> Iterator[Tuple[str, Iterator[tuple]]]:
+    workbook_part = _main_part(package, "spreadsheetml")
+    rels = _part_rels(package, workbook_part)
+    by_type = {rel_type: target for rel_type, target in rels.values()}
+    shared = _read_shared_strings(package, by_type.get(_REL_TYPES + "sharedStrings"))
+    dates, durations = _read_date_styles(package, by_type.get(_REL_TYPES + "styles"))
+
+    root = ElementTree.fromstring(package.read(workbook_part))
+    props = root.find(f"{_X}workbookPr")
+    date1904 = props is not None and props.get("date1904", "").lower() in ("1", "true")
+    epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+    members = set(package.namelist())
+    sheets = root.find(f"{_X}sheets")
+    for sheet in sheets if sheets is not None else ():
+        rel_type, target = rels[sheet.get(f"{_R}id")]
+        if target not in members or rel_type != _REL_TYPES + "worksheet":
+            continue  # chartsheets, dialog sheets, dangling references
+        yield sheet.get("name"), _iter_sheet_rows(package, target, shared, dates, durations, epoch)
+
+
+def parse_xlsx_to_text(
+    source: FileSource, filename: str = "", max_chars: int = MAX_CHARS, engine: Optional[str] = None,
+    summary_rows: Optional[int] = None,
+) -> str:
+    """Parse an .xlsx file into a plain-text, LLM-friendly representation.
 
     One "Sheet: <name>" section per worksheet, followed by its rows (cell
-    values joined with " | "), one row per line. Result is truncated to
-    `max_chars`.
+    values joined with " | "), one row per line. A sheet of more than
+    `summary_rows` rows is described instead (see sheet_summary): header row,
+    column types and stats, and a sample of rows. Result is truncated to
+    `max_chars`; reading stops as soon as that many characters have been
+    produced, so a large workbook costs no more than the text actually kept
+    (a summarized sheet is always read in full).
 
     Args:
-        file_bytes: Raw bytes of an .xlsx/.xlsm file.
+        source: The .xlsx/.xlsm file: its bytes (or any buffer), a path, or
+            a binary file object (see _open_source; nothing is copied).
         filename: Original filename, used only to make error messages clearer.
         max_chars: Hard cap on the returned string's length.
+        engine: "openpyxl" or "fast" (reads the sheet XML directly; same
+            output, quicker, especially on sheets without a <dimension>).
+            Defaults to XLSX_ENGINE.
+        summary_rows: Summarize sheets with more rows than this; 0 = never.
+            Defaults to XLSX_SUMMARY_ROWS.
 
     Returns:
         Plain-text description of every sheet's contents (never None; an
@@ -48,48 +463,285 @@ def parse_xlsx_to_text(file_bytes: bytes, filename: str = "", max_chars: int = M
         rather than raising).
 
     Raises:
-        FileParsingError: if file_bytes is not a readable Excel workbook
+        FileParsingError: if source is not a readable Excel workbook
             (wrong format, corrupt file, etc.).
+        OSError: source is a path that cannot be opened.
     """
+    engine = engine or XLSX_ENGINE
+    summary_rows = XLSX_SUMMARY_ROWS if summary_rows is None else summary_rows
+    if engine not in XLSX_ENGINES:
+        raise ValueError(f"Unknown xlsx engine {engine!r}; expected one of {', '.join(XLSX_ENGINES)}")
+    error = f"Could not read '{filename or 'uploaded file'}' as an Excel (.xlsx) file"
+
+    with _open_source(source) as f:
+        if engine == "fast":
+            try:
+                with zipfile.ZipFile(f) as package:
+                    text = _take_chars(_iter_sheets_text(_fast_sheets(package), summary_rows), max_chars)
+            except (
+                KeyError, IndexError, OSError, TypeError, ValueError, zipfile.BadZipFile, ElementTree.ParseError,
+            ) as exc:
+                raise FileParsingError(f"{error}: {exc}") from exc
+            return text if text is not None else "(workbook has no sheets)"
+
+        try:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+        except (InvalidFileException, KeyError, OSError, zipfile.BadZipFile) as exc:
+            raise FileParsingError(f"{error}: {exc}") from exc
+
+        try:
+            text = _take_chars(_iter_sheets_text(_openpyxl_sheets(workbook), summary_rows), max_chars)
+        finally:
+            workbook.close()
+    return text if text is not None else "(workbook has no sheets)"
+
+
+# ---------------------------------------------------------------------------
+# .csv / .tsv — one "sheet", decoded and split into rows as it is read
+# ---------------------------------------------------------------------------
+
+# Bytes looked at to pick the text encoding of a .csv/.tsv file.
+_ENCODING_SNIFF_BYTES = 1 << 16
+
+
+def _text_encoding(f: BinaryIO) -> str:
+    """Text encoding of f, judged from its start: "utf-16" if it has a
+    UTF-16 BOM (Excel's "Unicode Text" export), "utf-8-sig" if it decodes
+    as UTF-8 (with or without a BOM), else "cp1252", which is what Excel's
+    plain "CSV" export writes on Windows. Leaves f's position unchanged.
+
+    Raises:
+        ValueError: the start of f contains NUL bytes, i.e. is binary
+            rather than text.
+    """
+    start = f.tell()
+    head = f.read(_ENCODING_SNIFF_BYTES)
+    f.seek(start)
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    if b"\x00" in head:
+        raise ValueError("binary content (NUL bytes), not delimited text")
     try:
-        workbook = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
-    except (InvalidFileException, KeyError, OSError, zipfile.BadZipFile) as exc:
-        raise FileParsingError(
-            f"Could not read '{filename or 'uploaded file'}' as an Excel (.xlsx) file: {exc}"
-        ) from exc
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        if exc.start < len(head) - 3:  # not just a character cut off at the end
+            return "cp1252"
+    return "utf-8-sig"
 
-    sections: List[str] = []
-    for sheet_name in workbook.sheetnames:
-        ws = workbook[sheet_name]
-        lines = [f"Sheet: {sheet_name}"]
-        row_count = 0
-        for row in ws.iter_rows(values_only=True):
-            if row_count >= MAX_ROWS_PER_SHEET:
-                lines.append("...[remaining rows truncated]")
-                break
-            cells = [str(c) if c is not None else "" for c in row]
-            if any(cells):  # skip fully-empty rows
-                lines.append(" | ".join(cells))
-            row_count += 1
-        if row_count == 0:
-            lines.append("(empty sheet)")
-        sections.append("\n".join(lines))
 
-    text = "\n\n".join(sections) if sections else "(workbook has no sheets)"
-    if len(text) > max_chars:
-        text = text[:max_chars] + "\n...[truncated]"
+_NUMBER_START = frozenset("+-.0123456789")
+
+
+def _csv_value(cell: str):
+    """cell as an int or float if it is a plain number, else cell itself.
+    Codes written with leading zeros ("007", "02134") stay text."""
+    if not cell or cell[0] not in _NUMBER_START or (cell[0] == "0" and cell[1:2] not in ("", ".")):
+        return cell
+    try:
+        return int(cell)
+    except ValueError:
+        pass
+    try:
+        return float(cell)
+    except ValueError:
+        return cell
+
+
+def _csv_typed_row(row: tuple) -> tuple:
+    return tuple(map(_csv_value, row))
+
+
+def _csv_rows(f: BinaryIO, delimiter: str) -> Iterator[tuple]:
+    """Row tuples of the delimited text in f (cells as str, "" when empty).
+
+    f is decoded a buffer-sized chunk at a time and each row is split off
+    only when requested, so stopping early leaves the rest of f unread. f
+    itself is left open.
+    """
+    text = io.TextIOWrapper(f, encoding=_text_encoding(f), errors="replace", newline="")
+    try:
+        yield from map(tuple, csv.reader(text, delimiter=delimiter))
+    finally:
+        text.detach()
+
+
+def parse_csv_to_text(
+    source: FileSource, filename: str = "", max_chars: int = MAX_CHARS, delimiter: Optional[str] = None,
+    summary_rows: Optional[int] = None,
+) -> str:
+    """Parse a .csv/.tsv file into the same text as a one-sheet workbook.
+
+    A "Sheet: <filename>" line, then the rows (cells joined with " | "),
+    one per line, capped at MAX_ROWS_PER_SHEET rows; a file of more than
+    `summary_rows` rows is summarized instead (see parse_xlsx_to_text).
+    Result is truncated to `max_chars`, and reading stops as soon as that
+    many characters have been produced, so the first rows of a
+    multi-hundred-MB export cost no more than a small file (a summarized
+    file is always read in full). Rows are sent as the text they are in the
+    file; only the summary reads numeric cells as numbers, for their range.
+
+    Args:
+        source: The .csv/.tsv file: its bytes (or any buffer), a path, or a
+            binary file object (see _open_source; nothing is copied).
+        filename: Original filename; names the sheet and picks the default
+            delimiter.
+        max_chars: Hard cap on the returned string's length.
+        delimiter: Cell separator. Defaults to a tab for .tsv files and a
+            comma otherwise.
+        summary_rows: Summarize files with more rows than this; 0 = never.
+            Defaults to XLSX_SUMMARY_ROWS.
+
+    Returns:
+        Plain-text description of the file's rows (never None; an empty
+        file returns descriptive placeholder text rather than raising).
+
+    Raises:
+        FileParsingError: if source is not readable delimited text (a
+            binary file, i.e. NUL bytes in its first 64 KB, or a field
+            larger than csv.field_size_limit()).
+        OSError: source is a path that cannot be opened.
+    """
+    delimiter = delimiter or ("\t" if filename.lower().endswith(".tsv") else ",")
+    summary_rows = XLSX_SUMMARY_ROWS if summary_rows is None else summary_rows
+    with _open_source(source) as f:
+        try:
+            sheets = [(filename or "data", _csv_rows(f, delimiter))]
+            text = _take_chars(_iter_sheets_text(sheets, summary_rows, _csv_typed_row), max_chars)
+        except (csv.Error, OSError, ValueError) as exc:
+            kind = "TSV" if delimiter == "\t" else "CSV"
+            raise FileParsingError(f"Could not read '{filename or 'uploaded file'}' as a {kind} file: {exc}") from exc
     return text
 
 
-def parse_docx_to_text(file_bytes: bytes, filename: str = "", max_chars: int = MAX_CHARS) -> str:
-    """Parse .docx bytes into a plain-text, LLM-friendly representation.
+# ---------------------------------------------------------------------------
+# .docx — streamed straight from the package's main document XML
+# ---------------------------------------------------------------------------
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Run children with a text equivalent, as python-docx maps them
+# (w:br is handled separately: only text-wrapping breaks are newlines).
+_RUN_TEXT = {f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-", f"{_W}ptab": "\t", f"{_W}tab": "\t"}
+
+
+def _run_text(run) -> str:
+    parts = []
+    for child in run:
+        if child.tag == f"{_W}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{_W}br":
+            parts.append("\n" if child.get(f"{_W}type", "textWrapping") == "textWrapping" else "")
+        else:
+            parts.append(_RUN_TEXT.get(child.tag, ""))
+    return "".join(parts)
+
 
-    Paragraph text is emitted in order; table rows are joined with " | ",
-    one row per line, interleaved where they appear in the document. Result
-    is truncated to `max_chars`.
+def _paragraph_text(p) -> str:
+    """Text of a w:p: its direct runs and hyperlinked runs, as python-docx's
+    Paragraph.text (content nested in w:ins, w:smartTag etc. is not included)."""
+    parts = []
+    for child in p:
+        if child.tag == f"{_W}r":
+            parts.append(_run_text(child))
+        elif child.tag == f"{_W}hyperlink":
+            parts.extend(_run_text(r) for r in child.findall(f"{_W}r"))
+    return "".join(parts)
+
+
+def _cell_props(tc) -> Tuple[int, Optional[str]]:
+    """(gridSpan, vMerge value) of a w:tc; vMerge is None if not merged
+    vertically, and defaults to "continue" when present without a value."""
+    span, vmerge = 1, None
+    tc_pr = tc.find(f"{_W}tcPr")
+    if tc_pr is not None:
+        grid_span = tc_pr.find(f"{_W}gridSpan")
+        if grid_span is not None:
+            span = int(grid_span.get(f"{_W}val", "1"))
+        v_merge = tc_pr.find(f"{_W}vMerge")
+        if v_merge is not None:
+            vmerge = v_merge.get(f"{_W}val", "continue")
+    return span, vmerge
+
+
+def _row_cells(tr, above: Dict[int, Tuple[str, int]]) -> Tuple[List[str], Dict[int, Tuple[str, int]]]:
+    """Cell texts of a w:tr in layout-grid order, matching python-docx's
+    _Row.cells: a horizontally merged cell is repeated once per grid column
+    it spans, and a vertically merged continuation cell repeats the text of
+    the cell it continues (looked up in above, the previous row's
+    grid offset -> (text, span) map, instead of re-reading that cell).
+
+    Returns (cells, this row's grid offset -> (text, span) map).
+    """
+    offset = 0
+    tr_pr = tr.find(f"{_W}trPr")
+    if tr_pr is not None:
+        grid_before = tr_pr.find(f"{_W}gridBefore")
+        if grid_before is not None:
+            offset = int(grid_before.get(f"{_W}val", "0"))
+    cells: List[str] = []
+    resolved: Dict[int, Tuple[str, int]] = {}
+    for tc in tr.findall(f"{_W}tc"):
+        span, vmerge = _cell_props(tc)
+        if vmerge == "continue":
+            text, root_span = above.get(offset, ("", span))
+        else:
+            text = "\n".join(_paragraph_text(p) for p in tc.findall(f"{_W}p")).strip()
+            root_span = span
+        cells.extend([text] * root_span)
+        resolved[offset] = (text, root_span)
+        offset += span
+    return cells, resolved
+
+
+def _iter_docx_body(package: zipfile.ZipFile, part: str) -> Iterator[str]:
+    """Stream the body of the main document part in one forward pass,
+    yielding the text of each top-level paragraph and each top-level table
+    row in document order.
+
+    Each finished paragraph or row is dropped from the tree as soon as it has
+    been handled, so memory stays flat however long the document is.
+    """
+    body, p, tbl, tr = f"{_W}body", f"{_W}p", f"{_W}tbl", f"{_W}tr"
+    stack = []  # open elements: w:document, w:body, ...
+    above: Dict[int, Tuple[str, int]] = {}  # previous row of the current table
+    with package.open(part) as xml:
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if len(stack) == 2 and stack[1].tag == body:  # top-level block
+                if elem.tag == p:
+                    text = _paragraph_text(elem).strip()
+                    if text:
+                        yield text
+                above = {}
+                stack[1].remove(elem)
+            elif len(stack) == 3 and stack[1].tag == body and stack[2].tag == tbl and elem.tag == tr:
+                cells, above = _row_cells(elem, above)
+                if any(cells):
+                    yield " | ".join(cells)
+                stack[2].remove(elem)
+
+
+def _iter_docx_text(package: zipfile.ZipFile, part: str) -> Iterator[str]:
+    """Text pieces of a .docx, in output order (see parse_docx_to_text)."""
+    for index, line in enumerate(_iter_docx_body(package, part)):
+        yield "\n" + line if index else line
+
+
+def parse_docx_to_text(source: FileSource, filename: str = "", max_chars: int = MAX_CHARS) -> str:
+    """Parse a .docx file into a plain-text, LLM-friendly representation.
+
+    Top-level paragraphs and top-level table rows (cells joined with " | ")
+    are emitted one per line, in document order, so a table stays next to
+    the text that introduces it. The document XML is streamed in a single
+    pass rather than loaded whole, and reading stops as soon as `max_chars`
+    characters have been produced; the result is truncated to `max_chars`.
 
     Args:
-        file_bytes: Raw bytes of a .docx file.
+        source: The .docx file: its bytes (or any buffer), a path, or a
+            binary file object (see _open_source; nothing is copied).
         filename: Original filename, used only to make error messages clearer.
         max_chars: Hard cap on the returned string's length.
 
@@ -99,43 +751,99 @@ def parse_docx_to_text(file_bytes: bytes, filename: str = "", max_chars: int = M
         raising).
 
     Raises:
-        FileParsingError: if file_bytes is not a readable Word document
+        FileParsingError: if source is not a readable Word document
             (wrong format, corrupt file, etc.).
+        OSError: source is a path that cannot be opened.
     """
+    with _open_source(source) as f:
+        try:
+            with zipfile.ZipFile(f) as package:
+                text = _take_chars(_iter_docx_text(package, _main_part(package, "wordprocessingml")), max_chars)
+        except (KeyError, OSError, ValueError, zipfile.BadZipFile, ElementTree.ParseError) as exc:
+            raise FileParsingError(
+                f"Could not read '{filename or 'uploaded file'}' as a Word (.docx) file: {exc}"
+            ) from exc
+    return text if text is not None else "(empty document)"
+
+
+# ---------------------------------------------------------------------------
+# .pdf — text layer extracted page by page with pypdf (optional dependency)
+# ---------------------------------------------------------------------------
+
+
+def _iter_pdf_text(reader) -> Iterator[str]:
+    """Text pieces of a PDF, in output order (see parse_pdf_to_text). Each
+    page's content stream is only decoded when its piece is requested."""
+    separator = ""
+    for number, page in enumerate(reader.pages, 1):
+        text = (page.extract_text() or "").strip()
+        if text:
+            yield f"{separator}[Page {number}]\n{text}"
+            separator = "\n\n"
+
+
+def parse_pdf_to_text(source: FileSource, filename: str = "", max_chars: int = MAX_CHARS) -> str:
+    """Parse a .pdf file into a plain-text, LLM-friendly representation.
+
+    A "[Page N]" line, then the page's text, per page that has any (pages
+    that are only images have none; there is no OCR). Pages are extracted
+    one at a time, in order, and extraction stops as soon as `max_chars`
+    characters have been produced; the result is truncated to `max_chars`.
+    Needs the optional pypdf package.
+
+    Args:
+        source: The .pdf file: its bytes (or any buffer), a path, or a
+            binary file object (see _open_source; nothing is copied).
+        filename: Original filename, used only to make error messages clearer.
+        max_chars: Hard cap on the returned string's length.
+
+    Returns:
+        Plain-text description of the document's contents (never None; a
+        PDF without a text layer returns descriptive placeholder text
+        rather than raising).
+
+    Raises:
+        FileParsingError: if pypdf is not installed, or source is not a
+            readable PDF (wrong format, corrupt, password-protected, etc.).
+        OSError: source is a path that cannot be opened.
+    """
+    error = f"Could not read '{filename or 'uploaded file'}' as a PDF"
     try:
-        document = Document(io.BytesIO(file_bytes))
-    except (PackageNotFoundError, KeyError, OSError, zipfile.BadZipFile) as exc:
-        raise FileParsingError(
-            f"Could not read '{filename or 'uploaded file'}' as a Word (.docx) file: {exc}"
-        ) from exc
-
-    lines: List[str] = []
-    for para in document.paragraphs:
-        if para.text.strip():
-            lines.append(para.text.strip())
-    for table in document.tables:
-        for row in table.rows:
-            cells = [cell.text.strip() for cell in row.cells]
-            if any(cells):
-                lines.append(" | ".join(cells))
-
-    text = "\n".join(lines) if lines else "(empty document)"
-    if len(text) > max_chars:
-        text = text[:max_chars] + "\n...[truncated]"
-    return text
+        from pypdf import PdfReader
+        from pypdf.errors import FileNotDecryptedError, PyPdfError
+    except ImportError as exc:
+        raise FileParsingError(f"{error}: PDF support needs the pypdf package (pip install pypdf)") from exc
 
+    with _open_source(source) as f:
+        try:
+            text = _take_chars(_iter_pdf_text(PdfReader(f)), max_chars)
+        except FileNotDecryptedError as exc:
+            raise FileParsingError(f"{error}: it is password-protected") from exc
+        except (PyPdfError, IndexError, KeyError, OSError, TypeError, ValueError) as exc:
+            raise FileParsingError(f"{error}: {exc}") from exc
+    return text if text is not None else "(no extractable text; the PDF may be scanned images)"
 
-def parse_file_to_text(file_bytes: bytes, filename: str, max_chars: int = MAX_CHARS) -> str:
+
+def parse_file_to_text(source: FileSource, filename: str, max_chars: int = MAX_CHARS) -> str:
     """Dispatch to the right parser based on filename's extension.
 
+    source is the file's bytes (or a memoryview / other buffer), its path,
+    or a binary file object such as a Streamlit UploadedFile; none of them
+    is copied before parsing.
+
     Raises:
         FileParsingError: unsupported extension, or the file fails to parse.
+        OSError: source is a path that cannot be opened.
     """
     lower = filename.lower()
     if lower.endswith((".xlsx", ".xlsm")):
-        return parse_xlsx_to_text(file_bytes, filename=filename, max_chars=max_chars)
+        return parse_xlsx_to_text(source, filename=filename, max_chars=max_chars)
+    if lower.endswith((".csv", ".tsv")):
+        return parse_csv_to_text(source, filename=filename, max_chars=max_chars)
     if lower.endswith(".docx"):
-        return parse_docx_to_text(file_bytes, filename=filename, max_chars=max_chars)
+        return parse_docx_to_text(source, filename=filename, max_chars=max_chars)
+    if lower.endswith(".pdf"):
+        return parse_pdf_to_text(source, filename=filename, max_chars=max_chars)
     raise FileParsingError(
         f"Unsupported file type for '{filename or 'uploaded file'}'. "
         f"Supported: {', '.join(SUPPORTED_EXTENSIONS)}."
@@ -0,0 +1,161 @@
+"""Parallel file parsing on a warm process pool (no Streamlit dependency).
+
+parse_file_to_text() is CPU-bound (openpyxl / document XML walking / PDF
+text extraction), so threads only ever use one core for it. parse_many()
+fans a list of jobs out over a process-wide ProcessPoolExecutor and yields
+results as they complete; parse_path() runs a single parse there, for
+callers already on worker threads (e.g. the multi-pass map calls).
+
+The pool uses the "spawn" start method (forking a process that is running
+Streamlit's threads is unsafe) and is warmed on creation: every worker
+imports the parsers up front, so the first real job doesn't pay for it.
+PARSE_WORKERS=1 (or a pool that can't be started) parses in-process instead.
+"""
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from file_parser import MAX_CHARS, FileParsingError, parse_file_to_text
+
+log = logging.getLogger(__name__)
+
+PARSE_WORKERS = max(1, int(os.getenv("PARSE_WORKERS", "").strip() or min(os.cpu_count() or 1, 8)))
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_FAILED = False
+_POOL_LOCK = threading.Lock()
+
+
+class ParseResult(NamedTuple):
+    """Outcome of one parse_many() job. Exactly one of text / error is set;
+    error is the exception the parse raised (normally a FileParsingError or
+    OSError, but any exception from a malformed file ends up here)."""
+
+    index: int
+    filename: str
+    text: Optional[str]
+    error: Optional[Exception]
+
+
+def _warm_worker() -> None:
+    """Pool initializer: import the parser stack once per worker process."""
+    importlib.import_module("openpyxl")
+
+    try:
+        importlib.import_module("pypdf")
+    except ImportError:  # optional; .pdf files then fail with a FileParsingError
+        pass
+
+
+def _parse_job(source: Union[bytes, str], filename: str, max_chars: int) -> str:
+    """Worker-side parse. A str source is a path, opened (memory-mapped) in
+    the worker so the file's bytes are neither read whole nor pickled across."""
+    return parse_file_to_text(source, filename=filename, max_chars=max_chars)
+
+
+def _noop() -> None:
+    return None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared, pre-warmed pool; None if PARSE_WORKERS is 1 or the pool
+    can't be started (then callers parse in-process)."""
+    global _POOL, _POOL_FAILED
+    if PARSE_WORKERS <= 1:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None and not _POOL_FAILED:
+            try:
+                pool = ProcessPoolExecutor(
+                    max_workers=PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+                # start every worker now rather than on the first real job
+                wait([pool.submit(_noop) for _ in range(PARSE_WORKERS)])
+                _POOL = pool
+                log.info("[parse] process pool started with %d workers", PARSE_WORKERS)
+            except (OSError, RuntimeError, NotImplementedError) as exc:
+                _POOL_FAILED = True
+                log.warning("[parse] process pool unavailable (%s); parsing in-process", exc)
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor, exc: BaseException) -> None:
+    """Forget a broken pool (e.g. a worker was killed), so the next
+    get_parse_pool() starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+            log.warning("[parse] process pool broke (%s); parsing in-process, restarting it on next use", exc)
+    pool.shutdown(wait=False)
+
+
+def _submit(pool: Optional[ProcessPoolExecutor], source, filename: str, max_chars: int) -> Future:
+    if pool is not None:
+        try:
+            return pool.submit(_parse_job, source, filename, max_chars)
+        except RuntimeError as exc:  # pool shut down / broken
+            if isinstance(exc, BrokenProcessPool):
+                _discard_pool(pool, exc)
+            else:
+                log.warning("[parse] process pool failed (%s); parsing in-process", exc)
+    future: Future = Future()
+    try:
+        future.set_result(_parse_job(source, filename, max_chars))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def _rerun_if_broken(
+    future: Future, pool: Optional[ProcessPoolExecutor], source, filename: str, max_chars: int,
+) -> Future:
+    """future, or — if it was lost to a broken pool rather than failed by the
+    parse itself — the same job re-run in-process. Waits for future."""
+    if pool is not None and isinstance(future.exception(), BrokenProcessPool):
+        _discard_pool(pool, future.exception())
+        return _submit(None, source, filename, max_chars)
+    return future
+
+
+def parse_path(path: str, filename: str, max_chars: int = MAX_CHARS) -> str:
+    """parse_file_to_text() for the file at path, run on the pool.
+
+    Raises:
+        FileParsingError: unsupported extension, or the file fails to parse.
+        OSError: the file cannot be read.
+    """
+    pool = get_parse_pool()
+    future = _submit(pool, path, filename, max_chars)
+    return _rerun_if_broken(future, pool, path, filename, max_chars).result()
+
+
+def parse_many(
+    jobs: Iterable[Tuple[Union[bytes, str], str]], max_chars: int = MAX_CHARS,
+) -> Iterator[ParseResult]:
+    """Parse [(bytes or path, filename), ...] in parallel, yielding a
+    ParseResult per job in completion order (result.index is the job's
+    position in jobs). Parse failures of any kind are returned, not raised,
+    so one bad file never fails the batch; jobs lost to a broken pool are
+    re-parsed in-process."""
+    pool = get_parse_pool()
+    futures = {
+        _submit(pool, source, filename, max_chars): (i, source, filename) for i, (source, filename) in enumerate(jobs)
+    }
+    for future in as_completed(futures):
+        index, source, filename = futures[future]
+        future = _rerun_if_broken(future, pool, source, filename, max_chars)
+        exc = future.exception()
+        if exc is None:
+            yield ParseResult(index, filename, future.result(), None)
+            continue
+        if not isinstance(exc, (FileParsingError, OSError)):
+            log.warning("[parse] %s: unexpected %s while parsing: %s", filename, type(exc).__name__, exc)
+        yield ParseResult(index, filename, None, exc)
@@ -0,0 +1,152 @@
+"""In-process BM25 index over parsed source files (no Streamlit dependency).
+
+Ranks DECK_SOURCE_DIR files against a prompt so the deck builder can send
+only the most relevant ones. Documents are the parse_file_cached() text plus
+the filename; each is keyed by path and re-indexed only when its content
+hash changes, so keeping the index in sync with the folder costs a stat per
+unchanged file (see cache_utils.file_digest).
+"""
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache_utils import file_digest, parse_file_cached
+from file_parser import FileParsingError
+
+log = logging.getLogger(__name__)
+
+# Standard BM25 parameters: term-frequency saturation and length normalization.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "for", "and", "or", "is", "are", "was", "were",
+    "be", "on", "in", "at", "by", "with", "from", "as", "it", "this", "that",
+    "about", "any", "all", "me", "my", "our", "we", "you", "i", "please",
+    "make", "create", "build", "generate", "give", "deck", "slide", "slides",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms, minus stopwords and single characters."""
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Path -> document index, updated incrementally and safe to share
+    between threads (Streamlit sessions, background pre-parsing)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Tuple[str, Counter, int]] = {}  # path -> (digest, term counts, length)
+        self._df: Counter = Counter()  # term -> number of documents containing it
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove_locked(self, path: str) -> None:
+        entry = self._docs.pop(path, None)
+        if entry is None:
+            return
+        _, terms, length = entry
+        for term in terms:
+            self._df[term] -= 1
+            if not self._df[term]:
+                del self._df[term]
+        self._total_len -= length
+
+    def update(self, path: str, fname: str) -> bool:
+        """(Re-)index the file at path if its content changed since it was
+        last indexed. A file that can't be read or parsed is indexed by its
+        name only. Returns True if the index changed."""
+        try:
+            digest = file_digest(path)
+        except OSError:
+            self.remove(path)
+            return True
+        with self._lock:
+            entry = self._docs.get(path)
+            if entry is not None and entry[0] == digest:
+                return False
+        try:
+            text = parse_file_cached(path, fname)
+        except (FileParsingError, OSError) as exc:
+            log.info("[index] indexing %s by name only: %s", fname, exc)
+            text = ""
+        # the filename is a strong signal (see _FILENAME_HINT), so count it twice
+        terms = Counter(tokenize(f"{fname} {fname} {text}"))
+        length = sum(terms.values())
+        with self._lock:
+            self._remove_locked(path)
+            self._docs[path] = (digest, terms, length)
+            self._df.update(terms.keys())
+            self._total_len += length
+        return True
+
+    def remove(self, path: str) -> None:
+        with self._lock:
+            self._remove_locked(path)
+
+    def retain(self, paths: Iterable[str]) -> None:
+        """Forget documents whose path is not in paths (e.g. deleted files)."""
+        wanted = set(paths)
+        with self._lock:
+            for path in [p for p in self._docs if p not in wanted]:
+                self._remove_locked(path)
+
+    def sync(self, files: Iterable[Tuple[str, str]]) -> None:
+        """Make the index cover exactly files ([(fname, path), ...]):
+        index new or changed files and forget ones no longer listed."""
+        files = list(files)
+        self.retain(path for _, path in files)
+        for fname, path in files:
+            self.update(path, fname)
+
+    def scores(self, query: str, paths: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """BM25 score of every indexed document (or just paths) for query.
+        Documents not in the index score 0.
+
+        With paths, the corpus statistics (document count, document
+        frequencies, average length) are taken over those documents only,
+        so indexed files outside paths — e.g. ones the user can't access —
+        don't influence the ranking.
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            if paths is None:
+                targets = list(self._docs)
+                n_docs = len(self._docs)
+                total_len = self._total_len
+                df_of = self._df
+            else:
+                targets = list(paths)
+                corpus = [self._docs[path] for path in set(targets) if path in self._docs]
+                n_docs = len(corpus)
+                total_len = sum(length for _, _, length in corpus)
+                df_of = Counter(term for _, terms, _ in corpus for term in query_terms if term in terms)
+            avg_len = (total_len / n_docs) if n_docs else 0.0
+            result: Dict[str, float] = {}
+            for path in targets:
+                entry = self._docs.get(path)
+                if entry is None or not avg_len:
+                    result[path] = 0.0
+                    continue
+                _, terms, length = entry
+                score = 0.0
+                for term in query_terms:
+                    tf = terms.get(term, 0)
+                    if not tf:
+                        continue
+                    df = df_of.get(term, 0)
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+                result[path] = score
+        return result
+
+
+# Shared by every Streamlit session in the process.
+SOURCE_INDEX = BM25Index()
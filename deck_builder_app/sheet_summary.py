@@ -0,0 +1,225 @@
+"""Schema summaries of large spreadsheet sheets (no Streamlit dependency).
+
+file_parser normally dumps a sheet row by row, which for a sheet of tens of
+thousands of rows means the first few hundred near-identical rows and
+nothing about the rest. summarize_sheet() reads every row once instead and
+describes the whole sheet: its header row, each column's inferred type and
+stats (values, distinct count, min/max, most common values), and a sample
+of rows spread evenly across the sheet.
+
+Rows are processed in batches and transposed (zip(*batch)), so the
+per-value work happens column by column inside builtins (min, max,
+Counter.update) rather than in a Python loop per cell.
+"""
+import datetime
+import random
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+BATCH_ROWS = 2048
+# Distinct values tracked per column. Past this, new values are no longer
+# counted: the distinct count is reported as "N+", and top values come from
+# the values already tracked.
+MAX_DISTINCT = 10000
+TOP_VALUES = 3
+
+
+def _kind(value_type: type) -> str:
+    if issubclass(value_type, bool):
+        return "bool"
+    if issubclass(value_type, (int, float)):
+        return "number"
+    if issubclass(value_type, (datetime.date, datetime.time, datetime.timedelta)):
+        return "date"
+    return "text"
+
+
+def _group(value_type: type) -> str:
+    """Name of the set of mutually comparable types value_type belongs to:
+    ints and floats together, each date/time type on its own."""
+    kind = _kind(value_type)
+    return value_type.__name__ if kind == "date" else kind
+
+
+def _is_blank(row: tuple) -> bool:
+    return row.count(None) + row.count("") == len(row)
+
+
+class _ColumnStats:
+    """Running stats of one column, updated a batch of values at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.types: Counter = Counter()
+        self.values: Counter = Counter()
+        self.saturated = False  # MAX_DISTINCT reached
+        self.bounds: Dict[str, list] = {}  # comparable group -> [min, max]
+
+    def update(self, column: tuple) -> None:
+        values = column if not (column.count(None) or column.count("")) else [
+            v for v in column if v is not None and v != ""
+        ]
+        if not values:
+            return
+        self.count += len(values)
+        types = Counter(map(type, values))
+        self.types.update(types)
+        if not self.saturated:
+            self.values.update(values)
+            self.saturated = len(self.values) >= MAX_DISTINCT
+        else:
+            self.values.update(v for v in values if v in self.values)
+
+        # min/max per comparable group (see _group); text has no useful range
+        group_names = {_group(t) for t in types}
+        if len(group_names) == 1:
+            groups = {group_names.pop(): values}
+        else:
+            groups: Dict[str, list] = {}
+            for v in values:
+                groups.setdefault(_group(type(v)), []).append(v)
+        for group, members in groups.items():
+            if group in ("text", "bool"):
+                continue
+            lo, hi = min(members), max(members)
+            bound = self.bounds.get(group)
+            if bound is None:
+                self.bounds[group] = [lo, hi]
+            else:
+                bound[0], bound[1] = min(bound[0], lo), max(bound[1], hi)
+
+    def kind(self) -> str:
+        """Inferred type: a single kind, or "mixed (...)" with each kind's share."""
+        kinds: Counter = Counter()
+        for value_type, n in self.types.items():
+            kinds[_kind(value_type)] += n
+        if len(kinds) == 1:
+            return next(iter(kinds))
+        shares = ", ".join(
+            f"{kind} {kinds[kind] * 100 // self.count}%" for kind in sorted(kinds, key=lambda k: -kinds[k])
+        )
+        return f"mixed ({shares})"
+
+    def describe(self, rows: int) -> str:
+        """One-line description: kind; values (empty); distinct; min/max; top values."""
+        values = f"{self.count:,} values"
+        if self.count < rows:
+            values += f" ({rows - self.count:,} empty)"
+        parts = [self.kind(), values, f"{len(self.values):,}{'+' if self.saturated else ''} distinct"]
+        for group in sorted(self.bounds, key=lambda g: (g != "number", g)):
+            lo, hi = self.bounds[group]
+            parts.append(f"min {lo}, max {hi}" if lo != hi else f"always {lo}")
+        # only values that make up a noticeable share of the column
+        top = [(v, n) for v, n in self.values.most_common(TOP_VALUES) if n > max(1, self.count // 100)]
+        if top:
+            parts.append("top " + ", ".join(f"{v} ({n:,})" for v, n in top))
+        return "; ".join(parts)
+
+
+class _Sampler:
+    """A stratified sample of a row stream of unknown length.
+
+    The rows seen so far are split into consecutive strata of equal size,
+    each holding one row picked at random from it (reservoir sampling).
+    Once there are 2k full strata, neighbours are merged pairwise and the
+    stratum size doubles. At the end k of the strata are taken evenly, so
+    the sample spreads across the whole sheet without aliasing on periodic
+    data. Seeded, so the same sheet always gives the same sample.
+    """
+
+    def __init__(self, k: int, seed: int = 0):
+        self.k = k
+        self.size = 1  # rows per stratum
+        self.strata: List[list] = []  # [rows seen, picked row]
+        self._random = random.Random(seed)
+
+    def _keep_second(self, first: int, second: int) -> bool:
+        """True with probability second / (first + second)."""
+        return self._random.random() * (first + second) < second
+
+    def add(self, batch: List[tuple]) -> None:
+        pos = 0
+        while pos < len(batch):
+            if not self.strata or self.strata[-1][0] == self.size:
+                if len(self.strata) >= 2 * self.k:
+                    self.strata = [
+                        [a[0] + b[0], b[1] if self._keep_second(a[0], b[0]) else a[1]]
+                        for a, b in zip(self.strata[::2], self.strata[1::2])
+                    ]
+                    self.size *= 2
+                if not self.strata or self.strata[-1][0] == self.size:
+                    self.strata.append([0, None])
+            stratum = self.strata[-1]
+            take = min(self.size - stratum[0], len(batch) - pos)
+            if self._keep_second(stratum[0], take):
+                stratum[1] = batch[pos + self._random.randrange(take)]
+            stratum[0] += take
+            pos += take
+
+    def sample(self) -> List[tuple]:
+        rows = [row for _, row in self.strata]
+        if len(rows) <= self.k:
+            return rows
+        return [rows[i * len(rows) // self.k] for i in range(self.k)]
+
+
+def _cell_text(value) -> str:
+    return str(value) if value is not None else ""
+
+
+def summarize_sheet(rows: Iterable[tuple], sample_rows: int) -> Iterator[str]:
+    """Text pieces summarizing one sheet's rows (as openpyxl's
+    iter_rows(values_only=True) yields them), each starting with "\\n":
+
+    the header row (the first non-blank row, cells joined with " | "), a
+    "(summary: ...)" line with the data row and column counts, one
+    "- <column>: ..." line per non-empty column, and finally up to
+    sample_rows data rows, evenly spaced across the sheet.
+
+    Reads every row; blank rows are skipped.
+    """
+    rows = iter(rows)
+    header: Optional[tuple] = next((row for row in rows if not _is_blank(row)), None)
+    if header is None:
+        return
+
+    width = len(header)
+    columns = [_ColumnStats() for _ in range(width)]
+    sampler = _Sampler(sample_rows)
+    data_rows = 0
+    while True:
+        chunk = list(islice(rows, BATCH_ROWS))
+        if not chunk:
+            break
+        batch = [row for row in chunk if not _is_blank(row)]
+        if not batch:
+            continue
+        widest = max(map(len, batch))
+        if widest > width:
+            columns.extend(_ColumnStats() for _ in range(widest - width))
+            width = widest
+        if any(len(row) < width for row in batch):
+            batch = [row + (None,) * (width - len(row)) for row in batch]
+        for stats, column in zip(columns, zip(*batch)):
+            stats.update(column)
+        sampler.add(batch)
+        data_rows += len(batch)
+
+    names = [_cell_text(header[i]) if i < len(header) else "" for i in range(width)]
+    yield "\n" + " | ".join(names)
+    described = [(i, name, stats) for i, (name, stats) in enumerate(zip(names, columns)) if stats.count or name]
+    empty = width - len(described)
+    yield (
+        f"\n(summary: {data_rows:,} data rows, {len(described)} columns"
+        + (f", {empty} empty columns omitted" if empty else "")
+        + ")"
+    )
+    for index, name, stats in described:
+        yield f"\n- {name or f'column {index + 1}'}: " + (stats.describe(data_rows) if stats.count else "empty")
+    sample = sampler.sample()
+    if sample:
+        spread = ", evenly spaced" if len(sample) < data_rows else ""
+        yield f"\n(sample of {len(sample)} rows{spread}:)"
+        for row in sample:
+            yield "\n" + " | ".join(_cell_text(c) for c in row)
@@ -0,0 +1,166 @@
+"""Polling directory watcher with an in-memory file manifest (no Streamlit dependency).
+
+Streamlit reruns the page script on every interaction; listing and
+stat-ing the document folders each time is wasted work. A DirectoryWatcher
+keeps a manifest of a folder's files (size, mtime, content hash, whether
+the parsed text is ready) that the app reads instead, refreshed by a
+daemon thread every interval_s seconds.
+
+With preparse=True (DECK_SOURCE_DIR), new or changed supported files are
+parsed in the background as soon as they're seen — warming the parse cache
+(cache_utils) and the relevance index (search_index) before anyone asks
+about them.
+"""
+import logging
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from cache_utils import file_digest, parse_file_cached
+from file_parser import FileParsingError, is_supported_file
+from search_index import SOURCE_INDEX
+
+log = logging.getLogger(__name__)
+
+
+class ManifestEntry(NamedTuple):
+    """One file in a watched folder.
+
+    digest is None until the file has been hashed. parsed is None while a
+    pre-parse is pending (or when pre-parsing is off / the file type has no
+    parser), True once its parsed text is cached, False if parsing failed.
+    """
+
+    fname: str
+    path: str
+    size: int
+    mtime_ns: int
+    digest: Optional[str] = None
+    parsed: Optional[bool] = None
+
+
+def list_files(directory: str) -> List[Tuple[str, str, int, int]]:
+    """[(fname, path, size, mtime_ns), ...] for the non-hidden regular files
+    in directory, sorted by name; [] if it doesn't exist."""
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed between listing and stat
+            files.append((entry.name, entry.path, stat.st_size, stat.st_mtime_ns))
+    return sorted(files)
+
+
+class DirectoryWatcher:
+    """Manifest of one folder, kept current by mtime polling on a daemon thread."""
+
+    def __init__(self, directory: str, interval_s: float, preparse: bool = False):
+        self.directory = directory
+        self.interval_s = interval_s
+        self.preparse = preparse
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ManifestEntry] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> bool:
+        """Re-list the folder once; returns True if any file was added,
+        changed (size or mtime) or removed."""
+        listed = {fname: (path, size, mtime_ns) for fname, path, size, mtime_ns in list_files(self.directory)}
+        changed = False
+        with self._lock:
+            for fname in [f for f in self._entries if f not in listed]:
+                removed = self._entries.pop(fname)
+                if self.preparse:
+                    SOURCE_INDEX.remove(removed.path)
+                changed = True
+            for fname, (path, size, mtime_ns) in listed.items():
+                old = self._entries.get(fname)
+                if old is None or (old.size, old.mtime_ns) != (size, mtime_ns):
+                    self._entries[fname] = ManifestEntry(fname, path, size, mtime_ns)
+                    changed = True
+        return changed
+
+    def entries(self) -> List[ManifestEntry]:
+        """Current manifest, sorted by filename."""
+        with self._lock:
+            return [self._entries[fname] for fname in sorted(self._entries)]
+
+    def _preparse_pending(self) -> None:
+        """Hash, parse and index files the last scan added or saw change.
+
+        A file that fails for any reason is marked parsed=False, so it isn't
+        retried until its size or mtime changes (scan() then resets it), and
+        the rest of the pass still runs.
+        """
+        for entry in self.entries():
+            if entry.parsed is not None or not is_supported_file(entry.fname):
+                continue
+            digest, parsed = None, False
+            try:
+                digest = file_digest(entry.path)
+                parse_file_cached(entry.path, entry.fname)
+                parsed = True
+            except (FileParsingError, OSError) as exc:
+                log.info("[watcher] could not pre-parse %s: %s", entry.fname, exc)
+            except Exception:
+                log.exception("[watcher] unexpected error pre-parsing %s", entry.fname)
+            try:
+                SOURCE_INDEX.update(entry.path, entry.fname)
+            except Exception:
+                log.exception("[watcher] could not index %s", entry.fname)
+            with self._lock:
+                current = self._entries.get(entry.fname)
+                # skip if the file changed again while it was being parsed
+                if current is not None and (current.size, current.mtime_ns) == (entry.size, entry.mtime_ns):
+                    self._entries[entry.fname] = current._replace(digest=digest, parsed=parsed)
+
+    def _run(self) -> None:
+        while True:
+            if self.preparse:
+                try:
+                    self._preparse_pending()
+                except Exception:
+                    log.exception("[watcher] pre-parse failed for %s", self.directory)
+            if self._stop.wait(self.interval_s):
+                return
+            try:
+                self.scan()
+            except OSError as exc:
+                log.warning("[watcher] could not scan %s: %s", self.directory, exc)
+
+    def start(self) -> "DirectoryWatcher":
+        """Scan synchronously (so the manifest is complete on return), then
+        keep it current from a daemon thread."""
+        self.scan()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"watcher:{os.path.basename(self.directory)}", daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_WATCHERS: Dict[str, DirectoryWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def get_watcher(directory: str, interval_s: float, preparse: bool = False) -> DirectoryWatcher:
+    """Process-wide watcher for directory, started on first use and shared by
+    every Streamlit session. preparse is fixed by the first caller."""
+    key = os.path.abspath(directory)
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None:
+            watcher = _WATCHERS[key] = DirectoryWatcher(directory, interval_s, preparse=preparse).start()
+            log.info("[watcher] watching %s every %gs", key, interval_s)
+        return watcher
@@ -0,0 +1,38 @@
+"""Shared fixtures for the deck builder tests.
+
+deck_builder.py is a Streamlit script, so only its definitions (everything
+above "# Page setup") are loaded; st.status is faked.
+"""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _FakeStatus:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, *args, **kwargs):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def deck(monkeypatch):
+    """deck_builder's definitions, with st.status faked out."""
+    monkeypatch.syspath_prepend(APP_DIR)
+    path = os.path.join(APP_DIR, "deck_builder.py")
+    with open(path, encoding="utf-8") as f:
+        source = f.read().split("# Page setup")[0]
+    namespace = {"__name__": "deck_builder_definitions", "__file__": path}
+    exec(compile(source, path, "exec"), namespace)
+    namespace["st"] = SimpleNamespace(status=lambda *args, **kwargs: _FakeStatus())
+    return namespace
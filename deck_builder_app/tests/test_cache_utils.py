@@ -0,0 +1,132 @@
+"""cache_utils: DiskCache, the parse cache and the multi-pass map cache."""
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+from openai import PermissionDeniedError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_utils  # noqa: E402
+from cache_utils import DiskCache  # noqa: E402
+
+
+def test_hit_after_write_survives_restart(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1 << 20)
+    cache.set("k", {"text": "parsed"})
+
+    assert cache.get("k") == {"text": "parsed"}
+    assert DiskCache(str(tmp_path), max_bytes=1 << 20).get("k") == {"text": "parsed"}
+    assert cache.get("other", "missing") == "missing"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_lru_eviction_past_size_cap(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(cache_utils.time, "time", lambda: float(next(clock)))
+    value = "x" * 100
+    cache = DiskCache(str(tmp_path), max_bytes=3 * 150)
+
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+    cache.get("a")  # now "b" is least recently used
+    cache.set("d", value)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) == value for key in ("a", "c", "d"))
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) <= 3 * 150
+
+
+def test_entry_larger_than_cap_is_not_stored(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=64)
+
+    cache.set("big", "x" * 100)
+
+    assert cache.get("big") is None
+
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_utils.time, "time", lambda: now[0])
+    cache = DiskCache(str(tmp_path), max_bytes=1 << 20, ttl_s=60)
+    cache.set("k", "notes")
+
+    now[0] += 59
+    assert cache.get("k") == "notes"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_parse_cache_keyed_on_parser_version_and_max_chars(tmp_path, monkeypatch):
+    source = tmp_path / "sales.csv"
+    source.write_text("region,revenue\nnorth,10\n")
+    parses = []
+
+    def fake_parse_path(path, filename, max_chars):
+        parses.append(max_chars)
+        return f"parsed {len(parses)}"
+
+    monkeypatch.setattr(cache_utils, "PARSE_CACHE", DiskCache(str(tmp_path / "cache"), max_bytes=1 << 20))
+    monkeypatch.setattr(cache_utils, "parse_path", fake_parse_path)
+
+    assert cache_utils.parse_file_cached(str(source), "sales.csv") == "parsed 1"
+    assert cache_utils.parse_file_cached(str(source), "sales.csv") == "parsed 1"  # hit
+    assert cache_utils.parse_file_cached(str(source), "sales.csv", max_chars=10) == "parsed 2"
+    monkeypatch.setattr(cache_utils, "PARSER_VERSION", cache_utils.PARSER_VERSION + 1)
+    assert cache_utils.parse_file_cached(str(source), "sales.csv") == "parsed 3"
+    source.write_text("region,revenue\nsouth,20\n")
+    assert cache_utils.parse_file_cached(str(source), "sales.csv") == "parsed 4"
+    assert len(parses) == 4
+
+
+class _MapCompletions:
+    def __init__(self, status_code=None):
+        self.status_code = status_code
+        self.calls = 0
+
+    def create(self, model, messages, stream=False):
+        self.calls += 1
+        if self.status_code is not None:
+            response = httpx.Response(self.status_code, request=httpx.Request("POST", "http://gateway/v1"))
+            raise PermissionDeniedError("blocked", response=response, body=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="notes"))])
+
+
+def _map_setup(deck, tmp_path, status_code=None):
+    source = tmp_path / "board.docx"
+    source.write_bytes(b"board minutes")
+    deck["MAP_CACHE"] = DiskCache(str(tmp_path / "map"), max_bytes=1 << 20)
+    deck["parse_file_cached"] = lambda path, fname: "board minutes"
+    completions = _MapCompletions(status_code)
+    client = SimpleNamespace(base_url="http://gateway/v1", chat=SimpleNamespace(completions=completions))
+    return client, completions, str(source)
+
+
+def test_map_cache_hit_and_key_changes(deck, tmp_path):
+    client, completions, fpath = _map_setup(deck, tmp_path)
+
+    first = deck["_map_one"](client, "model", "board.docx", fpath, "Create a deck about hiring")
+    again = deck["_map_one"](client, "model", "board.docx", fpath, "please create a deck about hiring!")
+    assert (first[0], first[4]) == ("notes", False)
+    assert (again[0], again[4]) == ("notes", True)  # filler words don't change the key
+    assert completions.calls == 1
+
+    deck["_map_one"](client, "model", "board.docx", fpath, "a deck about churn")
+    deck["MAX_CHARS"] += 1
+    deck["_map_one"](client, "model", "board.docx", fpath, "a deck about churn")
+    deck["PARSER_VERSION"] += 1
+    deck["_map_one"](client, "model", "board.docx", fpath, "a deck about churn")
+    assert completions.calls == 4
+
+
+def test_map_403_is_never_cached(deck, tmp_path):
+    client, completions, fpath = _map_setup(deck, tmp_path, status_code=403)
+
+    for _ in range(2):
+        partial, reason, _parse_s, _call_s, cached = deck["_map_one"](client, "model", "board.docx", fpath, "deck")
+        assert (partial, reason, cached) == (None, "blocked (HTTP 403)", False)
+
+    assert completions.calls == 2
+    assert not (tmp_path / "map").exists() or os.listdir(tmp_path / "map") == []
@@ -0,0 +1,31 @@
+"""file_parser: file-object sources and .csv input."""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_parser import FileParsingError, parse_file_to_text  # noqa: E402
+
+
+def test_consumed_file_object_is_parsed_from_the_start():
+    upload = io.BytesIO(b"region,revenue\nnorth,10\n")
+    upload.read()  # e.g. hashed for the parse cache first
+
+    text = parse_file_to_text(upload, "sales.csv")
+
+    assert text == "Sheet: sales.csv\nregion | revenue\nnorth | 10"
+    assert upload.tell() == len(upload.getvalue())  # position restored
+
+
+def test_binary_csv_is_rejected():
+    with pytest.raises(FileParsingError, match="binary"):
+        parse_file_to_text(b"PK\x03\x04\x00\x00binary", "export.csv")
+
+
+def test_utf16_tsv():
+    data = "name\tcity\nJosé\tZürich\n".encode("utf-16")
+
+    assert parse_file_to_text(data, "export.tsv") == "Sheet: export.tsv\nname | city\nJosé | Zürich"
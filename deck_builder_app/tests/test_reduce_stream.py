@@ -0,0 +1,39 @@
+"""Regression tests for the non-streaming multi-pass reduce (_reduce_stream).
+
+The OpenAI client is faked; see conftest.py for the deck fixture.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, stream=False):
+        self.calls += 1
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="merged notes"))])
+        return iter(
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            for text in ("Slide 1", " / Slide 2")
+        )
+
+
+@pytest.mark.parametrize("tree_reduce", [False, True])
+def test_reduce_stream_with_timing(deck, tree_reduce):
+    deck["TREE_REDUCE_ENABLED"] = tree_reduce
+    deck["REDUCE_FAN_IN"] = 2
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    partials = [(f"f{i}.xlsx", f"notes {i}") for i in range(3)]
+    timing = {}
+
+    chunks = list(deck["_reduce_stream"](
+        client, "model", partials, "make a deck", [("bad.xlsx", "HTTP 403")], ["locked.docx"], timing=timing,
+    ))
+
+    assert "".join(chunks[:2]) == "Slide 1 / Slide 2"
+    assert "bad.xlsx (HTTP 403)" in chunks[-1] and "locked.docx" in chunks[-1]
+    assert timing["total_s"] >= 0 and "first_token_s" in timing
+    assert timing["tree"].get("levels", 0) == (1 if tree_reduce else 0)
@@ -0,0 +1,47 @@
+"""search_index: ranking restricted to the files a user may see."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_index  # noqa: E402
+from search_index import BM25Index  # noqa: E402
+
+DOCS = {
+    "/src/churn.docx": "quarterly churn by region",
+    "/src/hiring.docx": "hiring plan for engineering",
+    "/src/secret.docx": "churn churn churn acquisition target",
+}
+
+
+def _index(monkeypatch, paths):
+    parsed = []
+
+    def fake_parse(path, fname):
+        parsed.append(path)
+        return DOCS[path]
+
+    monkeypatch.setattr(search_index, "parse_file_cached", fake_parse)
+    monkeypatch.setattr(search_index, "file_digest", lambda path: DOCS[path])
+    index = BM25Index()
+    for path in paths:
+        index.update(path, os.path.basename(path))
+    return index, parsed
+
+
+def test_scores_over_paths_ignore_other_documents(monkeypatch):
+    visible = ["/src/churn.docx", "/src/hiring.docx"]
+    alone, _ = _index(monkeypatch, visible)
+    with_secret, _ = _index(monkeypatch, visible + ["/src/secret.docx"])
+
+    assert with_secret.scores("churn", visible) == alone.scores("churn", visible)
+    assert with_secret.scores("churn", visible)["/src/churn.docx"] > 0
+
+
+def test_retain_forgets_unlisted_documents(monkeypatch):
+    index, _ = _index(monkeypatch, list(DOCS))
+
+    index.retain(["/src/churn.docx"])
+
+    assert len(index) == 1
+    assert index.scores("hiring") == {"/src/churn.docx": 0.0}
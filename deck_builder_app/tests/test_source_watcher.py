@@ -0,0 +1,37 @@
+"""source_watcher: pre-parse failures stay per file."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import source_watcher  # noqa: E402
+from source_watcher import DirectoryWatcher  # noqa: E402
+
+
+def test_unexpected_parse_error_marks_only_that_file_failed(tmp_path, monkeypatch):
+    for name in ("a.csv", "bad.csv", "c.csv"):
+        (tmp_path / name).write_text("x,y\n1,2\n")
+    attempts = []
+
+    def fake_parse(path, fname):
+        attempts.append(fname)
+        if fname == "bad.csv":
+            raise ValueError("malformed")
+        return "text"
+
+    monkeypatch.setattr(source_watcher, "parse_file_cached", fake_parse)
+    monkeypatch.setattr(source_watcher.SOURCE_INDEX, "update", lambda path, fname: True)
+    watcher = DirectoryWatcher(str(tmp_path), interval_s=60, preparse=True)
+    watcher.scan()
+
+    watcher._preparse_pending()
+
+    assert {e.fname: e.parsed for e in watcher.entries()} == {"a.csv": True, "bad.csv": False, "c.csv": True}
+    watcher._preparse_pending()
+    assert attempts.count("bad.csv") == 1  # not retried until it changes
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("x,y\n1,2\n3,4\n")
+    watcher.scan()
+    watcher._preparse_pending()
+    assert attempts.count("bad.csv") == 2
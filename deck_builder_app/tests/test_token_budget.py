@@ -0,0 +1,79 @@
+"""token_budget: budget shares and whole-line trimming for single-pass packing."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import token_budget  # noqa: E402
+from token_budget import allocate_budget, count_tokens, pack_files  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    """Use the ~4 chars/token estimate so counts don't depend on tiktoken."""
+    monkeypatch.setattr(token_budget, "_get_encoder", lambda: None)
+
+
+def _sheet(name, rows):
+    return "\n".join([f"Sheet: {name}", "region | revenue | note"] + rows)
+
+
+def test_allocate_budget_water_fills():
+    assert allocate_budget([10, 20], [1.0, 1.0], 100) == [10, 20]
+    # the small item is kept whole and the large ones split the surplus by weight
+    assert allocate_budget([10, 1000, 1000], [1.0, 1.0, 3.0], 410) == [10, 100, 300]
+    assert allocate_budget([0, 50], [1.0, 1.0], 10) == [0, 10]
+
+
+def test_small_files_are_kept_whole():
+    files = [("notes.docx", "Hiring plan for Q3."), ("tiny.xlsx", _sheet("Tiny", ["north | 10 | ok"]))]
+
+    packed = pack_files(files, budget=1000)
+
+    assert [p.text for p in packed] == [text for _, text in files]
+    assert not any(p.trimmed for p in packed)
+
+
+def test_large_file_trimmed_to_its_share_keyword_rows_first():
+    rows = [f"region{i} | {i * 100} | steady" for i in range(200)]
+    rows[150] = "region150 | 15000 | churn spike"
+    small = ("memo.docx", "Board memo about churn.")
+    large = ("sales.xlsx", _sheet("Revenue", rows))
+    budget = 300
+
+    packed = pack_files([small, large], budget=budget, keywords={"churn"})
+
+    memo, sales = packed
+    assert memo.text == small[1]
+    assert sales.trimmed and 0 < sales.kept_lines < sales.total_lines == 200
+    assert count_tokens(memo.text) + count_tokens(sales.text) <= budget + 10  # + the trim marker
+    lines = sales.text.split("\n")
+    assert lines[:2] == ["Sheet: Revenue", "region | revenue | note"]  # headings kept
+    assert "region150 | 15000 | churn spike" in lines
+    kept_rows = [line for line in lines[2:] if line.startswith("region")]
+    assert kept_rows == sorted(kept_rows, key=rows.index)  # original order
+    assert lines[-1] == f"...[{200 - sales.kept_lines} more rows trimmed]"
+
+
+def test_every_sheet_keeps_its_heading():
+    text = "\n\n".join(
+        _sheet(name, [f"{name.lower()}{i} | {i} | x" for i in range(100)]) for name in ("North", "South")
+    )
+
+    (packed,) = pack_files([("regions.xlsx", text)], budget=120)
+
+    assert "Sheet: North" in packed.text and "Sheet: South" in packed.text
+    assert packed.text.count("region | revenue | note") == 2
+    assert packed.text.count("more rows trimmed]") == 2
+
+
+def test_file_whose_headings_do_not_fit_is_dropped():
+    text = _sheet("A very long sheet name " * 10, ["north | 10 | ok"] * 50)
+
+    (packed,) = pack_files([("wide.xlsx", text)], budget=20)
+
+    assert packed.text is None
+    assert (packed.kept_lines, packed.total_lines) == (0, 50)
+    assert not packed.trimmed
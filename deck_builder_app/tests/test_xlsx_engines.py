@@ -0,0 +1,163 @@
+"""file_parser: the fast .xlsx engine gives the same text as openpyxl."""
+import datetime
+import io
+import os
+import sys
+import zipfile
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_parser import parse_xlsx_to_text  # noqa: E402
+
+_NS = "http://schemas.openxmlformats.org/"
+_MAIN = f'xmlns="{_NS}spreadsheetml/2006/main"'
+_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# Style 1: built-in date format 14; style 2: custom datetime; style 3: duration.
+_STYLES = (
+    f"<styleSheet {_MAIN}>"
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="[h]:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+_SHARED_STRINGS = [
+    "<si><t>region</t></si>",
+    "<si><t>closed</t></si>",
+    "<si><t>north</t></si>",
+    "<si><r><t>rich </t></r><r><rPr><b/></rPr><t>south</t></r></si>",
+    "<si><t xml:space=\"preserve\"> padded </t></si>",
+    "<si><t>under_x005F_score</t></si>",
+]
+
+_SHEET1_ROWS = (
+    # header: shared strings and an inline string
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c>'
+    '<c r="C1" t="inlineStr"><is><t>won</t></is></c><c r="D1" t="inlineStr"><is><t>amount</t></is></c>'
+    '<c r="E1" t="inlineStr"><is><t>total</t></is></c><c r="F1" t="inlineStr"><is><t>elapsed</t></is></c></row>'
+    # dates (built-in and custom formats), booleans, int/float, cached formula values
+    '<row r="2"><c r="A2" t="s"><v>2</v></c><c r="B2" s="1"><v>45352</v></c><c r="C2" t="b"><v>1</v></c>'
+    '<c r="D2"><v>1.5</v></c><c r="E2"><f>D2*2</f><v>3</v></c><c r="F2" s="3"><v>1.25</v></c></row>'
+    '<row r="3"><c r="A3" t="s"><v>3</v></c><c r="B3" s="2"><v>45352.520833333336</v></c>'
+    '<c r="C3" t="b"><v>0</v></c><c r="D3"><v>7</v></c><c r="E3" t="str"><f>A3&amp;"!"</f><v>rich south!</v></c></row>'
+    # blanks: a gap row, missing cells, an empty value, a formula without a cached value, an error
+    '<row r="5"><c r="A5" t="s"><v>4</v></c><c r="C5"/><c r="D5"><v></v></c>'
+    '<c r="E5"><f>D5/0</f></c><c r="F5" t="e"><v>#DIV/0!</v></c></row>'
+    '<row r="6"><c r="B6" t="s"><v>5</v></c><c r="D6"><v>1E+3</v></c></row>'
+)
+
+# No <dimension> and no cell references, as some streaming writers save it
+_SHEET2_ROWS = (
+    '<row><c t="inlineStr"><is><t>quarter</t></is></c><c t="inlineStr"><is><t>target</t></is></c></row>'
+    '<row><c t="s"><v>2</v></c><c><v>100</v></c></row>'
+    "<row/>"
+    '<row><c t="b"><v>1</v></c></row>'
+)
+
+
+def _build_workbook(date1904=False) -> bytes:
+    """Two worksheets laid out the way Excel saves them: a shared string
+    table, date/duration-styled serials, booleans, blanks and formulas."""
+    sheets = [("Deals", "A1:F6", _SHEET1_ROWS), ("Targets", None, _SHEET2_ROWS)]
+    parts = {
+        "[Content_Types].xml": (
+            f'<Types xmlns="{_NS}package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CONTENT_TYPE}.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{_CONTENT_TYPE}.worksheet+xml"/>'
+                for i in range(1, len(sheets) + 1)
+            )
+            + f'<Override PartName="/xl/styles.xml" ContentType="{_CONTENT_TYPE}.styles+xml"/>'
+            f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_CONTENT_TYPE}.sharedStrings+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            f'<Relationships xmlns="{_NS}package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_NS}officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            f'<Relationships xmlns="{_NS}package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" Type="{_NS}officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, len(sheets) + 1)
+            )
+            + f'<Relationship Id="rIdS" Type="{_NS}officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rIdT" Type="{_NS}officeDocument/2006/relationships/sharedStrings" '
+            'Target="sharedStrings.xml"/></Relationships>'
+        ),
+        "xl/workbook.xml": (
+            f'<workbook {_MAIN} xmlns:r="{_NS}officeDocument/2006/relationships">'
+            + ('<workbookPr date1904="1"/>' if date1904 else "")
+            + "<sheets>"
+            + "".join(
+                f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, (name, _, _) in enumerate(sheets, 1)
+            )
+            + "</sheets></workbook>"
+        ),
+        "xl/styles.xml": _STYLES,
+        "xl/sharedStrings.xml": (
+            f'<sst {_MAIN} count="{len(_SHARED_STRINGS)}" uniqueCount="{len(_SHARED_STRINGS)}">'
+            + "".join(_SHARED_STRINGS) + "</sst>"
+        ),
+    }
+    for i, (_, dimension, rows) in enumerate(sheets, 1):
+        parts[f"xl/worksheets/sheet{i}.xml"] = (
+            f"<worksheet {_MAIN}>"
+            + (f'<dimension ref="{dimension}"/>' if dimension else "")
+            + f"<sheetData>{rows}</sheetData></worksheet>"
+        )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, xml in parts.items():
+            package.writestr(name, xml)
+    return buf.getvalue()
+
+
+def _openpyxl_saved_workbook() -> bytes:
+    """A workbook saved by openpyxl: inline strings, uncached formulas."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Saved"
+    sheet.append(["name", "when", "ok", "amount", "double"])
+    sheet.append(["alpha", datetime.datetime(2024, 3, 1, 12, 30), True, 1.5, "=D2*2"])
+    sheet.append(["beta", None, False, 7, "=D3*2"])
+    sheet["A6"] = "gamma"
+    buf = io.BytesIO()
+    workbook.save(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("summary_rows", [0, 2])
+@pytest.mark.parametrize(
+    "data",
+    [_build_workbook(), _build_workbook(date1904=True), _openpyxl_saved_workbook()],
+    ids=["excel-layout", "date1904", "openpyxl-saved"],
+)
+def test_fast_engine_matches_openpyxl(data, summary_rows):
+    expected = parse_xlsx_to_text(data, "book.xlsx", engine="openpyxl", summary_rows=summary_rows)
+
+    assert parse_xlsx_to_text(data, "book.xlsx", engine="fast", summary_rows=summary_rows) == expected
+
+
+def test_excel_layout_values():
+    text = parse_xlsx_to_text(_build_workbook(), "book.xlsx", engine="fast", summary_rows=0)
+
+    for value in ("rich south", "2024-03-01", "True", "False", "#DIV/0!", "under_score", "1000.0"):
+        assert value in text
+    assert "Sheet: Targets" in text
@@ -0,0 +1,189 @@
+"""Token-budgeted packing of parsed files into one prompt (no Streamlit dependency).
+
+Used by the deck builder's single-pass mode: every eligible file's parsed
+text goes into ONE prompt, so a global token budget is shared out across
+files (by relevance and size) and each file is trimmed to its share a whole
+line — i.e. a whole spreadsheet row or paragraph — at a time.
+
+Token counts come from tiktoken when it is installed and its encoding can
+be loaded (set TIKTOKEN_CACHE_DIR for offline use); otherwise they are
+estimated at ~4 characters per token.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "").strip() or "cl100k_base"
+
+_SHEET_PREFIX = "Sheet: "
+_TRUNCATION_MARKERS = ("...[truncated]", "...[remaining rows truncated]")
+
+_ENCODER = None
+_ENCODER_LOADED = False
+_ENCODER_LOCK = threading.Lock()
+
+
+def _get_encoder():
+    """tiktoken encoding, or None if tiktoken or its encoding file is unavailable.
+    Loaded once per process; a failed load is not retried."""
+    global _ENCODER, _ENCODER_LOADED
+    with _ENCODER_LOCK:
+        if not _ENCODER_LOADED:
+            _ENCODER_LOADED = True
+            try:
+                import tiktoken
+
+                _ENCODER = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as exc:  # not installed, or no network to fetch the encoding
+                log.info("[tokens] tiktoken unavailable (%s); estimating ~4 chars/token", exc)
+    return _ENCODER
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (tiktoken if available, else ~4 chars/token)."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+class PackedFile(NamedTuple):
+    """One file's outcome in pack_files().
+
+    text is None when the file was dropped entirely (not even its headings
+    fit). kept_lines / total_lines count content lines (rows, paragraphs),
+    not headings.
+    """
+
+    fname: str
+    text: Optional[str]
+    kept_lines: int
+    total_lines: int
+
+    @property
+    def trimmed(self) -> bool:
+        return self.text is not None and self.kept_lines < self.total_lines
+
+
+def allocate_budget(needs: Sequence[int], weights: Sequence[float], budget: int) -> List[int]:
+    """Split budget across items needing needs[i] tokens, by weight.
+
+    Water-filling: an item whose weighted share exceeds its need gets exactly
+    its need, and the surplus is shared out again among the rest, so small
+    files are kept whole and large ones split what's left in proportion to
+    their weights.
+    """
+    shares = [0] * len(needs)
+    open_items = [i for i, need in enumerate(needs) if need > 0]
+    remaining = budget
+    while open_items and remaining > 0:
+        total_weight = sum(weights[i] for i in open_items) or len(open_items)
+        satisfied = [i for i in open_items if needs[i] <= remaining * weights[i] / total_weight]
+        if not satisfied:
+            for i in open_items:
+                shares[i] = int(remaining * weights[i] / total_weight)
+            break
+        for i in satisfied:
+            shares[i] = needs[i]
+            remaining -= needs[i]
+        open_items = [i for i in open_items if i not in satisfied]
+    return shares
+
+
+def _split_sections(text: str) -> List[Tuple[List[str], List[str]]]:
+    """Split parser output into (heading lines, content lines) sections.
+
+    Spreadsheets: one section per "Sheet: <name>" block, whose heading is the
+    sheet line plus the first row (the column headers). Anything else
+    (documents) is a single section with no heading. Parser truncation
+    markers are dropped — the packer reports its own trims.
+    """
+    sections: List[Tuple[List[str], List[str]]] = []
+    for line in text.split("\n"):
+        if line in _TRUNCATION_MARKERS or not line.strip():
+            continue
+        if line.startswith(_SHEET_PREFIX):
+            sections.append(([line], []))
+        elif not sections:
+            sections.append(([], [line]))
+        elif len(sections[-1][0]) == 1 and sections[-1][0][0].startswith(_SHEET_PREFIX) and not sections[-1][1]:
+            sections[-1][0].append(line)
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def _line_weight(line: str, keywords: set) -> int:
+    return 1 if keywords and keywords & set(re.findall(r"[a-z0-9]+", line.lower())) else 0
+
+
+def _trim_to_budget(text: str, budget: int, keywords: set) -> Tuple[Optional[str], int, int]:
+    """Keep whole lines of text within budget tokens.
+
+    Every section keeps its heading; the rest of the budget is shared across
+    sections (allocate_budget), and within a section lines mentioning a
+    keyword are kept first, then the earliest others. Kept lines stay in
+    their original order, followed by a "...[N more rows trimmed]" marker.
+
+    Returns (text or None if even the headings don't fit, kept_lines, total_lines).
+    """
+    sections = _split_sections(text)
+    total_lines = sum(len(content) for _, content in sections)
+    heading_tokens = sum(count_tokens(line) + 1 for heading, _ in sections for line in heading)
+    if heading_tokens > budget:
+        return None, 0, total_lines
+
+    line_tokens = [[count_tokens(line) + 1 for line in content] for _, content in sections]
+    shares = allocate_budget([sum(t) for t in line_tokens], [1.0] * len(sections), budget - heading_tokens)
+
+    out: List[str] = []
+    kept_lines = 0
+    for (heading, content), tokens, share in zip(sections, line_tokens, shares):
+        order = sorted(range(len(content)), key=lambda i: (-_line_weight(content[i], keywords), i))
+        keep, used = set(), 0
+        for i in order:
+            if used + tokens[i] <= share:
+                keep.add(i)
+                used += tokens[i]
+        out.extend(heading)
+        out.extend(content[i] for i in sorted(keep))
+        if len(keep) < len(content):
+            unit = "rows" if heading else "lines"
+            out.append(f"...[{len(content) - len(keep)} more {unit} trimmed]")
+        kept_lines += len(keep)
+        if heading:
+            out.append("")
+    return "\n".join(out).strip(), kept_lines, total_lines
+
+
+def pack_files(
+    files: Sequence[Tuple[str, str]], budget: int, keywords: set = frozenset(),
+    relevance: Optional[Dict[str, float]] = None,
+) -> List[PackedFile]:
+    """Fit [(fname, parsed_text), ...] into budget tokens in total.
+
+    Each file's share comes from allocate_budget, weighted by relevance
+    (fname -> weight, default 1.0); files that fit their share are kept
+    whole, the rest are trimmed a whole line at a time (_trim_to_budget),
+    preferring lines that mention one of keywords.
+
+    Returns a PackedFile per input file, in input order.
+    """
+    relevance = relevance or {}
+    needs = [count_tokens(text) for _, text in files]
+    weights = [max(relevance.get(fname, 1.0), 0.01) for fname, _ in files]
+    shares = allocate_budget(needs, weights, budget)
+
+    packed: List[PackedFile] = []
+    for (fname, text), need, share in zip(files, needs, shares):
+        total_lines = sum(len(content) for _, content in _split_sections(text))
+        if need <= share:
+            packed.append(PackedFile(fname, text, total_lines, total_lines))
+            continue
+        trimmed, kept_lines, total_lines = _trim_to_budget(text, share, keywords)
+        packed.append(PackedFile(fname, trimmed, kept_lines, total_lines))
+    return packed
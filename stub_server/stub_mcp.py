@@ -0,0 +1,96 @@
+"""Deterministic MCP tools for the offline stub server.
+
+Exposes Jira- and billing-style tools over streamable HTTP so the agent
+apps (daxa_chatbot_app Safe/InSecure Agent, the LangGraph apps) can discover
+and call tools with no upstream service. Results depend only on the
+arguments, so repeated benchmark runs see identical payloads.
+"""
+import asyncio
+import hashlib
+import json
+import os
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
+
+# Delay added to every tool call, and filler appended to each result so
+# payload size can be varied (both overridable from the stub_server CLI).
+TOOL_LATENCY_S = float(os.getenv("STUB_TOOL_LATENCY_S", "0.1").strip() or 0)
+TOOL_RESULT_CHARS = int(os.getenv("STUB_TOOL_RESULT_CHARS", "0").strip() or 0)
+
+_STATUSES = ["To Do", "In Progress", "In Review", "Done"]
+_PEOPLE = ["alice@example.com", "bob@example.com", "carol@example.com", "dave@example.com"]
+
+mcp = FastMCP(
+    "daxa-stub",
+    streamable_http_path="/mcp",
+    # Local benchmarking only: accept any Host header (0.0.0.0, docker, ...)
+    transport_security=TransportSecuritySettings(enable_dns_rebinding_protection=False),
+)
+
+
+def _pick(seed: str, options: list):
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return options[digest[0] % len(options)]
+
+
+def _result(payload: dict) -> str:
+    if TOOL_RESULT_CHARS > 0:
+        payload["notes"] = ("lorem ipsum " * (TOOL_RESULT_CHARS // 12 + 1))[:TOOL_RESULT_CHARS]
+    return json.dumps(payload)
+
+
+async def _tool_delay() -> None:
+    if TOOL_LATENCY_S > 0:
+        await asyncio.sleep(TOOL_LATENCY_S)
+
+
+@mcp.tool()
+async def jira_get_issue(issue_key: str) -> str:
+    """Get a Jira issue by key, e.g. KAN-19."""
+    await _tool_delay()
+    return _result({
+        "key": issue_key,
+        "summary": f"Stub issue {issue_key}",
+        "status": _pick(issue_key, _STATUSES),
+        "assignee": _pick(issue_key[::-1], _PEOPLE),
+        "description": f"Deterministic stub description for {issue_key}.",
+    })
+
+
+@mcp.tool()
+async def jira_search(jql: str, limit: int = 5) -> str:
+    """Search Jira issues with a JQL query."""
+    await _tool_delay()
+    count = max(0, min(limit, 20))
+    issues = [
+        {"key": f"KAN-{10 + i}", "summary": f"Stub result {i + 1} for {jql!r}",
+         "status": _pick(f"{jql}{i}", _STATUSES)}
+        for i in range(count)
+    ]
+    return _result({"jql": jql, "total": count, "issues": issues})
+
+
+@mcp.tool()
+async def billing_get_customer(customer_id: str) -> str:
+    """Get a billing customer's account details."""
+    await _tool_delay()
+    return _result({
+        "customer_id": customer_id,
+        "name": f"Customer {customer_id}",
+        "email": _pick(customer_id, _PEOPLE),
+        "plan": _pick(customer_id[::-1], ["free", "pro", "enterprise"]),
+    })
+
+
+@mcp.tool()
+async def billing_list_invoices(customer_id: str, limit: int = 3) -> str:
+    """List recent invoices for a billing customer."""
+    await _tool_delay()
+    digest = hashlib.sha256(customer_id.encode("utf-8")).digest()
+    invoices = [
+        {"invoice_id": f"INV-{customer_id}-{i + 1}", "amount_usd": 50 + digest[i % len(digest)],
+         "status": "paid" if i else "open"}
+        for i in range(max(0, min(limit, 12)))
+    ]
+    return _result({"customer_id": customer_id, "invoices": invoices})
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the OpenAI-compatible LLM endpoints and MCP servers.
+
+Serves deterministic replies with configurable latency, token rate and
+HTTP 403 injection, so latency and throughput benchmarks of the demo apps
+run with no network and give repeatable numbers.
+
+LLM routes (same handlers under /v1, /llm/v1 and /safe_infer/llm/v1):
+    GET  /models
+    POST /chat/completions     streaming and non-streaming, tool calls
+    POST /responses            streaming and non-streaming
+Other routes:
+    GET  /safe_infer/healthz, /health
+    POST /mcp                  streamable-HTTP MCP server (see stub_mcp.py)
+
+Usage:
+    python stub_server.py                                   # -> http://localhost:8090
+    python stub_server.py --latency 0.5 --tokens-per-s 40
+    python stub_server.py --forbid-pattern salary           # 403 on matching prompts
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+import stub_mcp
+
+log = logging.getLogger("stub_server")
+
+_WORDS = (
+    "the quarterly report shows steady growth across regions with billing volume "
+    "up and support tickets down while the team focuses on reliability latency "
+    "and customer onboarding for the next release cycle"
+).split()
+
+_ISSUE_KEY_RE = re.compile(r"\b[A-Z][A-Z0-9]+-\d+\b")
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.getenv(name, default).strip() or default)
+
+
+@dataclass
+class StubSettings:
+    """Knobs shared by every request; set from env, overridable from the CLI."""
+    latency_s: float = field(default_factory=lambda: _env_float("STUB_LATENCY_S", "0.2"))
+    tokens_per_s: float = field(default_factory=lambda: _env_float("STUB_TOKENS_PER_S", "50"))
+    reply_tokens: int = field(default_factory=lambda: int(_env_float("STUB_REPLY_TOKENS", "60")))
+    forbid_rate: float = field(default_factory=lambda: _env_float("STUB_FORBID_RATE", "0"))
+    forbid_pattern: str = field(default_factory=lambda: os.getenv("STUB_FORBID_PATTERN", "").strip())
+    tool_calls: bool = field(
+        default_factory=lambda: os.getenv("STUB_TOOL_CALLS", "true").strip().lower() == "true"
+    )
+    models: List[str] = field(default_factory=lambda: [
+        m.strip() for m in os.getenv("STUB_MODELS", "gpt-4o-mini,gpt-4o,gpt-5-mini").split(",") if m.strip()
+    ])
+    seed: int = field(default_factory=lambda: int(_env_float("STUB_SEED", "0")))
+
+
+SETTINGS = StubSettings()
+_forbid_rng = random.Random(SETTINGS.seed)
+
+
+# ---------------------------------------------------------------------------
+# Reply synthesis
+# ---------------------------------------------------------------------------
+
+def _text_of(content) -> str:
+    """Flatten OpenAI message/input content (str or list of parts) to text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(_text_of(part.get("text") or part.get("content") or "")
+                        for part in content if isinstance(part, dict))
+    return ""
+
+
+def _estimate_tokens(payload) -> int:
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+def _reply_words(prompt: str, prefix: str = "") -> List[str]:
+    """reply_tokens words, seeded by the prompt so the same prompt gets the same reply."""
+    rng = random.Random(f"{SETTINGS.seed}:{prompt}")
+    words = prefix.split() + [rng.choice(_WORDS) for _ in range(SETTINGS.reply_tokens)]
+    return words[:max(1, SETTINGS.reply_tokens)]
+
+
+def _forbidden(body: dict) -> bool:
+    """Decide whether this request gets the 403 a Safe Infer policy block returns."""
+    if SETTINGS.forbid_pattern and re.search(SETTINGS.forbid_pattern, json.dumps(body), re.IGNORECASE):
+        return True
+    return SETTINGS.forbid_rate > 0 and _forbid_rng.random() < SETTINGS.forbid_rate
+
+
+def _forbidden_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=403,
+        content={"error": {"message": "Request blocked by policy (stub)", "type": "forbidden", "code": 403}},
+    )
+
+
+def _stub_args(parameters: dict, user_text: str) -> dict:
+    """Fill a tool's required JSON-schema parameters from the user's message."""
+    issue_keys = _ISSUE_KEY_RE.findall(user_text)
+    args = {}
+    properties = parameters.get("properties", {})
+    for name in parameters.get("required", list(properties)):
+        kind = properties.get(name, {}).get("type", "string")
+        if kind == "string":
+            args[name] = issue_keys[0] if issue_keys else "stub"
+        elif kind in ("integer", "number"):
+            args[name] = 1
+        elif kind == "boolean":
+            args[name] = False
+        elif kind == "array":
+            args[name] = []
+        else:
+            args[name] = {}
+    return args
+
+
+def _plan_tool_calls(tools: list, user_text: str) -> List[dict]:
+    """Call the tools named in the user's message (else the first tool), once each."""
+    functions = [t["function"] for t in tools if t.get("type") == "function" and "function" in t]
+    if not functions:
+        return []
+    chosen = [f for f in functions if f["name"] in user_text] or functions[:1]
+    return [
+        {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": f["name"], "arguments": json.dumps(_stub_args(f.get("parameters") or {}, user_text))},
+        }
+        for f in chosen
+    ]
+
+
+def _plan_chat_reply(body: dict) -> Tuple[List[str], List[dict]]:
+    """(reply words, tool calls) for a chat.completions request."""
+    messages = body.get("messages") or []
+    last = messages[-1] if messages else {}
+    if SETTINGS.tool_calls and body.get("tools") and last.get("role") == "user":
+        tool_calls = _plan_tool_calls(body["tools"], _text_of(last.get("content")))
+        if tool_calls:
+            return [], tool_calls
+    user_turns = [m for m in messages if m.get("role") == "user"]
+    prompt = _text_of(user_turns[-1].get("content")) if user_turns else ""
+    tool_results = 0
+    for m in reversed(messages):
+        if m.get("role") != "tool":
+            break
+        tool_results += 1
+    prefix = f"Based on {tool_results} tool result(s):" if tool_results else ""
+    return _reply_words(prompt, prefix), []
+
+
+async def _paced(words: List[str]) -> AsyncIterator[str]:
+    """Yield words (with leading spaces) at tokens_per_s after the first-byte latency."""
+    await asyncio.sleep(SETTINGS.latency_s)
+    delay = 1 / SETTINGS.tokens_per_s if SETTINGS.tokens_per_s > 0 else 0
+    for i, word in enumerate(words):
+        if delay and i:
+            await asyncio.sleep(delay)
+        yield word if i == 0 else f" {word}"
+
+
+async def _full_delay(n_tokens: int) -> None:
+    rate = SETTINGS.tokens_per_s
+    await asyncio.sleep(SETTINGS.latency_s + (n_tokens / rate if rate > 0 else 0))
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+# ---------------------------------------------------------------------------
+# chat.completions
+# ---------------------------------------------------------------------------
+
+llm = APIRouter()
+
+
+@llm.get("/models")
+def list_models():
+    return {
+        "object": "list",
+        "data": [{"id": m, "object": "model", "created": 0, "owned_by": "stub"} for m in SETTINGS.models],
+    }
+
+
+@llm.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if _forbidden(body):
+        return _forbidden_response()
+    words, tool_calls = _plan_chat_reply(body)
+    model = body.get("model") or SETTINGS.models[0]
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    prompt_tokens = _estimate_tokens(body.get("messages"))
+    completion_tokens = len(words) + sum(_estimate_tokens(tc["function"]) for tc in tool_calls)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    finish_reason = "tool_calls" if tool_calls else "stop"
+
+    if not body.get("stream"):
+        await _full_delay(completion_tokens)
+        message = {"role": "assistant", "content": None if tool_calls else "".join(
+            w if i == 0 else f" {w}" for i, w in enumerate(words))}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    def chunk(delta: dict, finish: Optional[str] = None) -> str:
+        return _sse({
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        })
+
+    async def stream():
+        yield chunk({"role": "assistant", "content": ""})
+        if tool_calls:
+            await _full_delay(completion_tokens)
+            yield chunk({"tool_calls": [dict(tc, index=i) for i, tc in enumerate(tool_calls)]})
+        else:
+            async for piece in _paced(words):
+                yield chunk({"content": piece})
+        yield chunk({}, finish_reason)
+        if include_usage:
+            yield _sse({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [], "usage": usage,
+            })
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# ---------------------------------------------------------------------------
+# responses
+# ---------------------------------------------------------------------------
+
+def _responses_prompt(body: dict) -> str:
+    given = body.get("input")
+    if isinstance(given, list):
+        return " ".join(_text_of(item.get("content")) for item in given if isinstance(item, dict))
+    return _text_of(given)
+
+
+@llm.post("/responses")
+async def responses(request: Request):
+    body = await request.json()
+    if _forbidden(body):
+        return _forbidden_response()
+    words = _reply_words(_responses_prompt(body))
+    text = "".join(w if i == 0 else f" {w}" for i, w in enumerate(words))
+    input_tokens = _estimate_tokens(body.get("input"))
+    response_id = f"resp_{uuid.uuid4().hex[:24]}"
+    item_id = f"msg_{uuid.uuid4().hex[:24]}"
+
+    def snapshot(status: str, output_text: Optional[str]) -> Dict:
+        output = []
+        if output_text is not None:
+            output = [{
+                "type": "message", "id": item_id, "status": "completed", "role": "assistant",
+                "content": [{"type": "output_text", "text": output_text, "annotations": []}],
+            }]
+        return {
+            "id": response_id, "object": "response", "created_at": int(time.time()), "status": status,
+            "model": body.get("model") or SETTINGS.models[0], "output": output,
+            "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+            "usage": {
+                "input_tokens": input_tokens, "output_tokens": len(words),
+                "total_tokens": input_tokens + len(words),
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens_details": {"reasoning_tokens": 0},
+            } if status == "completed" else None,
+        }
+
+    if not body.get("stream"):
+        await _full_delay(len(words))
+        return snapshot("completed", text)
+
+    async def stream():
+        seq = 0
+
+        def event(kind: str, **data) -> str:
+            nonlocal seq
+            seq += 1
+            return _sse({"type": kind, "sequence_number": seq, **data}, event=kind)
+
+        part = {"type": "output_text", "text": "", "annotations": []}
+        where = {"item_id": item_id, "output_index": 0, "content_index": 0}
+        yield event("response.created", response=snapshot("in_progress", None))
+        yield event("response.output_item.added", output_index=0, item={
+            "type": "message", "id": item_id, "status": "in_progress", "role": "assistant", "content": [],
+        })
+        yield event("response.content_part.added", part=part, **where)
+        async for piece in _paced(words):
+            yield event("response.output_text.delta", delta=piece, logprobs=[], **where)
+        yield event("response.output_text.done", text=text, logprobs=[], **where)
+        yield event("response.content_part.done", part=dict(part, text=text), **where)
+        final = snapshot("completed", text)
+        yield event("response.output_item.done", output_index=0, item=final["output"][0])
+        yield event("response.completed", response=final)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# ---------------------------------------------------------------------------
+# App
+# ---------------------------------------------------------------------------
+
+_mcp_app = stub_mcp.mcp.streamable_http_app()
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Mounted sub-apps don't get lifespan events; the MCP session manager
+    # must be running before /mcp can serve requests.
+    async with stub_mcp.mcp.session_manager.run():
+        yield
+
+
+app = FastAPI(title="Daxa Stub LLM + MCP Server", docs_url=None, redoc_url=None, lifespan=_lifespan)
+for _prefix in ("/v1", "/llm/v1", "/safe_infer/llm/v1"):
+    app.include_router(llm, prefix=_prefix)
+
+
+@app.get("/health")
+@app.get("/safe_infer/healthz")
+def health():
+    return {"status": "ok"}
+
+
+# Registered last so the routes above take precedence; serves POST /mcp.
+app.mount("/", _mcp_app)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline stub LLM + MCP server")
+    parser.add_argument("--host", default=os.getenv("STUB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", "8090")))
+    parser.add_argument("--latency", type=float, default=SETTINGS.latency_s,
+                        help="Seconds before the first token / response")
+    parser.add_argument("--tokens-per-s", type=float, default=SETTINGS.tokens_per_s,
+                        help="Output token rate; 0 = unthrottled")
+    parser.add_argument("--reply-tokens", type=int, default=SETTINGS.reply_tokens,
+                        help="Tokens (words) per text reply")
+    parser.add_argument("--forbid-rate", type=float, default=SETTINGS.forbid_rate,
+                        help="Fraction of LLM requests answered with HTTP 403 (seeded)")
+    parser.add_argument("--forbid-pattern", default=SETTINGS.forbid_pattern,
+                        help="Regex; LLM requests whose body matches get HTTP 403")
+    parser.add_argument("--no-tool-calls", action="store_true",
+                        help="Never answer with tool calls, even when tools are offered")
+    parser.add_argument("--tool-latency", type=float, default=stub_mcp.TOOL_LATENCY_S,
+                        help="Seconds added to every MCP tool call")
+    parser.add_argument("--tool-result-chars", type=int, default=stub_mcp.TOOL_RESULT_CHARS,
+                        help="Filler characters appended to every MCP tool result")
+    parser.add_argument("--seed", type=int, default=SETTINGS.seed)
+    args = parser.parse_args()
+
+    global _forbid_rng
+    SETTINGS.latency_s = max(0.0, args.latency)
+    SETTINGS.tokens_per_s = max(0.0, args.tokens_per_s)
+    SETTINGS.reply_tokens = max(1, args.reply_tokens)
+    SETTINGS.forbid_rate = min(1.0, max(0.0, args.forbid_rate))
+    SETTINGS.forbid_pattern = args.forbid_pattern
+    SETTINGS.tool_calls = SETTINGS.tool_calls and not args.no_tool_calls
+    SETTINGS.seed = args.seed
+    _forbid_rng = random.Random(args.seed)
+    stub_mcp.TOOL_LATENCY_S = max(0.0, args.tool_latency)
+    stub_mcp.TOOL_RESULT_CHARS = max(0, args.tool_result_chars)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    log.info("[stub] serving on http://%s:%d (%s)", args.host, args.port, SETTINGS)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()